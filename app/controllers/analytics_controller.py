@@ -1,20 +1,45 @@
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 from fastapi import HTTPException, status
 from app.models.vitals import Vital
 from app.models.user import User
+from app.models.notification import Notification
+from app.models.alert_rule import AlertRule
+from app.models.analytics_snapshot import AnalyticsSnapshot
+from app.services.alert_rules import alert_rule_engine
+from app.core.http_cache import mark_changed
+from app.services.baseline_service import baseline_detector
+from app.services.health_score_service import health_score_service
+from app.services.risk_model import score_users
+import redis
 import statistics
 import uuid
 
 class AnalyticsController:
+    @staticmethod
+    def get_snapshot_section(db: Session, user_id: str, section: str, compute):
+        """Serve a section of the latest nightly snapshot, computing live for users without one"""
+        snapshot = db.query(AnalyticsSnapshot).filter(
+            AnalyticsSnapshot.user_id == user_id
+        ).order_by(AnalyticsSnapshot.computed_at.desc()).first()
+        
+        if snapshot and section in snapshot.data:
+            result = dict(snapshot.data[section])
+            result["snapshot_at"] = snapshot.computed_at.isoformat()
+            return result
+        
+        result = compute(db, user_id)
+        result["snapshot_at"] = None
+        return result
+
     @staticmethod
     def get_health_insights(db: Session, user_id: str):
         """Get personalized health insights and recommendations"""
-        # Get recent vitals for analysis
-        recent_vitals = db.query(Vital).filter_by(user_id=user_id).order_by(Vital.timestamp.desc()).limit(100).all()
+        # Rolling averages over the last 100 readings are maintained on ingest
+        state = health_score_service.get_state(db, user_id)
         
-        if not recent_vitals:
+        if state["score"] is None and not state["insight_readings"]:
             return {
                 "insights": [],
                 "recommendations": ["Start monitoring your health to get personalized insights"],
@@ -23,19 +48,11 @@ class AnalyticsController:
         
         insights = []
         recommendations = []
+        averages = state["averages"]
         
         # Analyze heart rate patterns
-        heart_rates = [v.heart_rate for v in recent_vitals if v.heart_rate]
-        if heart_rates and len(heart_rates) > 0:
-            try:
-                avg_hr = statistics.mean(heart_rates)
-                max_hr = max(heart_rates)
-                min_hr = min(heart_rates)
-            except statistics.StatisticsError:
-                avg_hr = 0
-                max_hr = 0
-                min_hr = 0
-            
+        avg_hr = averages["heart_rate"]
+        if avg_hr is not None:
             if avg_hr > 100:
                 insights.append({
                     "type": "heart_rate_high",
@@ -54,39 +71,29 @@ class AnalyticsController:
                 recommendations.append("Consult with your healthcare provider about your heart rate")
         
         # Analyze SpO2 patterns
-        spo2_values = [v.spo2 for v in recent_vitals if v.spo2]
-        if spo2_values and len(spo2_values) > 0:
-            try:
-                avg_spo2 = statistics.mean(spo2_values)
-            except statistics.StatisticsError:
-                avg_spo2 = 0
-            if avg_spo2 < 95:
-                insights.append({
-                    "type": "spo2_low",
-                    "title": "Low Oxygen Saturation",
-                    "message": f"Your average SpO2 is {avg_spo2:.1f}%, which is below normal",
-                    "severity": "critical"
-                })
-                recommendations.append("Consider breathing exercises and consult a healthcare provider")
+        avg_spo2 = averages["spo2"]
+        if avg_spo2 is not None and avg_spo2 < 95:
+            insights.append({
+                "type": "spo2_low",
+                "title": "Low Oxygen Saturation",
+                "message": f"Your average SpO2 is {avg_spo2:.1f}%, which is below normal",
+                "severity": "critical"
+            })
+            recommendations.append("Consider breathing exercises and consult a healthcare provider")
         
         # Analyze temperature patterns
-        temperatures = [v.temperature for v in recent_vitals if v.temperature]
-        if temperatures and len(temperatures) > 0:
-            try:
-                avg_temp = statistics.mean(temperatures)
-            except statistics.StatisticsError:
-                avg_temp = 0
-            if avg_temp > 37.5:
-                insights.append({
-                    "type": "temperature_high",
-                    "title": "Elevated Temperature",
-                    "message": f"Your average temperature is {avg_temp:.1f}°C, which is above normal",
-                    "severity": "warning"
-                })
-                recommendations.append("Monitor your temperature and consider consulting a healthcare provider")
+        avg_temp = averages["temperature"]
+        if avg_temp is not None and avg_temp > 37.5:
+            insights.append({
+                "type": "temperature_high",
+                "title": "Elevated Temperature",
+                "message": f"Your average temperature is {avg_temp:.1f}°C, which is above normal",
+                "severity": "warning"
+            })
+            recommendations.append("Monitor your temperature and consider consulting a healthcare provider")
         
-        # Calculate health score
-        health_score = min(100, max(0, 100 - len(insights) * 15))
+        # Same rolling score as /health/health-score
+        health_score = int(state["score"]) if state["score"] is not None else 0
         
         return {
             "insights": insights,
@@ -99,56 +106,21 @@ class AnalyticsController:
     @staticmethod
     def detect_anomalies(db: Session, user_id: str):
         """Detect health anomalies and generate alerts"""
-        # Get recent vitals for anomaly detection
-        recent_vitals = db.query(Vital).filter_by(user_id=user_id).order_by(Vital.timestamp.desc()).limit(50).all()
+        # Anomalies are flagged by the ingest alert pipeline; read them back by index
+        recent_alerts = db.query(Notification).filter(
+            Notification.user_id == user_id,
+            Notification.notification_type == "health_alert",
+            Notification.subject_user_id == user_id
+        ).order_by(Notification.created_at.desc()).limit(50).all()
         
-        anomalies = []
-        
-        for vital in recent_vitals:
-            # Heart rate anomalies
-            if vital.heart_rate:
-                if vital.heart_rate > 120:
-                    anomalies.append({
-                        "type": "heart_rate_anomaly",
-                        "title": "Critical Heart Rate",
-                        "message": f"Heart rate spike detected: {vital.heart_rate} bpm",
-                        "value": vital.heart_rate,
-                        "timestamp": vital.timestamp.isoformat(),
-                        "severity": "critical"
-                    })
-                elif vital.heart_rate < 50:
-                    anomalies.append({
-                        "type": "heart_rate_anomaly",
-                        "title": "Low Heart Rate",
-                        "message": f"Unusually low heart rate: {vital.heart_rate} bpm",
-                        "value": vital.heart_rate,
-                        "timestamp": vital.timestamp.isoformat(),
-                        "severity": "warning"
-                    })
-            
-            # SpO2 anomalies
-            if vital.spo2:
-                if vital.spo2 < 90:
-                    anomalies.append({
-                        "type": "spo2_anomaly",
-                        "title": "Critical Oxygen Level",
-                        "message": f"Dangerously low SpO2: {vital.spo2}%",
-                        "value": vital.spo2,
-                        "timestamp": vital.timestamp.isoformat(),
-                        "severity": "critical"
-                    })
-            
-            # Temperature anomalies
-            if vital.temperature:
-                if vital.temperature > 38.5:
-                    anomalies.append({
-                        "type": "temperature_anomaly",
-                        "title": "High Fever",
-                        "message": f"High temperature detected: {vital.temperature}°C",
-                        "value": vital.temperature,
-                        "timestamp": vital.timestamp.isoformat(),
-                        "severity": "critical"
-                    })
+        anomalies = [{
+            "type": alert.alert_type,
+            "title": alert.title,
+            "message": alert.message,
+            "value": alert.value,
+            "timestamp": alert.created_at.isoformat() if alert.created_at else None,
+            "severity": alert.severity
+        } for alert in recent_alerts]
         
         return {
             "anomalies": anomalies,
@@ -161,25 +133,64 @@ class AnalyticsController:
     @staticmethod
     def create_custom_alert(db: Session, user_id: str, alert_config: dict):
         """Create custom health alerts"""
-        # This would typically save to a custom alerts table
-        # For now, return success
+        rule_type = alert_config.get("rule_type", "threshold")
+        if rule_type != "threshold" and not alert_config.get("duration_seconds"):
+            raise HTTPException(status_code=400, detail=f"{rule_type} rules need a duration_seconds window")
+        
+        rule = AlertRule(id=uuid.uuid4(), user_id=user_id, **alert_config)
+        db.add(rule)
+        db.commit()
+        db.refresh(rule)
+        alert_rule_engine.invalidate(user_id)
+        mark_changed([user_id], "rules")
+        
         return {
             "message": "Custom alert created successfully",
-            "alert_id": str(uuid.uuid4()),
-            "config": alert_config,
-            "created_at": datetime.utcnow().isoformat()
+            "alert_id": str(rule.id),
+            "config": rule.to_dict(),
+            "created_at": rule.created_at.isoformat()
         }
 
+    @staticmethod
+    def get_custom_alerts(db: Session, user_id: str):
+        """List the user's custom alert rules"""
+        rules = db.query(AlertRule).filter_by(user_id=user_id).order_by(AlertRule.created_at.asc()).all()
+        return {"rules": [rule.to_dict() for rule in rules], "total": len(rules)}
+
+    @staticmethod
+    def update_custom_alert(db: Session, user_id: str, rule_id: str, changes: dict):
+        """Update a custom alert rule"""
+        rule = db.query(AlertRule).filter(AlertRule.id == rule_id, AlertRule.user_id == user_id).first()
+        if not rule:
+            raise HTTPException(status_code=404, detail="Custom alert not found")
+        
+        for field, value in changes.items():
+            setattr(rule, field, value)
+        if rule.rule_type != "threshold" and not rule.duration_seconds:
+            raise HTTPException(status_code=400, detail=f"{rule.rule_type} rules need a duration_seconds window")
+        
+        db.commit()
+        db.refresh(rule)
+        alert_rule_engine.invalidate(user_id)
+        mark_changed([user_id], "rules")
+        return rule.to_dict()
+
+    @staticmethod
+    def delete_custom_alert(db: Session, user_id: str, rule_id: str):
+        """Delete a custom alert rule"""
+        rule = db.query(AlertRule).filter(AlertRule.id == rule_id, AlertRule.user_id == user_id).first()
+        if not rule:
+            raise HTTPException(status_code=404, detail="Custom alert not found")
+        
+        db.delete(rule)
+        db.commit()
+        alert_rule_engine.invalidate(user_id)
+        mark_changed([user_id], "rules")
+        return {"message": "Custom alert deleted successfully", "deleted_id": rule_id}
+
     @staticmethod
     def analyze_health_patterns(db: Session, user_id: str):
         """Analyze health patterns over time"""
-        # Get vitals for the last 30 days
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        vitals = db.query(Vital).filter(
-            Vital.user_id == user_id,
-            Vital.timestamp >= thirty_days_ago
-        ).order_by(Vital.timestamp.asc()).all()
-        
         patterns = {
             "heart_rate_pattern": "stable",
             "spo2_pattern": "stable", 
@@ -188,6 +199,34 @@ class AnalyticsController:
             "sleep_pattern": "stable"
         }
         
+        # Prefer the streaming baseline maintained at ingest; no history scan needed
+        try:
+            baselines = baseline_detector.get_baseline(user_id)
+        except redis.RedisError:
+            baselines = {}
+        heart_rate = baselines.get("heart_rate")
+        if heart_rate:
+            if heart_rate.variance is None:
+                patterns["heart_rate_pattern"] = "insufficient_data"
+            elif heart_rate.variance > 100:
+                patterns["heart_rate_pattern"] = "variable"
+            elif heart_rate.variance < 25:
+                patterns["heart_rate_pattern"] = "very_stable"
+            return {
+                "patterns": patterns,
+                "baselines": {metric: baseline._asdict() for metric, baseline in baselines.items()},
+                "analysis_period": "Rolling baseline",
+                "data_points": heart_rate.count,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        
+        # Get vitals for the last 30 days
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        vitals = db.query(Vital).filter(
+            Vital.user_id == user_id,
+            Vital.timestamp >= thirty_days_ago
+        ).order_by(Vital.timestamp.asc()).all()
+        
         # Analyze patterns (simplified for demo)
         if vitals:
             heart_rates = [v.heart_rate for v in vitals if v.heart_rate]
@@ -210,31 +249,59 @@ class AnalyticsController:
         }
 
     @staticmethod
-    def get_predictive_health(db: Session, user_id: str):
+    def get_predictive_health(db: Session, user_id: str, scored: dict = None):
         """Get predictive health insights"""
-        # This would use machine learning models
-        # For now, return simulated predictions
+        # Risk comes from the offline-trained model in the registry; batch jobs pass pre-scored results
+        scored = scored or score_users(db, [user_id])[0]
+        predictions = dict(scored["predictions"])
+        
+        recommendations = []
+        if predictions.get("heart_health_risk") in ("moderate", "high"):
+            recommendations.append("Discuss your heart rate and blood pressure trends with your healthcare provider")
+        if predictions.get("respiratory_health_risk") in ("moderate", "high"):
+            recommendations.append("Monitor your oxygen saturation and breathing rate closely")
+        if not scored["predictions"]:
+            recommendations.append("Keep your device connected so we can assess your health risks")
+        elif not recommendations:
+            recommendations.append("Continue current exercise routine")
+        
         return {
-            "predictions": {
-                "heart_health_risk": "low",
-                "respiratory_health_risk": "low",
-                "activity_trend": "improving",
-                "sleep_quality_trend": "stable"
-            },
-            "confidence_scores": {
-                "heart_health": 0.85,
-                "respiratory_health": 0.92,
-                "activity": 0.78,
-                "sleep": 0.81
-            },
-            "recommendations": [
-                "Continue current exercise routine",
-                "Maintain good sleep hygiene",
-                "Monitor stress levels"
-            ],
+            "predictions": predictions,
+            "risk_probabilities": scored.get("risk_probabilities", {}),
+            "confidence_scores": scored["confidence_scores"],
+            "recommendations": recommendations,
+            "model_version": scored["model_version"],
             "prediction_timestamp": datetime.utcnow().isoformat()
         }
 
+    COMPARISON_METRICS = ("heart_rate", "spo2", "temperature", "steps",
+                          "blood_pressure_systolic", "blood_pressure_diastolic", "respiratory_rate")
+    # Which way counts as improving: lower, higher, or toward a typical resting value
+    TREND_TARGETS = {
+        "heart_rate": "lower",
+        "spo2": "higher",
+        "steps": "higher",
+        "temperature": 36.8,
+        "blood_pressure_systolic": 120,
+        "blood_pressure_diastolic": 80,
+        "respiratory_rate": 16,
+    }
+
+    @staticmethod
+    def _trend(metric: str, current: float, previous: float) -> str:
+        target = AnalyticsController.TREND_TARGETS[metric]
+        if target == "lower":
+            current_distance, previous_distance = current, previous
+        elif target == "higher":
+            current_distance, previous_distance = -current, -previous
+        else:
+            current_distance, previous_distance = abs(current - target), abs(previous - target)
+        if current_distance < previous_distance:
+            return "improving"
+        if current_distance > previous_distance:
+            return "declining"
+        return "stable"
+
     @staticmethod
     def compare_health_data(db: Session, user_id: str, period: str):
         """Compare health data across different periods"""
@@ -253,62 +320,34 @@ class AnalyticsController:
             previous_start = now - timedelta(days=14)
             previous_end = now - timedelta(days=7)
         
-        # Get current period data
-        current_vitals = db.query(Vital).filter(
-            Vital.user_id == user_id,
-            Vital.timestamp >= current_start
-        ).all()
+        # Average both periods in one pass; zero readings are ignored as before
+        columns = [getattr(Vital, metric) for metric in AnalyticsController.COMPARISON_METRICS]
+        in_current = Vital.timestamp >= current_start
+        in_previous = Vital.timestamp < previous_end
+        aggregates = []
+        for column in columns:
+            aggregates.append(func.avg(case((and_(in_current, column != 0), column))))
+            aggregates.append(func.avg(case((and_(in_previous, column != 0), column))))
         
-        # Get previous period data
-        previous_vitals = db.query(Vital).filter(
+        row = db.query(*aggregates).filter(
             Vital.user_id == user_id,
-            Vital.timestamp >= previous_start,
-            Vital.timestamp < previous_end
-        ).all()
-        
-        # Calculate averages
-        current_hr_values = [v.heart_rate for v in current_vitals if v.heart_rate]
-        previous_hr_values = [v.heart_rate for v in previous_vitals if v.heart_rate]
+            Vital.timestamp >= previous_start
+        ).one()
         
-        try:
-            current_hr = statistics.mean(current_hr_values) if current_hr_values else 0
-        except statistics.StatisticsError:
-            current_hr = 0
-            
-        try:
-            previous_hr = statistics.mean(previous_hr_values) if previous_hr_values else 0
-        except statistics.StatisticsError:
-            previous_hr = 0
-        
-        current_spo2_values = [v.spo2 for v in current_vitals if v.spo2]
-        previous_spo2_values = [v.spo2 for v in previous_vitals if v.spo2]
-        
-        try:
-            current_spo2 = statistics.mean(current_spo2_values) if current_spo2_values else 0
-        except statistics.StatisticsError:
-            current_spo2 = 0
-            
-        try:
-            previous_spo2 = statistics.mean(previous_spo2_values) if previous_spo2_values else 0
-        except statistics.StatisticsError:
-            previous_spo2 = 0
+        metrics = {}
+        for i, metric in enumerate(AnalyticsController.COMPARISON_METRICS):
+            current = float(row[2 * i] or 0)
+            previous = float(row[2 * i + 1] or 0)
+            metrics[metric] = {
+                "current": round(current, 1),
+                "previous": round(previous, 1),
+                "change": round(current - previous, 1),
+                "trend": AnalyticsController._trend(metric, current, previous)
+            }
         
         return {
             "comparison_period": period,
-            "metrics": {
-                "heart_rate": {
-                    "current": round(current_hr, 1),
-                    "previous": round(previous_hr, 1),
-                    "change": round(current_hr - previous_hr, 1),
-                    "trend": "improving" if current_hr < previous_hr else "declining" if current_hr > previous_hr else "stable"
-                },
-                "spo2": {
-                    "current": round(current_spo2, 1),
-                    "previous": round(previous_spo2, 1),
-                    "change": round(current_spo2 - previous_spo2, 1),
-                    "trend": "improving" if current_spo2 > previous_spo2 else "declining" if current_spo2 < previous_spo2 else "stable"
-                }
-            },
+            "metrics": metrics,
             "summary": "Your health metrics are generally stable",
             "timestamp": datetime.utcnow().isoformat()
         } 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from app.core.security import create_access_token, create_refresh_token, get_password_hash, verify_password
+from app.core.security import create_token_pair, get_password_hash, verify_password
 from app.models.user import User, UserRole
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
@@ -39,13 +39,7 @@ class AuthController:
         
         
         # Create tokens
-        access_token = create_access_token({"sub": str(user.id)})
-        refresh_token = create_refresh_token({"sub": str(user.id)})
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer"
-        }
+        return create_token_pair(str(user.id))
 
     @staticmethod
     def login(db: Session, data):
@@ -59,10 +53,4 @@ class AuthController:
         if not user or not verify_password(data.password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        access_token = create_access_token({"sub": str(user.id)})
-        refresh_token = create_refresh_token({"sub": str(user.id)})
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer"
-        } 
\ No newline at end of file
+        return create_token_pair(str(user.id)) 
\ No newline at end of file
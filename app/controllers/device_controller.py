@@ -1,8 +1,13 @@
 from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.device import Device
 from app.models.user import User
+from app.controllers.family_controller import FamilyController
+from app.services.device_registry import device_registry, DeviceEntry
+from app.services.device_telemetry import device_telemetry
 import uuid
 
 class DeviceController:
@@ -36,6 +41,7 @@ class DeviceController:
         db.add(device)
         db.commit()
         db.refresh(device)
+        device_registry.invalidate(device_id)
         
         return device.to_dict()
     
@@ -52,6 +58,7 @@ class DeviceController:
         
         device.is_connected = False
         db.commit()
+        device_registry.invalidate(device_id)
         
         return {"message": "Device disconnected successfully"}
     
@@ -101,35 +108,89 @@ class DeviceController:
         ]
 
     @staticmethod
-    def get_signal_strength(device_id: str):
-        """Get signal strength for a specific device"""
-        # Simulate signal strength based on device ID
-        import random
-        base_strength = 70 + (hash(device_id) % 30)  # 70-100 range
-        current_strength = max(50, min(100, base_strength + random.randint(-10, 10)))
+    def _owned_device(db: Session, user_id: str, device_id: str) -> DeviceEntry:
+        """Registry entry for one of the user's devices, or 404"""
+        entry = device_registry.lookup(db, device_id, lambda entry: entry.user_id == user_id)
+        if entry is None or entry.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Device not found")
+        return entry
+
+    @staticmethod
+    def _signal_strength(rssi: Optional[int]) -> Optional[int]:
+        """RSSI in dBm as a 0-100 percentage (-100 dBm and below is 0, -50 dBm and above 100)"""
+        return None if rssi is None else max(0, min(100, 2 * (rssi + 100)))
+
+    @staticmethod
+    def get_signal_strength(db: Session, user_id: str, device_id: str):
+        """Latest signal strength the device reported"""
+        DeviceController._owned_device(db, user_id, device_id)
+        state = device_telemetry.get_state(device_id)
+        strength = DeviceController._signal_strength(state["rssi"])
         
         return {
             "device_id": device_id,
-            "signal_strength": current_strength,
-            "signal_quality": "Good" if current_strength >= 80 else "Fair" if current_strength >= 60 else "Poor",
-            "timestamp": datetime.utcnow().isoformat()
+            "signal_strength": strength,
+            "rssi": state["rssi"],
+            "signal_quality": "Unknown" if strength is None else "Good" if strength >= 80 else "Fair" if strength >= 60 else "Poor",
+            "timestamp": state["reported_at"]
         }
 
     @staticmethod
-    def get_battery_level(device_id: str):
-        """Get battery level for a specific device"""
-        # Simulate battery level based on device ID
-        import random
-        base_level = 80 + (hash(device_id) % 20)  # 80-100 range
-        current_level = max(10, min(100, base_level + random.randint(-20, 10)))
+    def get_battery_level(db: Session, user_id: str, device_id: str):
+        """Latest battery level the device reported"""
+        DeviceController._owned_device(db, user_id, device_id)
+        state = device_telemetry.get_state(device_id)
+        level = state["battery_level"]
         
         return {
             "device_id": device_id,
-            "battery_level": current_level,
-            "battery_status": "Charging" if current_level < 20 else "Good" if current_level >= 50 else "Low",
-            "timestamp": datetime.utcnow().isoformat()
+            "battery_level": level,
+            "battery_status": "Unknown" if level is None else "Good" if level >= 50 else "Low" if level >= 20 else "Critical",
+            "timestamp": state["reported_at"]
         }
 
+    @staticmethod
+    def get_device_telemetry(db: Session, user_id: str, device_id: str, hours: int = 24):
+        """Latest state, the recent samples kept in Redis and downsampled history"""
+        entry = DeviceController._owned_device(db, user_id, device_id)
+        return {
+            "device_id": device_id,
+            **device_telemetry.get_state(device_id),
+            "recent": device_telemetry.get_recent(device_id),
+            "history": device_telemetry.get_history(db, entry.pk, hours)
+        }
+
+    @staticmethod
+    async def get_fleet_status_async(db: AsyncSession, user_id: str, device_ids: List[str]):
+        """Connection and telemetry state for many devices in one request
+
+        Ownership comes from the device registry, with cache misses read in
+        one query, and telemetry from one Redis pipeline. Devices that are
+        neither the user's nor a family dashboard member's are left out, as
+        are unknown IDs.
+        """
+        device_ids = list(dict.fromkeys(device_ids))
+        entries = await device_registry.lookup_many_async(db, device_ids)
+        visible = {user_id}
+        if any(entry is not None and entry.user_id != user_id for entry in entries.values()):
+            visible.update(await FamilyController.get_dashboard_member_ids_async(db, user_id))
+            # Cached owners outside the family may be stale; confirm them in one query
+            rejected = [device_id for device_id, entry in entries.items()
+                        if entry is not None and entry.user_id not in visible]
+            if rejected:
+                entries.update(await device_registry.load_many_async(db, rejected))
+        shown = [(device_id, entry) for device_id, entry in entries.items()
+                 if entry is not None and entry.user_id in visible]
+        
+        states = await device_telemetry.get_states_async([device_id for device_id, _ in shown])
+        return [{
+            "device_id": device_id,
+            "user_id": entry.user_id,
+            "is_connected": entry.is_connected,
+            "signal_strength": DeviceController._signal_strength(state["rssi"]),
+            **state
+        } for (device_id, entry), state in zip(shown, states)]
+
     @staticmethod
     def pair_bluetooth_device(db: Session, user_id: str, device_id: str):
         """Pair with a discovered Bluetooth device"""
@@ -158,6 +219,7 @@ class DeviceController:
         db.add(device)
         db.commit()
         db.refresh(device)
+        device_registry.invalidate(device_id)
         
         return {
             "message": "Device paired successfully",
@@ -177,12 +239,14 @@ class DeviceController:
         if not device:
             raise HTTPException(status_code=404, detail="Device not found")
         
-        # Simulate firmware info
+        # Current version is whatever the device last reported; the release feed is still simulated
+        current_version = device_telemetry.get_state(device_id)["firmware_version"]
+        latest_version = "1.2.4"
         return {
             "device_id": device_id,
-            "current_version": "1.2.3",
-            "latest_version": "1.2.4",
-            "update_available": True,
+            "current_version": current_version,
+            "latest_version": latest_version,
+            "update_available": current_version is not None and current_version != latest_version,
             "last_check": datetime.utcnow().isoformat(),
             "firmware_size": "2.5 MB",
             "update_notes": "Bug fixes and performance improvements"
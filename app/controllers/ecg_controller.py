@@ -5,6 +5,10 @@ from app.models.ecg import ECG, ECGSession
 from app.models.device import Device
 from app.models.user import User
 from app.services.ecg_service import ECGService
+from app.services.device_registry import device_registry
+from app.schemas.ecg import ECGResponse
+from app.core.responses import response_columns
+from app.core.http_cache import mark_changed
 import json
 import uuid
 
@@ -13,21 +17,18 @@ class ECGController:
     def start_ecg_recording(db: Session, user_id: str, device_id: str, recording_data: dict) -> ECG:
         """Start a new ECG recording session"""
         # Verify device connection
-        device = db.query(Device).filter(
-            Device.device_id == device_id,
-            Device.user_id == user_id,
-            Device.is_connected == True
-        ).first()
+        device_pk = device_registry.connected_pk(db, user_id, device_id)
 
-        if not device:
+        if device_pk is None:
             raise HTTPException(status_code=400, detail="Device not connected or not found")
 
         # Create ECG recording
         ecg = ECG(
             id=str(uuid.uuid4()),
             user_id=user_id,
-            device_id=str(device.id),
+            device_id=device_pk,
             recording_duration=recording_data.get("recording_duration", "30_seconds"),
+            lead_count=recording_data.get("lead_count", 1),
             status="recording",
             recording_started_at=datetime.utcnow(),
             created_at=datetime.utcnow()
@@ -64,9 +65,10 @@ class ECGController:
             raise HTTPException(status_code=400, detail="ECG recording is not active")
 
         # Update ECG data
-        ecg.ecg_data = json.dumps(ecg_data)
+        ECGController.store_ecg_samples(ecg, ecg_data)
         db.commit()
         db.refresh(ecg)
+        mark_changed([ecg.user_id], "ecg")
 
         return ecg.to_dict()
 
@@ -81,7 +83,7 @@ class ECGController:
             raise HTTPException(status_code=400, detail="ECG recording is not active")
 
         # Update with final data
-        ecg.ecg_data = json.dumps(final_data)
+        ECGController.store_ecg_samples(ecg, final_data)
         ecg.status = "processing"
         ecg.recording_completed_at = datetime.utcnow()
         ecg.processing_started_at = datetime.utcnow()
@@ -100,6 +102,8 @@ class ECGController:
         try:
             # Parse ECG data
             ecg_data = json.loads(ecg.ecg_data) if ecg.ecg_data else {}
+            leads = ECGController.load_ecg_leads(ecg, ecg_data)
+            sampling_rate = ECGController.get_sampling_rate(db, ecg)
 
             # Get user info
             user = db.query(User).filter_by(id=ecg.user_id).first()
@@ -111,7 +115,7 @@ class ECGController:
             }
 
             # Generate PDF
-            pdf_bytes = ECGService.generate_ecg_pdf(ecg_data, user_info)
+            pdf_bytes = ECGService.generate_ecg_pdf(ecg_data, user_info, leads, sampling_rate)
 
             # In production, upload to S3/Supabase
             # For now, store as base64 in database (not recommended for production)
@@ -126,6 +130,7 @@ class ECGController:
 
             db.commit()
             db.refresh(ecg)
+            mark_changed([ecg.user_id], "ecg")
 
             return ecg.to_dict()
 
@@ -133,11 +138,12 @@ class ECGController:
             # Update status to failed
             ecg.status = "failed"
             db.commit()
+            mark_changed([ecg.user_id], "ecg")
             raise HTTPException(status_code=500, detail=f"ECG processing failed: {str(e)}")
 
     @staticmethod
-    def get_ecg_recording(db: Session, ecg_id: str, user_id: str) -> ECG:
-        """Get ECG recording by ID"""
+    def get_user_ecg(db: Session, ecg_id: str, user_id: str) -> ECG:
+        """Load an ECG row owned by the user"""
         ecg = db.query(ECG).filter(
             ECG.id == ecg_id,
             ECG.user_id == user_id
@@ -146,17 +152,23 @@ class ECGController:
         if not ecg:
             raise HTTPException(status_code=404, detail="ECG recording not found")
 
-        return ecg.to_dict()
+        return ecg
+
+    @staticmethod
+    def get_ecg_recording(db: Session, ecg_id: str, user_id: str) -> ECG:
+        """Get ECG recording by ID"""
+        return ECGController.get_user_ecg(db, ecg_id, user_id).to_dict()
 
     @staticmethod
     def get_ecg_history(db: Session, user_id: str, limit: int = 50) -> list:
-        """Get ECG recording history for user"""
-        ecg_recordings = db.query(ECG).filter(
+        """Get ECG recording history for user
+
+        Returns rows of just the ECGResponse columns; the sample data is never loaded.
+        """
+        return db.query(*response_columns(ECG, ECGResponse)).filter(
             ECG.user_id == user_id
         ).order_by(ECG.created_at.desc()).limit(limit).all()
 
-        return [ecg.to_dict() for ecg in ecg_recordings]
-
     @staticmethod
     def download_ecg_pdf(db: Session, ecg_id: str, user_id: str) -> dict:
         """Get download URL for ECG PDF"""
@@ -179,22 +191,53 @@ class ECGController:
     @staticmethod
     def analyze_ecg_data(db: Session, ecg_id: str, user_id: str) -> dict:
         """Analyze ECG data and return health metrics"""
-        ecg = ECGController.get_ecg_recording(db, ecg_id, user_id)
+        ecg = ECGController.get_user_ecg(db, ecg_id, user_id)
 
-        if not ecg["ecg_data"]:
+        if not ecg.ecg_data and not ecg.ecg_samples:
             raise HTTPException(status_code=400, detail="No ECG data available")
 
         # Parse ECG data
-        ecg_data = json.loads(ecg["ecg_data"])
+        ecg_data = json.loads(ecg.ecg_data) if ecg.ecg_data else {}
+        leads = ECGController.load_ecg_leads(ecg, ecg_data)
 
         # Analyze data
-        analysis = ECGService.analyze_ecg_data(ecg_data)
+        analysis = ECGService.analyze_ecg_data(ecg_data, leads, ECGController.get_sampling_rate(db, ecg))
 
         return {
-            "ecg_id": str(ecg["id"]),
+            "ecg_id": str(ecg.id),
             "heart_rate": analysis["heart_rate"],
             "rhythm": analysis["rhythm"],
             "abnormalities": analysis["abnormalities"],
             "confidence_score": analysis["confidence_score"],
+            "leads": analysis["leads"],
             "analysis_completed_at": datetime.utcnow()
-        } 
\ No newline at end of file
+        }
+
+    @staticmethod
+    def store_ecg_samples(ecg: ECG, ecg_data: dict):
+        """Store device samples as a packed lead matrix and keep the rest as JSON metadata"""
+        try:
+            leads, metadata = ECGService.split_samples(ecg_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid ECG samples: {str(e)}")
+
+        ecg.ecg_data = json.dumps(metadata)
+        ecg.ecg_samples = ECGService.pack_leads(leads)
+        ecg.lead_count = leads.shape[0]
+        ecg.sample_count = leads.shape[1]
+
+    @staticmethod
+    def load_ecg_leads(ecg: ECG, ecg_data: dict):
+        """Return the (leads x samples) matrix for a recording"""
+        if ecg.ecg_samples:
+            return ECGService.unpack_leads(ecg.ecg_samples, ecg.lead_count)
+        # Recordings stored before the packed layout keep readings in the JSON payload
+        return ECGService.to_lead_matrix(ecg_data)
+
+    @staticmethod
+    def get_sampling_rate(db: Session, ecg: ECG) -> int:
+        """Get the sampling rate recorded for the ECG session"""
+        session = db.query(ECGSession).filter_by(ecg_id=ecg.id).first()
+        if session and session.sampling_rate:
+            return session.sampling_rate
+        return ECGService.DEFAULT_SAMPLING_RATE 
\ No newline at end of file
@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.family import Family, FamilyMember, FamilySharingSettings
@@ -309,6 +311,19 @@ class FamilyController:
         
         return dashboard_data
 
+    @staticmethod
+    async def get_dashboard_member_ids_async(db: AsyncSession, user_id: str) -> list:
+        """IDs of the users whose vitals the family dashboard shows, in two indexed reads"""
+        owner_id = (await db.execute(select(Family.owner_id).where(Family.owner_id == user_id))).scalar()
+        if owner_id is None:
+            owner_id = (await db.execute(
+                select(FamilyMember.owner_id).where(FamilyMember.member_id == user_id).limit(1)
+            )).scalar()
+        if owner_id is None:
+            return [user_id]
+        rows = await db.execute(select(FamilyMember.member_id).where(FamilyMember.owner_id == owner_id))
+        return [str(member_id) for member_id in rows.scalars()]
+
     @staticmethod
     def get_family_health_comparison(db: Session, user_id: str):
         """Compare health data across family members"""
@@ -1,36 +1,134 @@
 from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select
 from fastapi import HTTPException, status
 from app.models.vitals import Vital, VitalAggregate
-from app.models.device import Device
+from app.schemas.vitals import VitalResponse
+from app.core.responses import response_columns
+from app.core.http_cache import mark_changed_async
 from app.services.redis_service import redis_service
 from app.services.health_analysis_service import HealthAnalysisService
+from app.services.alert_service import AlertService
+from app.services.baseline_service import baseline_detector
+from app.services.health_score_service import health_score_service
+from app.services.vital_codec import VitalBatch
+from app.services.device_registry import device_registry
+from app.services.device_telemetry import device_telemetry
+import redis
+import logging
+from app.models.notification import Notification
 import uuid
 
+logger = logging.getLogger(__name__)
+
 class HealthController:
     @staticmethod
-    def ingest_vital_data(db: Session, user_id: str, vital_data: dict):
+    async def ingest_vital_data_async(db: AsyncSession, user_id: str, vital_data: dict):
         """Ingest vital data from device (called every 2 seconds)"""
+        device_pk = await HealthController._connected_device_async(db, user_id, vital_data['device_id'])
         
-        # Validate device connection
-        device = db.query(Device).filter(
-            Device.device_id == vital_data['device_id'],
-            Device.user_id == user_id,
-            Device.is_connected == True
-        ).first()
+        health_condition, is_anomaly = HealthAnalysisService.analyze_vital_signs(vital_data)
         
-        if not device:
-            raise HTTPException(status_code=400, detail="Device not connected or not found")
+        try:
+            baseline_scores = await baseline_detector.score_async(user_id, vital_data)
+        except redis.RedisError as e:
+            logger.warning("Baseline scoring skipped: %s", e)
+            baseline_scores = []
+        baseline_anomalies = [score.metric for score in baseline_scores if score.is_anomaly]
+        is_anomaly = is_anomaly or bool(baseline_anomalies)
         
-        # Analyze health condition
-        health_condition, is_anomaly = HealthAnalysisService.analyze_vital_signs(vital_data)
+        vital = HealthController._build_vital(user_id, device_pk, vital_data, health_condition, is_anomaly)
+        await device_telemetry.record_async(db, device_pk, vital_data['device_id'], vital_data)
+        db.add(vital)
+        await db.commit()
+        
+        # Live value and WebSocket publish share one pipeline round trip
+        try:
+            await redis_service.publish_live_vital_async(user_id, HealthController._live_data(vital, baseline_anomalies))
+        except redis.RedisError as e:
+            logger.warning("Live vital publish skipped: %s", e)
+        
+        try:
+            await health_score_service.record_async(db, user_id, vital_data)
+        except redis.RedisError as e:
+            logger.warning("Health score update skipped: %s", e)
+        
+        await AlertService.process_vital_async(
+            user_id, vital_data, vital.timestamp,
+            check_builtin=HealthAnalysisService.should_trigger_alert(health_condition, is_anomaly)
+        )
+        
+        await mark_changed_async([user_id], "vitals")
+        
+        return vital.to_dict()
+
+    @staticmethod
+    async def ingest_vital_batch_async(db: AsyncSession, user_id: str, batch: VitalBatch):
+        """Ingest a device's readings in one request, oldest first
+
+        Population-range analysis runs once over the decoded columns and the
+        rows are written in one flush. Baseline and health-score updates are
+        pipelined, and the alert pipeline sees every reading in order. Only
+        the newest reading becomes the live value.
+        """
+        device_pk = await HealthController._connected_device_async(db, user_id, batch.device_id)
+        
+        conditions, anomalies = HealthAnalysisService.analyze_vital_batch(batch.columns, size=len(batch))
+        readings = batch.readings()
+        
+        try:
+            baseline_scores = await baseline_detector.score_many_async(user_id, readings)
+        except redis.RedisError as e:
+            logger.warning("Baseline scoring skipped: %s", e)
+            baseline_scores = [[] for _ in readings]
+        
+        vitals, alert_checks = [], []
+        for reading, code, anomaly, scores in zip(readings, conditions.tolist(), anomalies.tolist(), baseline_scores):
+            health_condition = HealthAnalysisService.CONDITIONS[code]
+            baseline_anomalies = [score.metric for score in scores if score.is_anomaly]
+            is_anomaly = anomaly or bool(baseline_anomalies)
+            vitals.append(HealthController._build_vital(user_id, device_pk, reading, health_condition, is_anomaly))
+            alert_checks.append((reading, reading["timestamp"], HealthAnalysisService.should_trigger_alert(health_condition, is_anomaly)))
+        await device_telemetry.record_async(db, device_pk, batch.device_id, batch.telemetry or {})
+        db.add_all(vitals)
+        await db.commit()
+        
+        latest = vitals[-1]
+        try:
+            await redis_service.publish_live_vital_async(user_id, HealthController._live_data(latest, baseline_anomalies))
+        except redis.RedisError as e:
+            logger.warning("Live vital publish skipped: %s", e)
+        
+        try:
+            await health_score_service.record_many_async(db, user_id, readings)
+        except redis.RedisError as e:
+            logger.warning("Health score update skipped: %s", e)
+        
+        await AlertService.process_vitals_async(user_id, alert_checks)
+        await mark_changed_async([user_id], "vitals")
+        
+        return {
+            "ingested": len(vitals),
+            "anomaly_count": sum(vital.is_anomaly for vital in vitals),
+            "health_condition": latest.health_condition
+        }
+
+    @staticmethod
+    async def _connected_device_async(db: AsyncSession, user_id: str, device_id: str):
+        """Internal ID of the user's connected device, or 400"""
+        device_pk = await device_registry.connected_pk_async(db, user_id, device_id)
         
-        # Create vital record
-        vital = Vital(
+        if device_pk is None:
+            raise HTTPException(status_code=400, detail="Device not connected or not found")
+        return device_pk
+
+    @staticmethod
+    def _build_vital(user_id: str, device_pk, vital_data: dict, health_condition: str, is_anomaly: bool) -> Vital:
+        return Vital(
             id=str(uuid.uuid4()),
             user_id=user_id,
-            device_id=str(device.id),
+            device_id=str(device_pk),
             heart_rate=vital_data.get('heart_rate'),
             spo2=vital_data.get('spo2'),
             temperature=vital_data.get('temperature'),
@@ -40,65 +138,67 @@ class HealthController:
             respiratory_rate=vital_data.get('respiratory_rate'),
             health_condition=health_condition,
             is_anomaly=is_anomaly,
-            timestamp=datetime.utcnow()
+            timestamp=vital_data.get('timestamp') or datetime.utcnow()
         )
-        
-        db.add(vital)
-        db.commit()
-        db.refresh(vital)
-        
-        # Store in Redis for real-time access
-        live_data = {
+
+    @staticmethod
+    def _live_data(vital: Vital, baseline_anomalies: list) -> dict:
+        return {
             'heart_rate': vital.heart_rate,
             'spo2': vital.spo2,
             'temperature': vital.temperature,
             'steps': vital.steps,
             'health_condition': vital.health_condition,
-            'is_anomaly': vital.is_anomaly
+            'is_anomaly': vital.is_anomaly,
+            'baseline_anomalies': baseline_anomalies
         }
-        redis_service.store_live_vital(user_id, live_data)
-        
-        # Publish to WebSocket subscribers
-        redis_service.publish_vital_update(user_id, live_data)
-        
-        # Check for alerts
-        if HealthAnalysisService.should_trigger_alert(health_condition, is_anomaly):
-            # TODO: Trigger alert notification
-            pass
-        
-        return vital.to_dict()
     
     @staticmethod
-    def get_live_vital(user_id: str):
-        """Get latest vital data from Redis"""
-        live_data = redis_service.get_live_vital(user_id)
-        if not live_data:
-            return None
-        return live_data
+    async def get_live_vital_async(db: AsyncSession, user_id: str):
+        """Latest vital data from Redis, or the newest stored reading if Redis is down"""
+        try:
+            return await redis_service.get_live_vital_async(user_id) or None
+        except redis.RedisError as e:
+            logger.warning("Live vital read failed, falling back to history: %s", e)
+        vital = (await db.execute(
+            select(Vital).where(Vital.user_id == user_id).order_by(Vital.timestamp.desc()).limit(1)
+        )).scalar_one_or_none()
+        return {**HealthController._live_data(vital, []), 'timestamp': vital.timestamp} if vital else None
     
     @staticmethod
-    def get_vital_history(db: Session, user_id: str, start_time: datetime = None, end_time: datetime = None, limit: int = 100):
-        """Get historical vital data"""
-        query = db.query(Vital).filter(Vital.user_id == user_id)
-        
+    async def get_vital_history_async(db: AsyncSession, user_id: str, start_time: datetime = None, end_time: datetime = None, limit: int = 100):
+        """History as rows of the VitalResponse columns, ready for RowsJSONResponse"""
+        query = select(*response_columns(Vital, VitalResponse)).where(Vital.user_id == user_id)
         if start_time:
-            query = query.filter(Vital.timestamp >= start_time)
+            query = query.where(Vital.timestamp >= start_time)
         if end_time:
-            query = query.filter(Vital.timestamp <= end_time)
+            query = query.where(Vital.timestamp <= end_time)
         
-        vitals = query.order_by(Vital.timestamp.desc()).limit(limit).all()
-        return [vital.to_dict() for vital in vitals]
+        return (await db.execute(query.order_by(Vital.timestamp.desc()).limit(limit))).all()
     
     @staticmethod
-    def get_chart_data(db: Session, user_id: str, period: str = "hour"):
-        """Get aggregated chart data for specified period"""
-        
-        # Try to get from Redis cache first
-        cached_data = redis_service.get_vital_aggregate(user_id, period)
+    async def get_chart_data_async(db: AsyncSession, user_id: str, period: str = "hour"):
+        cached_data = await redis_service.get_vital_aggregate_async(user_id, period)
         if cached_data:
             return cached_data
         
-        # Calculate time range
+        now, start_time = HealthController._chart_window(period)
+        vitals = (await db.execute(select(Vital).where(
+            Vital.user_id == user_id,
+            Vital.timestamp >= start_time,
+            Vital.timestamp <= now
+        ))).scalars().all()
+        
+        if not vitals:
+            return {"period": period, "data": []}
+        
+        aggregate_data = HealthController._aggregate(period, vitals, start_time, now)
+        await redis_service.store_vital_aggregate_async(user_id, period, aggregate_data)
+        return aggregate_data
+
+    @staticmethod
+    def _chart_window(period: str):
+        """(now, start) for a chart period"""
         now = datetime.utcnow()
         if period == "hour":
             start_time = now - timedelta(hours=1)
@@ -108,25 +208,17 @@ class HealthController:
             start_time = now - timedelta(weeks=1)
         else:
             raise HTTPException(status_code=400, detail="Invalid period")
-        
-        # Get aggregated data from database
-        vitals = db.query(Vital).filter(
-            Vital.user_id == user_id,
-            Vital.timestamp >= start_time,
-            Vital.timestamp <= now
-        ).all()
-        
-        if not vitals:
-            return {"period": period, "data": []}
-        
-        # Calculate aggregates
+        return now, start_time
+
+    @staticmethod
+    def _aggregate(period: str, vitals: list, start_time: datetime, now: datetime) -> dict:
         heart_rates = [v.heart_rate for v in vitals if v.heart_rate]
         spo2_values = [v.spo2 for v in vitals if v.spo2]
         temperatures = [v.temperature for v in vitals if v.temperature]
         steps_total = sum([v.steps for v in vitals if v.steps])
         anomaly_count = sum([1 for v in vitals if v.is_anomaly])
         
-        aggregate_data = {
+        return {
             "period": period,
             "heart_rate_avg": sum(heart_rates) / len(heart_rates) if heart_rates else None,
             "heart_rate_min": min(heart_rates) if heart_rates else None,
@@ -142,62 +234,17 @@ class HealthController:
             "start_time": start_time.isoformat() if start_time else None,
             "end_time": now.isoformat() if now else None
         }
-        
-        # Cache the result
-        redis_service.store_vital_aggregate(user_id, period, aggregate_data)
-        
-        return aggregate_data
     
-    @staticmethod
-    def get_history(user_id: str, db: Session):
-        """Get vitals history for user"""
-        return HealthController.get_vital_history(db, user_id)
-    
-    @staticmethod
-    def get_live(user_id: str, db: Session):
-        """Get live vitals for user"""
-        return HealthController.get_live_vital(user_id) 
-
     @staticmethod
     def calculate_health_score(db: Session, user_id: str):
         """Calculate health score (0-100) based on vital trends"""
-        # Get recent vitals
-        recent_vitals = db.query(Vital).filter_by(user_id=user_id).order_by(Vital.timestamp.desc()).limit(10).all()
+        # Rolling state is maintained on ingest; this is a single Redis read
+        state = health_score_service.get_state(db, user_id)
         
-        if not recent_vitals:
+        if state["score"] is None:
             return {"score": 0, "status": "No data", "message": "No vital data available"}
         
-        # Calculate score based on vital ranges
-        heart_rate_score = 0
-        spo2_score = 0
-        temperature_score = 0
-        
-        for vital in recent_vitals:
-            # Heart rate scoring (60-100 is good)
-            if 60 <= vital.heart_rate <= 100:
-                heart_rate_score += 10
-            elif 50 <= vital.heart_rate <= 110:
-                heart_rate_score += 5
-            
-            # SpO2 scoring (95-100 is good)
-            if 95 <= vital.spo2 <= 100:
-                spo2_score += 10
-            elif 90 <= vital.spo2 <= 95:
-                spo2_score += 5
-            
-            # Temperature scoring (36-37.5 is good)
-            if 36.0 <= vital.temperature <= 37.5:
-                temperature_score += 10
-            elif 35.5 <= vital.temperature <= 38.0:
-                temperature_score += 5
-        
-        # Average scores
-        avg_heart_rate = heart_rate_score / len(recent_vitals)
-        avg_spo2 = spo2_score / len(recent_vitals)
-        avg_temperature = temperature_score / len(recent_vitals)
-        
-        # Calculate overall score
-        total_score = min(100, (avg_heart_rate + avg_spo2 + avg_temperature) * 3.33)
+        total_score = state["score"]
         
         # Determine status
         if total_score >= 80:
@@ -212,7 +259,7 @@ class HealthController:
         return {
             "score": int(total_score),
             "status": status,
-            "message": f"Based on {len(recent_vitals)} recent readings"
+            "message": f"Based on {state['readings']} recent readings"
         }
 
     @staticmethod
@@ -265,59 +312,35 @@ class HealthController:
 
     @staticmethod
     def get_health_alerts(db: Session, user_id: str):
-        """Get recent health alerts and notifications"""
-        from datetime import datetime, timedelta
+        """Get recent health alerts and notifications
+
+        Alerts are raised at ingest time, so this is an indexed read of the
+        user's own alert notifications rather than a rescan of raw vitals.
+        """
+        own_alerts = db.query(Notification).filter(
+            Notification.user_id == user_id,
+            Notification.notification_type == "health_alert",
+            Notification.subject_user_id == user_id
+        )
         
-        # Get recent vitals for analysis
-        recent_vitals = db.query(Vital).filter_by(user_id=user_id).order_by(Vital.timestamp.desc()).limit(20).all()
-        
-        alerts = []
-        
-        for vital in recent_vitals:
-            # Heart rate alerts
-            if vital.heart_rate and vital.heart_rate > 100:
-                alerts.append({
-                    "type": "heart_rate_high",
-                    "title": "Elevated Heart Rate",
-                    "message": f"Heart rate was elevated: {vital.heart_rate} bpm",
-                    "value": f"{vital.heart_rate} bpm",
-                    "timestamp": vital.timestamp.isoformat(),
-                    "severity": "warning"
-                })
-            elif vital.heart_rate and vital.heart_rate < 60:
-                alerts.append({
-                    "type": "heart_rate_low",
-                    "title": "Low Heart Rate",
-                    "message": f"Heart rate was low: {vital.heart_rate} bpm",
-                    "value": f"{vital.heart_rate} bpm",
-                    "timestamp": vital.timestamp.isoformat(),
-                    "severity": "warning"
-                })
-            
-            # SpO2 alerts
-            if vital.spo2 and vital.spo2 < 95:
-                alerts.append({
-                    "type": "spo2_low",
-                    "title": "Low Oxygen Saturation",
-                    "message": f"SpO2 was below normal: {vital.spo2}%",
-                    "value": f"{vital.spo2}%",
-                    "timestamp": vital.timestamp.isoformat(),
-                    "severity": "critical"
-                })
-            
-            # Temperature alerts
-            if vital.temperature and vital.temperature > 37.5:
-                alerts.append({
-                    "type": "temperature_high",
-                    "title": "Elevated Temperature",
-                    "message": f"Temperature was elevated: {vital.temperature}°C",
-                    "value": f"{vital.temperature}°C",
-                    "timestamp": vital.timestamp.isoformat(),
-                    "severity": "warning"
-                })
+        recent = own_alerts.order_by(Notification.created_at.desc()).limit(10).all()
+        total_alerts, unread_count = own_alerts.with_entities(
+            func.count(Notification.id),
+            func.count(Notification.id).filter(Notification.is_read == False)
+        ).one()
+        
+        alerts = [{
+            "id": alert.id,
+            "type": alert.alert_type,
+            "title": alert.title,
+            "message": alert.message,
+            "value": alert.value,
+            "timestamp": alert.created_at.isoformat() if alert.created_at else None,
+            "severity": alert.severity
+        } for alert in recent]
         
         return {
-            "alerts": alerts[:10],  # Return last 10 alerts
-            "total_alerts": len(alerts),
-            "unread_count": len(alerts)
-        } 
\ No newline at end of file
+            "alerts": alerts,
+            "total_alerts": total_alerts,
+            "unread_count": unread_count
+        }
@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.notification import Notification
@@ -75,6 +77,18 @@ class NotificationController:
             "timestamp": datetime.utcnow().isoformat()
         }
 
+    @staticmethod
+    async def get_unread_count_async(db: AsyncSession, user_id: str):
+        unread_count = (await db.execute(select(func.count()).select_from(Notification).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ))).scalar_one()
+        
+        return {
+            "unread_count": unread_count,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
     @staticmethod
     def delete_notification(db: Session, user_id: str, notification_id: int):
         """Delete a specific notification"""
@@ -1,10 +1,13 @@
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from app.models.otp import OTP
+import redis
 from app.models.user import User
 from app.services.sms_service import SMSService
 from app.services.email_service import EmailService
+from app.services.otp_store import otp_store
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
 import uuid
 
 class OTPController:
@@ -34,18 +37,19 @@ class OTPController:
         else:
             otp_code = SMSService.generate_otp()
         
-        # Create OTP record
-        otp = OTP(
-            id=str(uuid.uuid4()),
-            user_id=user.id,
-            otp_code=otp_code,
-            otp_type=otp_type,
-            expires_at=datetime.utcnow() + timedelta(minutes=10),
-            created_at=datetime.utcnow()
-        )
+        # Store OTP in Redis (native TTL, throttled per identifier); keyed by where it is sent
+        identifier = phone_number if otp_type == "phone" else email
+        try:
+            issued, retry_after = otp_store.issue(otp_type, identifier, str(user.id), otp_code)
+        except redis.RedisError:
+            raise HTTPException(status_code=503, detail="OTP service unavailable")
         
-        db.add(otp)
-        db.commit()
+        if not issued:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many OTP requests, please try again later",
+                headers={"Retry-After": str(retry_after)}
+            )
         
         # Send OTP
         if otp_type == "email":
@@ -53,37 +57,28 @@ class OTPController:
         else:
             SMSService.send_otp(phone_number, otp_code)
         
-        return {"message": f"OTP sent to {email or phone_number}", "expires_in": 600}
+        return {"message": f"OTP sent to {identifier}", "expires_in": settings.OTP_EXPIRE_SECONDS}
     
     @staticmethod
     def verify_otp(db: Session, email: str = None, phone_number: str = None, otp_code: str = None, otp_type: str = "email"):
         """Verify OTP"""
         
-        # Find user
-        user = None
-        if email:
-            user = db.query(User).filter_by(email=email).first()
-        elif phone_number:
-            user = db.query(User).filter_by(phone_number=phone_number).first()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        identifier = phone_number if otp_type == "phone" else email
+        if not identifier or not otp_code:
+            raise HTTPException(status_code=400, detail="Invalid or expired OTP")
         
-        # Find valid OTP
-        otp = db.query(OTP).filter(
-            OTP.user_id == user.id,
-            OTP.otp_code == otp_code,
-            OTP.otp_type == otp_type,
-            OTP.is_used == False,
-            OTP.expires_at > datetime.utcnow()
-        ).first()
+        # Check and consume the OTP in a single Redis round trip
+        try:
+            user_id = otp_store.verify(otp_type, identifier, otp_code)
+        except redis.RedisError:
+            raise HTTPException(status_code=503, detail="OTP service unavailable")
         
-        if not otp:
+        if not user_id:
             raise HTTPException(status_code=400, detail="Invalid or expired OTP")
         
-        # Mark OTP as used
-        otp.is_used = True
-        db.commit()
+        user = db.query(User).filter_by(id=user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
         
         # Update user verification status
         if otp_type == "email":
@@ -92,5 +87,6 @@ class OTPController:
             user.is_phone_verified = True
         
         db.commit()
+        principal_cache.invalidate(user.id)
         
-        return {"message": f"{otp_type.capitalize()} verified successfully", "is_verified": True} 
\ No newline at end of file
+        return {"message": f"{otp_type.capitalize()} verified successfully", "is_verified": True}
@@ -1,4 +1,6 @@
 from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.sos import SOS, SOSNotification
@@ -6,8 +8,12 @@ from app.models.user import User
 from app.services.emergency_service import EmergencyService
 from app.services.redis_service import redis_service
 import json
+import logging
+import redis
 import uuid
 
+logger = logging.getLogger(__name__)
+
 class SOSController:
     @staticmethod
     def trigger_sos(db: Session, user_id: str, sos_data: dict) -> SOS:
@@ -32,6 +38,29 @@ class SOSController:
 
         return sos.to_dict()
 
+    @staticmethod
+    async def trigger_sos_async(db: AsyncSession, user_id: str, sos_data: dict) -> SOS:
+        active_sos = (await db.execute(select(SOS.id).where(
+            SOS.user_id == user_id,
+            SOS.status == "active"
+        ).limit(1))).scalar()
+
+        if active_sos:
+            raise HTTPException(status_code=400, detail="Active SOS alert already exists")
+
+        try:
+            live_vitals = await redis_service.get_live_vital_async(user_id)
+        except redis.RedisError as e:
+            # An SOS must never fail because the live cache is down
+            logger.warning("Live vitals unavailable for SOS: %s", e)
+            live_vitals = None
+        if live_vitals:
+            sos_data["vital_data"] = json.dumps(live_vitals)
+
+        sos = await EmergencyService.trigger_sos_async(db, user_id, sos_data)
+
+        return sos.to_dict()
+
     @staticmethod
     def cancel_sos(db: Session, user_id: str, sos_id: str, reason: str = None) -> SOS:
         """Cancel active SOS alert"""
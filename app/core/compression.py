@@ -0,0 +1,247 @@
+"""HTTP compression for API responses and ingest request bodies.
+
+Responses go out in the best encoding the client accepts (zstd, br, gzip)
+once they reach COMPRESSION_MIN_SIZE. Bodies that are already compressed
+(PDFs, images, archives) pass through untouched. Bodies over
+COMPRESSION_THREAD_SIZE are compressed on a worker thread so the event loop
+keeps serving other requests.
+
+Devices may also send ingest bodies gzip- or zstd-encoded; they are
+decompressed here, within MAX_DECOMPRESSED_REQUEST_BYTES, before the
+route sees them. Brotli is response-only: its decoder cannot cap the
+output of a single step, so a few hundred bytes can inflate to gigabytes
+before any limit is checked.
+"""
+import io
+import re
+import zlib
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is in requirements.txt
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is in requirements.txt
+    zstandard = None
+
+# Server preference when the client weighs encodings equally
+ENCODINGS = tuple(name for name, module in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if module)
+
+INCOMPRESSIBLE_TYPES = ("application/pdf", "application/zip", "application/gzip", "application/zstd",
+                        "image/", "audio/", "video/", "font/woff")
+
+# The ECG download is a JSON wrapper around a base64 PDF whose streams are already deflated
+UNCOMPRESSED_PATHS = re.compile(r"^/ecg/[^/]+/download$")
+
+# Endpoints devices post readings to; only these accept Content-Encoding on requests
+INGEST_PATHS = re.compile(r"^/(vitals/ingest|ecg/[^/]+/(data|complete))")
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick a response encoding from an Accept-Encoding header, or None for identity"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+class Encoder:
+    """One compressed stream; every non-final chunk is flushed so it can be sent immediately"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=settings.ZSTD_LEVEL).compressobj()
+        elif encoding == "br":
+            self._stream = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._stream = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._stream.process(data)
+            return out + (self._stream.finish() if final else self._stream.flush())
+        out = self._stream.compress(data)
+        if final:
+            return out + self._stream.flush()
+        if self.encoding == "zstd":
+            return out + self._stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return out + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+class RequestBodyTooLarge(ValueError):
+    pass
+
+def decompress(encoding: str, data: bytes, limit: int) -> bytes:
+    """Decode a request body, refusing to inflate it beyond limit bytes"""
+    if encoding == "gzip":
+        stream = zlib.decompressobj(47)  # gzip or zlib header
+        out = stream.decompress(data, limit + 1)
+        if len(out) > limit or stream.unconsumed_tail:
+            raise RequestBodyTooLarge()
+        if not stream.eof:
+            raise ValueError("truncated gzip body")
+        return out
+    if encoding == "zstd" and zstandard:
+        out = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read(limit + 1)
+        if len(out) > limit:
+            raise RequestBodyTooLarge()
+        return out
+    raise LookupError(encoding)
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating response compression and inflating compressed ingest bodies"""
+
+    def __init__(self, app, minimum_size: int = None, thread_size: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.thread_size = settings.COMPRESSION_THREAD_SIZE if thread_size is None else thread_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity":
+            if not INGEST_PATHS.match(scope["path"]):
+                await JSONResponse({"detail": "Compressed request bodies are only accepted for ingest"},
+                                   status_code=415)(scope, receive, send)
+                return
+            inflated = await self._inflate_request(scope, receive, content_encoding)
+            if isinstance(inflated, JSONResponse):
+                await inflated(scope, receive, send)
+                return
+            scope, receive = inflated
+
+        encoding = None if UNCOMPRESSED_PATHS.match(scope["path"]) else negotiate(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size, self.thread_size))
+
+    @staticmethod
+    async def _inflate_request(scope, receive, encoding: str):
+        """(scope, receive) serving the decompressed body, or the error response to send"""
+        limit = settings.MAX_DECOMPRESSED_REQUEST_BYTES
+        chunks, size, more_body = [], 0, True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return JSONResponse({"detail": "Client disconnected"}, status_code=400)
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > limit:
+                return JSONResponse({"detail": "Request body too large"}, status_code=413)
+            more_body = message.get("more_body", False)
+        try:
+            body = decompress(encoding, b"".join(chunks), limit)
+        except RequestBodyTooLarge:
+            return JSONResponse({"detail": "Request body too large"}, status_code=413)
+        except LookupError:
+            return JSONResponse({"detail": f"Unsupported Content-Encoding: {encoding}"}, status_code=415)
+        except Exception:
+            return JSONResponse({"detail": f"Malformed {encoding} request body"}, status_code=400)
+
+        raw_headers = [(k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")]
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+        delivered = False
+
+        async def receive_inflated():
+            nonlocal delivered
+            if delivered:
+                return await receive()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return dict(scope, headers=raw_headers), receive_inflated
+
+class _CompressingSend:
+    """send() wrapper that compresses the response body when it is worth it"""
+
+    def __init__(self, send, encoding: str, minimum_size: int, thread_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            headers = MutableHeaders(raw=list(self.start.get("headers", [])))
+            self.start["headers"] = headers.raw
+            content_type = headers.get("content-type", "")
+            if ("content-encoding" in headers or self.start["status"] < 200 or self.start["status"] in (204, 304)
+                    or content_type.startswith(INCOMPRESSIBLE_TYPES)):
+                await self._pass_through(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                await self._pass_through(message)
+                return
+
+            self.encoder = Encoder(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            # The encoded bytes differ from the identity ones, so a strong ETag no longer holds
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = await self._compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start)
+
+        await self.send({
+            "type": "http.response.body",
+            "body": await self._compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= self.thread_size:
+            return await run_in_threadpool(self.encoder.compress, data, final)
+        return self.encoder.compress(data, final)
+
+    async def _pass_through(self, message):
+        self.passthrough = True
+        await self.send(self.start)
+        await self.send(message)
@@ -4,6 +4,105 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+    # Async driver URL for the async endpoints; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Create missing tables when a worker starts; deployments run `python -m app.jobs.migrate` instead
+    MIGRATE_ON_STARTUP: bool = os.getenv("MIGRATE_ON_STARTUP", "false").lower() == "true"
+    # UUID storage on non-Postgres backends: "char" (CHAR(36)) or "binary" (BINARY(16)).
+    # Changing it on an existing database requires converting every GUID column.
+    GUID_STORAGE: str = os.getenv("GUID_STORAGE", "char")
+    # Connection pool, per engine and per worker process (ignored for SQLite)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_CONNECT_TIMEOUT_SECONDS: int = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "10"))
+    # Comma-separated read replica URLs for read-only endpoints; empty sends everything to the primary
+    READ_REPLICA_URL: str = os.getenv("READ_REPLICA_URL", "")
+    # After a user writes, their reads stay on the primary this long so replica lag is never visible
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Authenticated principal cache (in-process LRU with an optional Redis tier)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL_SECONDS", "10"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    PRINCIPAL_CACHE_USE_REDIS: bool = os.getenv("PRINCIPAL_CACHE_USE_REDIS", "true").lower() == "true"
+    # Dedicated bcrypt process pool; PASSWORD_HASH_WORKERS=0 hashes inline
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+    # One-time passwords (stored in Redis)
+    OTP_EXPIRE_SECONDS: int = int(os.getenv("OTP_EXPIRE_SECONDS", "600"))
+    OTP_MAX_ATTEMPTS: int = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+    OTP_RATE_LIMIT_MAX_SENDS: int = int(os.getenv("OTP_RATE_LIMIT_MAX_SENDS", "3"))
+    OTP_RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("OTP_RATE_LIMIT_WINDOW_SECONDS", "600"))
+    # Ingest-time health alerts; repeats of the same alert type are suppressed for the cooldown
+    ALERT_COOLDOWN_SECONDS: int = int(os.getenv("ALERT_COOLDOWN_SECONDS", "900"))
+    ALERT_CRITICAL_COOLDOWN_SECONDS: int = int(os.getenv("ALERT_CRITICAL_COOLDOWN_SECONDS", "300"))
+    ALERT_PIPELINE_WORKERS: int = int(os.getenv("ALERT_PIPELINE_WORKERS", "8"))
+    ALERT_RULE_CACHE_MAX_ENTRIES: int = int(os.getenv("ALERT_RULE_CACHE_MAX_ENTRIES", "10000"))
+    ALERT_RULE_CACHE_TTL_SECONDS: int = int(os.getenv("ALERT_RULE_CACHE_TTL_SECONDS", "300"))
+
+    # Per-user streaming baselines; readings beyond the z-score threshold are personal anomalies
+    BASELINE_ALPHA: float = float(os.getenv("BASELINE_ALPHA", "0.05"))
+    BASELINE_Z_THRESHOLD: float = float(os.getenv("BASELINE_Z_THRESHOLD", "3.0"))
+    BASELINE_WARMUP_READINGS: int = int(os.getenv("BASELINE_WARMUP_READINGS", "30"))
+    BASELINE_TTL_SECONDS: int = int(os.getenv("BASELINE_TTL_SECONDS", str(30 * 86400)))
+
+    # Rolling health score / insight state kept per user in Redis
+    HEALTH_STATE_TTL_SECONDS: int = int(os.getenv("HEALTH_STATE_TTL_SECONDS", str(30 * 86400)))
+
+    # device_id -> (internal ID, owner, connected) cache consulted by ingest and ECG start
+    DEVICE_REGISTRY_TTL_SECONDS: int = int(os.getenv("DEVICE_REGISTRY_TTL_SECONDS", "3600"))
+    DEVICE_REGISTRY_LOCAL_TTL_SECONDS: int = int(os.getenv("DEVICE_REGISTRY_LOCAL_TTL_SECONDS", "10"))
+    DEVICE_REGISTRY_MAX_ENTRIES: int = int(os.getenv("DEVICE_REGISTRY_MAX_ENTRIES", "50000"))
+    DEVICE_REGISTRY_USE_REDIS: bool = os.getenv("DEVICE_REGISTRY_USE_REDIS", "true").lower() == "true"
+
+    # Battery / RSSI / firmware reported on ingest: the last N samples stay in a Redis ring per
+    # device, and one downsampled row per device per bucket is written to device_telemetry
+    DEVICE_TELEMETRY_RING_SIZE: int = int(os.getenv("DEVICE_TELEMETRY_RING_SIZE", "360"))
+    DEVICE_TELEMETRY_BUCKET_SECONDS: int = int(os.getenv("DEVICE_TELEMETRY_BUCKET_SECONDS", "900"))
+    DEVICE_TELEMETRY_TTL_SECONDS: int = int(os.getenv("DEVICE_TELEMETRY_TTL_SECONDS", str(7 * 86400)))
+    # Most device IDs one GET /devices/status request may ask about
+    DEVICE_STATUS_MAX_IDS: int = int(os.getenv("DEVICE_STATUS_MAX_IDS", "200"))
+
+    # Most readings one batch ingest request may carry (JSON or binary)
+    INGEST_BATCH_MAX_READINGS: int = int(os.getenv("INGEST_BATCH_MAX_READINGS", "500"))
+
+    # Response compression (zstd / br / gzip by Accept-Encoding); smaller bodies go out as is
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    # Bodies at least this large are compressed on a worker thread rather than the event loop
+    COMPRESSION_THREAD_SIZE: int = int(os.getenv("COMPRESSION_THREAD_SIZE", str(64 * 1024)))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    ZSTD_LEVEL: int = int(os.getenv("ZSTD_LEVEL", "3"))
+    # Ingest bodies may arrive compressed; this caps what one may inflate to
+    MAX_DECOMPRESSED_REQUEST_BYTES: int = int(os.getenv("MAX_DECOMPRESSED_REQUEST_BYTES", str(8 * 1024 * 1024)))
+
+    # Conditional GETs: ETags come from per-user data versions kept in Redis. Time-windowed
+    # responses (charts, trends) are recomputed at least this often even when no data changed
+    HTTP_CACHE_REFRESH_SECONDS: int = int(os.getenv("HTTP_CACHE_REFRESH_SECONDS", "60"))
+    DATA_VERSION_TTL_SECONDS: int = int(os.getenv("DATA_VERSION_TTL_SECONDS", str(30 * 86400)))
+
+    # Nightly analytics snapshot job (python -m app.jobs.nightly_analytics)
+    ANALYTICS_SNAPSHOT_WORKERS: int = int(os.getenv("ANALYTICS_SNAPSHOT_WORKERS", str(os.cpu_count() or 1)))
+    ANALYTICS_SNAPSHOT_CHUNK_SIZE: int = int(os.getenv("ANALYTICS_SNAPSHOT_CHUNK_SIZE", "200"))
+    ANALYTICS_SNAPSHOT_HOUR: int = int(os.getenv("ANALYTICS_SNAPSHOT_HOUR", "2"))
+    ANALYTICS_SNAPSHOT_RETENTION_DAYS: int = int(os.getenv("ANALYTICS_SNAPSHOT_RETENTION_DAYS", "7"))
+
+    # Trained models (python -m app.jobs.train_risk_model writes here)
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", "app/ml_models")
+
+    # Outbound notification delivery; channels without a webhook URL print to stdout
+    DELIVERY_MAX_ATTEMPTS: int = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "3"))
+    DELIVERY_RETRY_BASE_SECONDS: float = float(os.getenv("DELIVERY_RETRY_BASE_SECONDS", "0.5"))
+    NOTIFICATION_PROVIDER_CONCURRENCY: int = int(os.getenv("NOTIFICATION_PROVIDER_CONCURRENCY", "10"))
+    SMS_WEBHOOK_URL: str = os.getenv("SMS_WEBHOOK_URL", "")
+    EMAIL_WEBHOOK_URL: str = os.getenv("EMAIL_WEBHOOK_URL", "")
+    PUSH_WEBHOOK_URL: str = os.getenv("PUSH_WEBHOOK_URL", "")
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+    PUSH_BATCH_SIZE: int = int(os.getenv("PUSH_BATCH_SIZE", "100"))
     # Add more settings as needed
 
-settings = Settings() 
\ No newline at end of file
+settings = Settings() 
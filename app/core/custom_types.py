@@ -1,39 +1,54 @@
 # file: app/core/custom_types.py
-from sqlalchemy.types import TypeDecorator, CHAR
+from sqlalchemy.types import TypeDecorator, CHAR, BINARY
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from app.core.config import settings
 import uuid
 
+UUID = uuid.UUID
+
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
-    Uses PostgreSQL's UUID type, otherwise stores as CHAR(36) string.
+    Uses PostgreSQL's UUID type; elsewhere stores either a CHAR(36) string
+    or, with GUID_STORAGE=binary, the 16 raw bytes.
+
+    Values that are already uuid.UUID are never re-parsed on bind.
     """
     impl = CHAR
     cache_ok = True
 
+    def __init__(self, binary: bool = None):
+        super().__init__()
+        self.binary = settings.GUID_STORAGE == "binary" if binary is None else binary
+
     def load_dialect_impl(self, dialect):
         if dialect.name == "postgresql":
             return dialect.type_descriptor(PG_UUID(as_uuid=True))
-        else:
-            return dialect.type_descriptor(CHAR(36))
+        if self.binary:
+            return dialect.type_descriptor(BINARY(16))
+        return dialect.type_descriptor(CHAR(36))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return None
-        # For Postgres: ensure a uuid.UUID is passed to PG driver
+        # Fast path: most callers already hold a uuid.UUID
+        if value.__class__ is not UUID:
+            value = UUID(bytes=value) if isinstance(value, bytes) else UUID(str(value))
+        # For Postgres: the driver takes uuid.UUID as is
         if dialect.name == "postgresql":
-            if isinstance(value, uuid.UUID):
-                return value
-            return uuid.UUID(str(value))
-        # For SQLite / others: store canonical 36-char string
-        if isinstance(value, uuid.UUID):
-            return str(value)
-        return str(uuid.UUID(str(value)))
+            return value
+        if self.binary:
+            return value.bytes
+        # Otherwise store the canonical 36-char string
+        return str(value)
 
     def process_result_value(self, value, dialect):
         if value is None:
             return None
         # For Postgres, SQLAlchemy with as_uuid=True returns uuid.UUID already
-        if dialect.name == "postgresql":
+        if value.__class__ is UUID:
             return value
+        if self.binary:
+            # Building from 16 bytes skips the hex parsing a CHAR(36) value needs
+            return UUID(bytes=value if value.__class__ is bytes else bytes(value))
         # For SQLite/others we stored a string — convert to uuid.UUID on read
-        return uuid.UUID(value)
\ No newline at end of file
+        return UUID(value)
@@ -1,28 +1,208 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
+import random
+from typing import Any, Dict, List, Optional
+import redis
+from fastapi.requests import HTTPConnection
+from jose import jwt, JWTError
+from sqlalchemy import create_engine, event, Delete, Insert, Update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
 # Detect database type
 is_sqlite = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
-# Configure engine
-if is_sqlite:
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        pool_pre_ping=True
-    )
-else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def to_async_url(url: str) -> str:
+    """Swap a sync driver URL for its async equivalent (asyncpg / aiosqlite)"""
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+")[0]
+    if driver in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Pool and connect settings for an engine on the given URL"""
+    if url.startswith("sqlite"):
+        options = {"pool_pre_ping": True}
+        if "aiosqlite" not in url:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+    # asyncpg names its connect timeout differently from psycopg2
+    timeout_arg = "timeout" if "+asyncpg" in url else "connect_timeout"
+    return {
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "connect_args": {timeout_arg: settings.DB_CONNECT_TIMEOUT_SECONDS},
+    }
+
+REPLICA_URLS = [url.strip() for url in settings.READ_REPLICA_URL.split(",") if url.strip()]
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+class RoutingSession(Session):
+    """Session that can run reads on a replica.
+
+    Sessions opened for read-only endpoints (info["read_only"]) send their
+    SELECTs to one replica, picked per session, until they flush anything;
+    from then on, and for every other session, all work goes to the primary.
+    """
+
+    def __init__(self, *args, replicas: List[Any] = (), **kw):
+        super().__init__(*args, **kw)
+        self.replicas = list(replicas)
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (self.replicas and self.info.get("read_only") and not self.info.get("pinned")
+                and not self._flushing and not isinstance(clause, (Insert, Update, Delete))):
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(self.replicas)
+            return self.info["replica"]
+        return super().get_bind(mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_write(session, flush_context):
+    session.info["pinned"] = True
+    session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stick_writer(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id"):
+        if session.info.get("async"):
+            # Shared from RoutingAsyncSession.commit on the async Redis client
+            session.info["stick"] = session.info["user_id"]
+        else:
+            primary_stickiness.mark(session.info["user_id"])
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _forget_write(session, previous_transaction):
+    session.info.pop("wrote", None)
+
+class RoutingAsyncSession(AsyncSession):
+    """AsyncSession over a RoutingSession that marks writers without blocking the loop"""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.sync_session.info["async"] = True
+
+    async def commit(self) -> None:
+        await super().commit()
+        user_id = self.sync_session.info.pop("stick", None)
+        if user_id:
+            await primary_stickiness.mark_async(user_id)
+
+class PrimaryStickiness:
+    """Users who wrote recently and must keep reading from the primary.
+
+    Marks live in the local cache and in Redis so every worker honours them.
+    """
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.local = TTLCache(max_entries=10000, ttl_seconds=seconds)
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"db_sticky:{user_id}"
+
+    def mark(self, user_id: str) -> None:
+        self.local.set(user_id, True)
+        try:
+            redis_service.redis_client.setex(self._key(user_id), self.seconds, 1)
+        except redis.RedisError as e:
+            logger.warning("Read-your-writes mark not shared: %s", e)
+
+    async def mark_async(self, user_id: str) -> None:
+        self.local.set(user_id, True)
+        try:
+            await redis_service.async_client.setex(self._key(user_id), self.seconds, 1)
+        except redis.RedisError as e:
+            logger.warning("Read-your-writes mark not shared: %s", e)
+
+    def is_sticky(self, user_id: str) -> bool:
+        if self.local.get(user_id):
+            return True
+        try:
+            return bool(redis_service.redis_client.exists(self._key(user_id)))
+        except redis.RedisError:
+            # Without the shared mark, err on the side of fresh reads
+            return True
+
+    async def is_sticky_async(self, user_id: str) -> bool:
+        if self.local.get(user_id):
+            return True
+        try:
+            return bool(await redis_service.async_client.exists(self._key(user_id)))
+        except redis.RedisError:
+            return True
+
+primary_stickiness = PrimaryStickiness(settings.READ_YOUR_WRITES_SECONDS)
+
+# Configure engines
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+replica_engines = [create_engine(url, **engine_options(url)) for url in REPLICA_URLS]
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+                            replicas=replica_engines)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+# Async engines for the high-traffic endpoints; they share the schema with the sync ones
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+async_replica_engines = [
+    create_async_engine(to_async_url(url), **engine_options(to_async_url(url))) for url in REPLICA_URLS
+]
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=RoutingAsyncSession, expire_on_commit=False, autoflush=False,
+    sync_session_class=RoutingSession, replicas=[e.sync_engine for e in async_replica_engines]
+)
+
+def request_user_id(connection: HTTPConnection) -> Optional[str]:
+    """Caller's user ID from the bearer token, for routing only.
+
+    The signature is not checked here; authentication is the auth
+    dependency's job and a forged ID can only change which database serves
+    the read.
+    """
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+def get_db(connection: HTTPConnection):
+    db = SessionLocal(info={"user_id": request_user_id(connection) if replica_engines else None})
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(connection: HTTPConnection):
+    """Session for read-only endpoints; served by a replica unless the caller just wrote"""
+    user_id = request_user_id(connection) if replica_engines else None
+    read_only = bool(replica_engines) and not (user_id and primary_stickiness.is_sticky(user_id))
+    db = SessionLocal(info={"user_id": user_id, "read_only": read_only})
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db(connection: HTTPConnection):
+    async with AsyncSessionLocal(info={"user_id": request_user_id(connection) if async_replica_engines else None}) as db:
+        yield db
+
+async def get_async_read_db(connection: HTTPConnection):
+    user_id = request_user_id(connection) if async_replica_engines else None
+    read_only = bool(async_replica_engines) and not (user_id and await primary_stickiness.is_sticky_async(user_id))
+    async with AsyncSessionLocal(info={"user_id": user_id, "read_only": read_only}) as db:
+        yield db
@@ -0,0 +1,87 @@
+"""Conditional GETs for read-mostly endpoints.
+
+Writers record a per-user data version in Redis for what they changed
+(mark_changed("vitals") on ingest, "ecg" on recording updates, ...). A route
+opts in with dependencies=[Depends(conditional_get("vitals"))]: its ETag hashes
+the caller, the URL and those versions, so a poll that sends the ETag back in
+If-None-Match gets 304 Not Modified before the controller or a database query
+runs. Without Redis the route simply runs uncached.
+"""
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional
+import redis
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_read_db
+from app.core.principal_cache import Principal
+from app.core.security import get_current_principal_async
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Per-user data that may change any second: clients keep it but revalidate on every use
+CACHE_CONTROL = "private, no-cache"
+
+def mark_changed(user_ids: Iterable[str], *scopes: str) -> None:
+    """Invalidate the users' cached responses that depend on these scopes"""
+    try:
+        redis_service.touch_data_version([str(u) for u in user_ids], *scopes)
+    except redis.RedisError as e:
+        logger.warning("Data version not recorded: %s", e)
+
+async def mark_changed_async(user_ids: Iterable[str], *scopes: str) -> None:
+    try:
+        await redis_service.touch_data_version_async([str(u) for u in user_ids], *scopes)
+    except redis.RedisError as e:
+        logger.warning("Data version not recorded: %s", e)
+
+def make_etag(user_id: str, url: str, subjects: List[str], versions: List[List[Optional[str]]], window: int) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (user_id, url, str(window)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    for subject, subject_versions in zip(subjects, versions):
+        digest.update(f"{subject}={','.join(v or '0' for v in subject_versions)};".encode())
+    # Weak: generated fields (timestamps) differ between equivalent responses
+    return f'W/"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def conditional_get(*scopes: str, subjects: Callable[[AsyncSession, str], Awaitable[List[str]]] = None):
+    """Route dependency answering If-None-Match from the caller's data versions.
+
+    subjects lists whose data the response covers (default: just the caller),
+    e.g. every member of the caller's family for the family dashboard.
+    """
+    async def check(
+        request: Request,
+        response: Response,
+        principal: Principal = Depends(get_current_principal_async),
+        db: AsyncSession = Depends(get_async_read_db)
+    ):
+        user_id = str(principal.id)
+        user_ids = sorted(await subjects(db, user_id)) if subjects else [user_id]
+        try:
+            versions = await redis_service.get_data_versions_async(user_ids, scopes)
+        except redis.RedisError as e:
+            logger.warning("Conditional GET skipped: %s", e)
+            return
+
+        # Aggregates over "the last hour" slide with the clock, so no ETag outlives one window
+        window = int(time.time() // settings.HTTP_CACHE_REFRESH_SECONDS)
+        etag = make_etag(user_id, str(request.url), user_ids, versions, window)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check
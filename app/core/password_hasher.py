@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Any
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.core.config import settings
+
+# Built in every worker process when this module is imported there
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated, bounded process pool.
+
+    Hashing never runs on the request threadpool's CPU budget, and at most
+    ``max_pending`` operations (running + queued) are admitted at once. Callers
+    beyond that get an immediate 503 instead of tying up another request
+    thread, so a login storm cannot starve ingest and other sync endpoints.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._metrics_lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # spawn: forking a process that already runs request threads is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    @staticmethod
+    def _busy() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    def _admit(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._metrics_lock:
+                self._rejected += 1
+            raise self._busy()
+        with self._metrics_lock:
+            self._pending += 1
+            self._submitted += 1
+
+    def _release(self, started: float, failed: bool) -> None:
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self._pending -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+        self._slots.release()
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        self._admit()
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release(started, failed=True)
+            raise
+        future.add_done_callback(lambda f: self._release(started, failed=f.cancelled() or f.exception() is not None))
+        return future
+
+    def _run(self, fn: Callable, *args):
+        if self.workers <= 0:
+            # Inline mode for single-process tooling; still subject to admission control
+            self._admit()
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args)
+                failed = False
+                return result
+            finally:
+                self._release(started, failed)
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            # Drop it if it is still queued; a running job frees its slot when it finishes
+            future.cancel()
+            raise self._busy()
+
+    def hash(self, password: str) -> str:
+        """Hash a password, blocking the calling thread until a worker returns"""
+        return self._run(_hash_password, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its bcrypt hash"""
+        return self._run(_verify_password, plain_password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await asyncio.wrap_future(self._submit(_hash_password, password))
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await asyncio.wrap_future(self._submit(_verify_password, plain_password, hashed_password))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation for monitoring"""
+        with self._metrics_lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "submitted": self._submitted,
+                "completed": completed,
+                "rejected": self._rejected,
+                "failed": self._failed,
+                "avg_latency_ms": round(self._total_seconds / completed * 1000, 2) if completed else 0.0,
+                "max_latency_ms": round(self._max_seconds * 1000, 2)
+            }
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout_seconds=settings.PASSWORD_HASH_TIMEOUT_SECONDS
+)
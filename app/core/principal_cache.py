@@ -0,0 +1,183 @@
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import NamedTuple, Optional, Dict, Any
+import redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User, UserRole, LanguageEnum
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+class Principal(NamedTuple):
+    """Lightweight authenticated identity for endpoints that only need ID and role"""
+    id: uuid.UUID
+    role: UserRole
+
+class PrincipalCache:
+    def __init__(self):
+        self.local = TTLCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS)
+        self.ttl_seconds = settings.PRINCIPAL_CACHE_TTL_SECONDS
+        self.use_redis = settings.PRINCIPAL_CACHE_USE_REDIS
+
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"principal:{user_id}"
+
+    @staticmethod
+    def serialize(user: User) -> Dict[str, Any]:
+        """Snapshot the cached user columns as JSON-safe values
+
+        hashed_password is deliberately left out; it is lazy-loaded from the
+        database if a caller ever touches it.
+        """
+        return {
+            "id": str(user.id),
+            "email": user.email,
+            "phone_number": user.phone_number,
+            "name": user.name,
+            "role": user.role.value if user.role else None,
+            "language": user.language.value if user.language else None,
+            "is_phone_verified": user.is_phone_verified,
+            "is_email_verified": user.is_email_verified,
+            "created_at": user.created_at.isoformat() if user.created_at else None
+        }
+
+    def get_snapshot(self, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """Look up a user snapshot in the local tier, then Redis"""
+        snapshot = self.local.get(user_id)
+        if snapshot is not None:
+            return snapshot
+
+        if not self.use_redis:
+            return None
+        try:
+            data = redis_service.redis_client.get(self._key(user_id))
+        except redis.RedisError as e:
+            logger.warning("Principal cache Redis read failed: %s", e)
+            return None
+        if not data:
+            return None
+
+        snapshot = json.loads(data)
+        self.local.set(user_id, snapshot)
+        return snapshot
+
+    async def get_snapshot_async(self, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        snapshot = self.local.get(user_id)
+        if snapshot is not None or not self.use_redis:
+            return snapshot
+        try:
+            data = await redis_service.async_client.get(self._key(user_id))
+        except redis.RedisError as e:
+            logger.warning("Principal cache Redis read failed: %s", e)
+            return None
+        if not data:
+            return None
+
+        snapshot = json.loads(data)
+        self.local.set(user_id, snapshot)
+        return snapshot
+
+    def store(self, user: User) -> Dict[str, Any]:
+        """Write a user snapshot through both tiers"""
+        snapshot = self.serialize(user)
+        self.local.set(user.id, snapshot)
+        if self.use_redis:
+            try:
+                redis_service.redis_client.setex(self._key(user.id), self.ttl_seconds, json.dumps(snapshot))
+            except redis.RedisError as e:
+                logger.warning("Principal cache Redis write failed: %s", e)
+        return snapshot
+
+    async def store_async(self, user: User) -> Dict[str, Any]:
+        snapshot = self.serialize(user)
+        self.local.set(user.id, snapshot)
+        if self.use_redis:
+            try:
+                await redis_service.async_client.setex(self._key(user.id), self.ttl_seconds, json.dumps(snapshot))
+            except redis.RedisError as e:
+                logger.warning("Principal cache Redis write failed: %s", e)
+        return snapshot
+
+    def invalidate(self, user_id) -> None:
+        """Drop a user from both tiers; call after the user is updated or deleted"""
+        user_uuid = uuid.UUID(str(user_id))
+        self.local.delete(user_uuid)
+        if self.use_redis:
+            try:
+                redis_service.redis_client.delete(self._key(user_uuid))
+            except redis.RedisError as e:
+                logger.warning("Principal cache Redis invalidation failed: %s", e)
+
+    def load_snapshot(self, db: Session, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """Return the cached snapshot, falling back to a single DB read on miss"""
+        snapshot = self.get_snapshot(user_id)
+        if snapshot is not None:
+            return snapshot
+
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        return self.store(user)
+
+    async def load_snapshot_async(self, db: AsyncSession, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        snapshot = await self.get_snapshot_async(user_id)
+        if snapshot is not None:
+            return snapshot
+
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if user is None:
+            return None
+        return await self.store_async(user)
+
+    @staticmethod
+    def _principal(user_id: uuid.UUID, snapshot: Optional[Dict[str, Any]]) -> Optional[Principal]:
+        if snapshot is None:
+            return None
+        return Principal(id=user_id, role=UserRole(snapshot["role"]) if snapshot["role"] else None)
+
+    def get_principal(self, db: Session, user_id: uuid.UUID) -> Optional[Principal]:
+        return self._principal(user_id, self.load_snapshot(db, user_id))
+
+    async def get_principal_async(self, db: AsyncSession, user_id: uuid.UUID) -> Optional[Principal]:
+        return self._principal(user_id, await self.load_snapshot_async(db, user_id))
+
+    def get_user(self, db: Session, user_id: uuid.UUID) -> Optional[User]:
+        """Return a session-attached User, built from the cache without a SELECT when possible"""
+        # Already in the identity map for this session
+        user = db.identity_map.get(identity_key(User, user_id))
+        if user is not None:
+            return user
+
+        snapshot = self.get_snapshot(user_id)
+        if snapshot is None:
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is not None:
+                self.store(user)
+            return user
+
+        user = User(
+            id=user_id,
+            email=snapshot["email"],
+            phone_number=snapshot["phone_number"],
+            name=snapshot["name"],
+            role=UserRole(snapshot["role"]) if snapshot["role"] else None,
+            language=LanguageEnum(snapshot["language"]) if snapshot["language"] else None,
+            is_phone_verified=snapshot["is_phone_verified"],
+            is_email_verified=snapshot["is_email_verified"],
+            created_at=datetime.fromisoformat(snapshot["created_at"]) if snapshot["created_at"] else None
+        )
+        # Attach as a persistent, clean instance so updates flush as normal UPDATEs
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
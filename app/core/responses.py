@@ -0,0 +1,36 @@
+from decimal import Decimal
+from typing import Any, List, Type
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+def response_columns(model, schema: Type[BaseModel]) -> List[Any]:
+    """The model's columns named by the response schema, in schema order.
+
+    Selecting exactly these keeps the payload in step with the documented
+    response_model without loading columns the endpoint never returns.
+    """
+    return [model.__table__.c[name] for name in schema.model_fields]
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class RowsJSONResponse(Response):
+    """Serializes rows straight to JSON bytes with orjson.
+
+    Returning one of these from a route bypasses response_model validation and
+    the stdlib encoder; response_model is then only used for the docs, so the
+    rows must already match it (see response_columns). UUIDs and datetimes are
+    encoded natively.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default)
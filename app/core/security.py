@@ -1,39 +1,93 @@
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.user import User
+from app.core.principal_cache import principal_cache, Principal
+from app.core.password_hasher import password_hasher
+import logging
+import time
+import uuid
+import redis
+from app.services.redis_service import redis_service
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
-# Extended for testing - refresh token available for production use
-ACCESS_TOKEN_EXPIRE_MINUTES = 7200  # 5 days for testing (5 * 24 * 60 = 7200 minutes)
-REFRESH_TOKEN_EXPIRE_DAYS = 7
+# Access tokens are short-lived; clients renew them through /auth/refresh
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
-def create_access_token(data: dict, expires_delta: timedelta = None):
+def create_access_token(data: dict, expires_delta: timedelta = None, family: str = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "access"})
+    if family:
+        to_encode["fam"] = family
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def create_refresh_token(data: dict, expires_delta: timedelta = None):
+def create_refresh_token(data: dict, expires_delta: timedelta = None, family: str = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire})
+    # fam ties every rotated refresh token back to the login that started the chain
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "refresh", "fam": family or uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_token_pair(user_id: str, family: str = None) -> dict:
+    """Issue an access/refresh token pair sharing one session family"""
+    family = family or uuid.uuid4().hex
+    return {
+        "access_token": create_access_token({"sub": user_id}, family=family),
+        "refresh_token": create_refresh_token({"sub": user_id}, family=family),
+        "token_type": "bearer"
+    }
+
+def token_ttl_seconds(payload: dict) -> int:
+    """Seconds until a decoded token expires"""
+    return max(1, int(payload["exp"] - time.time()))
+
+def rotate_refresh_token(refresh_token: str) -> dict:
+    """Exchange a refresh token for a new pair, spending the old one.
+
+    Each refresh token is single-use: presenting one that was already rotated
+    is treated as theft and revokes the whole session family.
+    """
+    invalid_token = HTTPException(status_code=401, detail="Invalid refresh token")
+    payload = decode_token(refresh_token)
+    if not payload or payload.get("type") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+        raise invalid_token
+
+    family = payload.get("fam")
+    try:
+        if redis_service.is_token_revoked(payload["jti"], family):
+            if family:
+                redis_service.revoke_token_family(family, REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+            raise invalid_token
+        if not redis_service.consume_token(payload["jti"], token_ttl_seconds(payload)):
+            raise invalid_token
+    except redis.RedisError as e:
+        logger.error("Token store unavailable during refresh: %s", e)
+        raise HTTPException(status_code=503, detail="Token service unavailable")
+
+    return create_token_pair(payload["sub"], family=family)
+
+def revoke_token(payload: dict, revoke_session: bool = True) -> None:
+    """Revoke a decoded token and, optionally, every token from its session"""
+    redis_service.revoke_token(payload["jti"], token_ttl_seconds(payload))
+    if revoke_session and payload.get("fam"):
+        redis_service.revoke_token_family(payload["fam"], REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def decode_token(token: str):
     try:
@@ -42,24 +96,27 @@ def decode_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+def _decode_access_token(token: str):
+    """Validate an access token and return (user UUID, payload)"""
+    credentials_exception = _credentials_exception()
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
+        # Refresh tokens are only accepted by /auth/refresh
+        if payload.get("type", "access") != "access":
+            raise credentials_exception
 
         # ✅ Convert string → UUID
-        import uuid
         try:
             user_uuid = uuid.UUID(user_id)
         except ValueError:
@@ -68,8 +125,73 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    # ✅ Use UUID in query
-    user = db.query(User).filter(User.id == user_uuid).first()
+    return user_uuid, payload
+
+def get_token_user_id(token: str = Depends(oauth2_scheme)):
+    """Decode the bearer token and return the user UUID it was issued for"""
+    user_uuid, payload = _decode_access_token(token)
+
+    # ✅ O(1) revocation check in Redis; no database access
+    if payload.get("jti"):
+        try:
+            if redis_service.is_token_revoked(payload["jti"], payload.get("fam")):
+                raise _credentials_exception()
+        except redis.RedisError as e:
+            # Access tokens are short-lived, so fail open rather than lock everyone out
+            logger.warning("Token revocation check skipped: %s", e)
+
+    return user_uuid
+
+async def get_token_user_id_async(token: str = Depends(oauth2_scheme)):
+    """get_token_user_id for async routes; the revocation check does not take a threadpool slot"""
+    user_uuid, payload = _decode_access_token(token)
+
+    if payload.get("jti"):
+        try:
+            if await redis_service.is_token_revoked_async(payload["jti"], payload.get("fam")):
+                raise _credentials_exception()
+        except redis.RedisError as e:
+            logger.warning("Token revocation check skipped: %s", e)
+
+    return user_uuid
+
+def get_current_user(
+    user_uuid: uuid.UUID = Depends(get_token_user_id),
+    db: Session = Depends(get_db)
+):
+    # ✅ Served from the principal cache; falls back to a DB read on miss
+    user = principal_cache.get_user(db, user_uuid)
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+def get_current_principal(
+    user_uuid: uuid.UUID = Depends(get_token_user_id),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Lightweight alternative to get_current_user carrying only ID and role.
+
+    Hot paths such as vital ingest use this so a cache hit needs no DB user load.
+    """
+    principal = principal_cache.get_principal(db, user_uuid)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+async def get_current_principal_async(
+    user_uuid: uuid.UUID = Depends(get_token_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """get_current_principal for async routes"""
+    principal = await principal_cache.get_principal_async(db, user_uuid)
+    if principal is None:
+        raise _credentials_exception()
+    return principal
@@ -0,0 +1,61 @@
+"""Create or update the database schema.
+
+Run once per deploy, before starting API workers, instead of on every
+worker boot:
+
+    python -m app.jobs.migrate
+"""
+from sqlalchemy import inspect, text
+from app.core.database import Base, engine
+from app.models import user, vitals, family, sos, otp, device, emergency_contact, ecg, notification, alert_rule, analytics_snapshot
+
+# Columns added to tables that predate them; create_all never alters an existing table
+ADDED_COLUMNS = {
+    "ecgs": ("ecg_samples", "lead_count", "sample_count"),
+    "sos_notifications": ("delivery_status", "attempts", "last_error"),
+    "notifications": ("alert_type", "subject_user_id", "value"),
+}
+
+# Indexes added to tables that predate them
+ADDED_INDEXES = {
+    "vitals": ("ix_vitals_user_timestamp",),
+    "notifications": ("ix_notifications_user_created", "ix_notifications_user_type_created"),
+}
+
+def add_missing_columns(conn) -> list:
+    """ALTER TABLE ... ADD COLUMN for each ADDED_COLUMNS entry the table lacks; returns what was added"""
+    inspector = inspect(conn)
+    added = []
+    for table_name, names in ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table_name)}
+        for name in names:
+            if name in existing:
+                continue
+            column = Base.metadata.tables[table_name].c[name]
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"))
+            added.append(f"{table_name}.{name}")
+    return added
+
+def add_missing_indexes(conn) -> None:
+    """CREATE INDEX IF NOT EXISTS for each ADDED_INDEXES entry"""
+    for table_name, names in ADDED_INDEXES.items():
+        indexes = {index.name: index for index in Base.metadata.tables[table_name].indexes}
+        for name in names:
+            indexes[name].create(conn, checkfirst=True)
+
+def migrate(bind=None) -> list:
+    """Create missing tables, then bring existing ones up to the models; returns the columns added"""
+    with (bind or engine).begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        added = add_missing_columns(conn)
+        add_missing_indexes(conn)
+    return added
+
+def main():
+    added = migrate()
+    for column in added:
+        print(f"Added {column}")
+    print(f"Schema up to date ({len(Base.metadata.tables)} tables)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Nightly analytics snapshots.
+
+Computes insights, patterns, period comparisons and risk scores for every
+user and stores them as AnalyticsSnapshot rows, so the analytics endpoints
+serve a precomputed result instead of scanning vitals per request.
+
+    python -m app.jobs.nightly_analytics            # run once
+    python -m app.jobs.nightly_analytics --daily    # run every day at ANALYTICS_SNAPSHOT_HOUR (UTC)
+"""
+import argparse
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.http_cache import mark_changed
+from app.controllers.analytics_controller import AnalyticsController
+from app.models import user, vitals, family, sos, otp, device, emergency_contact, ecg, notification, alert_rule, analytics_snapshot
+from app.models.analytics_snapshot import AnalyticsSnapshot
+from app.models.user import User
+from app.models.vitals import Vital
+from app.services.health_analysis_service import HealthAnalysisService
+from app.services.risk_model import score_users
+
+logger = logging.getLogger(__name__)
+
+def compute_risk_scores(db: Session, user_id: str, days: int = 7) -> Dict[str, Any]:
+    """Share of recent readings the analyzer flags, scored in one vectorized pass"""
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.query(*(getattr(Vital, metric) for metric in HealthAnalysisService.METRICS)).filter(
+        Vital.user_id == user_id,
+        Vital.timestamp >= since
+    ).all()
+    if not rows:
+        return {"readings": 0, "anomaly_rate": None, "critical_rate": None, "period_days": days}
+
+    columns = {
+        metric: np.array([row[i] for row in rows], dtype=np.float64)
+        for i, metric in enumerate(HealthAnalysisService.METRICS)
+    }
+    conditions, anomalies = HealthAnalysisService.analyze_vital_batch(columns)
+    return {
+        "readings": len(rows),
+        "anomaly_rate": round(float(anomalies.mean()), 4),
+        "critical_rate": round(float((conditions == 2).mean()), 4),
+        "period_days": days
+    }
+
+def build_snapshot(db: Session, user_id: str, scored: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Every analytics section for one user, in the shape the endpoints return"""
+    predictive = AnalyticsController.get_predictive_health(db, user_id, scored)
+    predictive["risk_scores"] = compute_risk_scores(db, user_id)
+    return {
+        "insights": AnalyticsController.get_health_insights(db, user_id),
+        "patterns": AnalyticsController.analyze_health_patterns(db, user_id),
+        "comparison:week": AnalyticsController.compare_health_data(db, user_id, "week"),
+        "comparison:month": AnalyticsController.compare_health_data(db, user_id, "month"),
+        "predictive": predictive
+    }
+
+def process_chunk(user_ids: List[str]) -> int:
+    """Worker entry point: snapshot a chunk of users in one session and transaction"""
+    db = SessionLocal()
+    try:
+        computed_at = datetime.utcnow()
+        # Risk model scores the whole chunk in one feature query and one matrix product
+        scores = score_users(db, user_ids)
+        for user_id, scored in zip(user_ids, scores):
+            db.add(AnalyticsSnapshot(user_id=user_id, data=build_snapshot(db, user_id, scored), computed_at=computed_at))
+        db.commit()
+        mark_changed(user_ids, "snapshot")
+        return len(user_ids)
+    finally:
+        db.close()
+
+def iter_user_chunks(db: Session, chunk_size: int) -> Iterator[List[str]]:
+    chunk = []
+    for (user_id,) in db.query(User.id).order_by(User.id).yield_per(chunk_size):
+        chunk.append(str(user_id))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run(workers: int = None, chunk_size: int = None) -> int:
+    """Snapshot every user; returns how many were processed"""
+    workers = settings.ANALYTICS_SNAPSHOT_WORKERS if workers is None else workers
+    chunk_size = chunk_size or settings.ANALYTICS_SNAPSHOT_CHUNK_SIZE
+    started = time.monotonic()
+
+    db = SessionLocal()
+    try:
+        chunks = list(iter_user_chunks(db, chunk_size))
+    finally:
+        db.close()
+
+    if workers <= 0:
+        processed = sum(process_chunk(chunk) for chunk in chunks)
+    else:
+        # spawn keeps workers free of the parent's open connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            processed = sum(pool.map(process_chunk, chunks))
+
+    prune_snapshots()
+    logger.info("Analytics snapshots: %s users in %.1fs", processed, time.monotonic() - started)
+    return processed
+
+def prune_snapshots() -> int:
+    """Drop snapshots older than the retention window"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.ANALYTICS_SNAPSHOT_RETENTION_DAYS)
+    db = SessionLocal()
+    try:
+        deleted = db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.computed_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+def seconds_until(hour: int) -> float:
+    now = datetime.utcnow()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute per-user analytics snapshots")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (0 runs inline)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="users per worker task")
+    parser.add_argument("--daily", action="store_true", help="keep running once a day at ANALYTICS_SNAPSHOT_HOUR UTC")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if not args.daily:
+        print(f"Snapshotted {run(args.workers, args.chunk_size)} users")
+        return
+    while True:
+        time.sleep(seconds_until(settings.ANALYTICS_SNAPSHOT_HOUR))
+        try:
+            run(args.workers, args.chunk_size)
+        except Exception:
+            logger.exception("Analytics snapshot run failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Offline training for the predictive-health risk model.
+
+There is no labelled outcome data yet, so the model is fitted to synthetic
+cohorts drawn from clinically plausible feature distributions (healthy,
+cardiac-risk and respiratory-risk users with some overlap, label noise and
+missing metrics). The result is written to the model registry, which the
+API loads once per worker.
+
+    python -m app.jobs.train_risk_model [--samples 20000] [--seed 42]
+"""
+import argparse
+from typing import Dict, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.risk_model import FEATURES, TARGETS, LogisticRiskModel, ModelRegistry, RiskModelCache
+
+def synthetic_cohort(samples: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    cardiac = rng.random(samples) < 0.18
+    respiratory = rng.random(samples) < 0.15
+
+    hr_avg = np.where(cardiac, rng.normal(96, 14, samples), rng.normal(72, 8, samples))
+    hr_std = np.abs(np.where(cardiac, rng.normal(14, 5, samples), rng.normal(6, 2, samples)))
+    hr_max = hr_avg + np.abs(rng.normal(25, 8, samples)) + hr_std
+    spo2_avg = np.clip(np.where(respiratory, rng.normal(93, 2, samples), rng.normal(97.5, 1, samples)), 80, 100)
+    spo2_min = spo2_avg - np.abs(rng.normal(2, 1, samples)) - np.where(respiratory, np.abs(rng.normal(4, 2, samples)), 0)
+    temp_avg = rng.normal(36.7, 0.25, samples) + np.where(respiratory, np.abs(rng.normal(0.5, 0.3, samples)), 0)
+    temp_max = temp_avg + np.abs(rng.normal(0.4, 0.2, samples))
+    rr_avg = np.where(respiratory, rng.normal(22, 3, samples), rng.normal(15, 2, samples))
+    systolic = np.where(cardiac, rng.normal(145, 15, samples), rng.normal(118, 10, samples))
+    diastolic = np.where(cardiac, rng.normal(92, 8, samples), rng.normal(77, 7, samples))
+
+    X = np.column_stack([hr_avg, hr_std, hr_max, spo2_avg, spo2_min, temp_avg, temp_max, rr_avg, systolic, diastolic])
+    # Not every device reports every metric
+    X[rng.random(X.shape) < 0.1] = np.nan
+
+    Y = np.column_stack([cardiac, respiratory]).astype(float)
+    flip = rng.random(Y.shape) < 0.05
+    Y[flip] = 1 - Y[flip]
+    return X, Y
+
+def auc(labels: np.ndarray, scores: np.ndarray) -> float:
+    """Rank-based ROC AUC (Mann-Whitney U)"""
+    order = scores.argsort()
+    ranks = np.empty(len(scores))
+    ranks[order] = np.arange(1, len(scores) + 1)
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    return float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+def train(samples: int = 20000, seed: int = 42) -> Tuple[LogisticRiskModel, Dict[str, float]]:
+    X, Y = synthetic_cohort(samples, seed)
+    split = int(samples * 0.8)
+    model = LogisticRiskModel(FEATURES, TARGETS).fit(X[:split], Y[:split])
+
+    probabilities = model.predict_proba(X[split:])
+    metrics = {"samples": samples, "seed": seed}
+    for i, target in enumerate(TARGETS):
+        labels = Y[split:, i]
+        metrics[f"{target}_auc"] = round(auc(labels, probabilities[:, i]), 4)
+        metrics[f"{target}_accuracy"] = round(float(((probabilities[:, i] >= 0.5) == labels).mean()), 4)
+    return model, metrics
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and register the health risk model")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--registry", default=settings.MODEL_REGISTRY_DIR)
+    args = parser.parse_args(argv)
+
+    model, metrics = train(args.samples, args.seed)
+    version = ModelRegistry(args.registry).save(RiskModelCache.MODEL_NAME, model, metrics)
+    print(f"Registered {RiskModelCache.MODEL_NAME} version {version}: {metrics}")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.core.database import Base, engine
-from app.models import user, vitals, family, sos, otp, device, emergency_contact, ecg, notification
-
-# Create all tables
-Base.metadata.create_all(bind=engine)
+from starlette.concurrency import run_in_threadpool
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.database import engine, async_engine
+from app.core.password_hasher import password_hasher
+from app.models import user, vitals, family, sos, otp, device, emergency_contact, ecg, notification, alert_rule, analytics_snapshot
+from app.services.notifications import notification_dispatcher
 
 # Import routers
 from app.views import auth_router, home_router, health_router, family_router, otp_router, device_router, user_router, websocket_router, sos_router, ecg_router, notification_router, analytics_router
 
-app = FastAPI(title="Mekaaz Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes run through `python -m app.jobs.migrate`; this is only for local development
+    if settings.MIGRATE_ON_STARTUP:
+        from app.jobs.migrate import migrate
+        await run_in_threadpool(migrate)
+    yield
+    await run_in_threadpool(notification_dispatcher.close)
+    await run_in_threadpool(password_hasher.shutdown)
+    await async_engine.dispose()
+    engine.dispose()
+
+app = FastAPI(title="Mekaaz Backend", lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
 
 # Register routers
 app.include_router(auth_router.router)
@@ -30,4 +46,8 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/password-hasher")
+def password_hasher_metrics():
+    return password_hasher.metrics() 
@@ -0,0 +1,37 @@
+# file: app/models/alert_rule.py
+from sqlalchemy import Column, String, DateTime, Boolean, Float, Integer, ForeignKey
+from app.core.custom_types import GUID
+from app.core.database import Base
+import uuid
+from datetime import datetime
+
+class AlertRule(Base):
+    __tablename__ = "alert_rules"
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    metric = Column(String, nullable=False)
+    rule_type = Column(String, default="threshold")  # threshold, sustained, rate_of_change
+    operator = Column(String, default="gt")  # gt, gte, lt, lte
+    threshold = Column(Float, nullable=False)
+    duration_seconds = Column(Integer, default=0)  # hold time (sustained) or window (rate_of_change)
+    severity = Column(String, default="warning")
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "user_id": str(self.user_id),
+            "name": self.name,
+            "metric": self.metric,
+            "rule_type": self.rule_type,
+            "operator": self.operator,
+            "threshold": self.threshold,
+            "duration_seconds": self.duration_seconds,
+            "severity": self.severity,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,25 @@
+# file: app/models/analytics_snapshot.py
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON, Index
+from app.core.custom_types import GUID
+from app.core.database import Base
+from datetime import datetime
+
+class AnalyticsSnapshot(Base):
+    """Precomputed analytics for one user, written by the nightly batch job"""
+    __tablename__ = "analytics_snapshots"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    data = Column(JSON, nullable=False)  # section name -> endpoint payload
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_analytics_snapshots_user_computed", "user_id", "computed_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": str(self.user_id),
+            "data": self.data,
+            "computed_at": self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -1,5 +1,5 @@
 # file: app/models/device.py
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Integer, Float, Index
 from app.core.custom_types import GUID
 from app.core.database import Base
 import uuid
@@ -26,4 +26,32 @@ class Device(Base):
             "is_connected": self.is_connected,
             "last_connected": self.last_connected,
             "created_at": self.created_at
-        }
\ No newline at end of file
+        }
+
+class DeviceTelemetry(Base):
+    """Downsampled battery and signal history: one row per device per DEVICE_TELEMETRY_BUCKET_SECONDS"""
+    __tablename__ = "device_telemetry"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    device_id = Column(GUID(), ForeignKey("devices.id"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    sample_count = Column(Integer, default=0)
+    battery_min = Column(Integer)
+    battery_last = Column(Integer)
+    rssi_avg = Column(Float)
+    rssi_min = Column(Integer)
+    firmware_version = Column(String)
+
+    __table_args__ = (
+        Index("ix_device_telemetry_device_bucket", "device_id", "bucket_start"),
+    )
+
+    def to_dict(self):
+        return {
+            "bucket_start": self.bucket_start.isoformat() if self.bucket_start else None,
+            "sample_count": self.sample_count,
+            "battery_min": self.battery_min,
+            "battery_last": self.battery_last,
+            "rssi_avg": self.rssi_avg,
+            "rssi_min": self.rssi_min,
+            "firmware_version": self.firmware_version
+        }
@@ -1,5 +1,5 @@
 # file: app/models/ecg.py
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Integer
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Integer, LargeBinary
 from app.core.custom_types import GUID
 from app.core.database import Base
 import uuid
@@ -12,6 +12,10 @@ class ECG(Base):
     device_id = Column(GUID(), ForeignKey("devices.id"))
     recording_duration = Column(String, default="30_seconds")
     ecg_data = Column(Text)
+    # Samples stored column-wise as a (leads x samples) float32 matrix
+    ecg_samples = Column(LargeBinary)
+    lead_count = Column(Integer, default=1)
+    sample_count = Column(Integer, default=0)
     pdf_url = Column(String)
     status = Column(String, default="recording")
     recording_started_at = Column(DateTime, default=datetime.utcnow)
@@ -29,6 +33,8 @@ class ECG(Base):
             "device_id": str(self.device_id) if self.device_id else None,
             "recording_duration": self.recording_duration,
             "ecg_data": self.ecg_data,
+            "lead_count": self.lead_count,
+            "sample_count": self.sample_count,
             "pdf_url": self.pdf_url,
             "status": self.status,
             "recording_started_at": self.recording_started_at,
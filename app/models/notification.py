@@ -1,5 +1,5 @@
 # file: app/models/notification.py
-from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, Index
 from app.core.custom_types import GUID
 from app.core.database import Base
 import uuid
@@ -16,6 +16,15 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     read_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Health alerts: which vital rule fired and whose vitals it was about
+    alert_type = Column(String)
+    subject_user_id = Column(GUID())
+    value = Column(String)
+
+    __table_args__ = (
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+        Index("ix_notifications_user_type_created", "user_id", "notification_type", "created_at"),
+    )
 
     def to_dict(self):
         
@@ -28,5 +37,8 @@ class Notification(Base):
             "severity": self.severity,
             "is_read": self.is_read,
             "read_at": self.read_at.isoformat() if self.read_at else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "alert_type": self.alert_type,
+            "subject_user_id": str(self.subject_user_id) if self.subject_user_id else None,
+            "value": self.value
         }
\ No newline at end of file
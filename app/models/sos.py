@@ -45,6 +45,9 @@ class SOSNotification(Base):
     sent_at = Column(DateTime, default=datetime.utcnow)
     delivered = Column(Boolean, default=False)
     delivered_at = Column(DateTime)
+    delivery_status = Column(String, default="queued")  # "queued", "delivered", "failed"
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
     response_received = Column(Boolean, default=False)
     response_at = Column(DateTime)
 
@@ -58,6 +61,9 @@ class SOSNotification(Base):
             "sent_at": self.sent_at,
             "delivered": self.delivered,
             "delivered_at": self.delivered_at,
+            "delivery_status": self.delivery_status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
             "response_received": self.response_received,
             "response_at": self.response_at
         }
\ No newline at end of file
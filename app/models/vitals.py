@@ -1,5 +1,5 @@
 # file: app/models/vitals.py
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text, Boolean
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text, Boolean, Index
 from app.core.custom_types import GUID
 from app.core.database import Base
 import uuid
@@ -21,6 +21,10 @@ class Vital(Base):
     is_anomaly = Column(Boolean, default=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_vitals_user_timestamp", "user_id", "timestamp"),
+    )
+
     def to_dict(self):
         return {
             "id": str(self.id),
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, Literal
+
+Metric = Literal[
+    "heart_rate", "spo2", "temperature", "steps",
+    "blood_pressure_systolic", "blood_pressure_diastolic", "respiratory_rate"
+]
+
+class AlertRuleCreate(BaseModel):
+    name: str
+    metric: Metric
+    rule_type: Literal["threshold", "sustained", "rate_of_change"] = "threshold"
+    operator: Literal["gt", "gte", "lt", "lte"] = "gt"
+    threshold: float
+    duration_seconds: int = Field(0, ge=0)
+    severity: Literal["info", "warning", "critical"] = "warning"
+    is_active: bool = True
+
+    @model_validator(mode="after")
+    def _window_for_windowed_rules(self):
+        # sustained / rate_of_change compare against a window, so it must be non-empty
+        if self.rule_type != "threshold" and self.duration_seconds <= 0:
+            raise ValueError(f"{self.rule_type} rules need duration_seconds > 0")
+        return self
+
+class AlertRuleUpdate(BaseModel):
+    name: Optional[str] = None
+    metric: Optional[Metric] = None
+    rule_type: Optional[Literal["threshold", "sustained", "rate_of_change"]] = None
+    operator: Optional[Literal["gt", "gte", "lt", "lte"]] = None
+    threshold: Optional[float] = None
+    duration_seconds: Optional[int] = Field(None, ge=0)
+    severity: Optional[Literal["info", "warning", "critical"]] = None
+    is_active: Optional[bool] = None
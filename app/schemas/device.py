@@ -34,4 +34,14 @@ class AvailableDeviceResponse(BaseModel):
     is_available: bool
 
 class DeviceListResponse(BaseModel):
-    devices: List[DeviceResponse] 
\ No newline at end of file
+    devices: List[DeviceResponse] 
+
+class DeviceTelemetryStatus(BaseModel):
+    device_id: str
+    user_id: str
+    is_connected: bool
+    battery_level: Optional[int]
+    rssi: Optional[int]
+    signal_strength: Optional[int]
+    firmware_version: Optional[str]
+    reported_at: Optional[datetime]
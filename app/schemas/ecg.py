@@ -7,6 +7,8 @@ class ECGResponse(BaseModel):
     user_id: str
     device_id: Optional[str]
     recording_duration: str
+    lead_count: Optional[int] = None
+    sample_count: Optional[int] = None
     status: str
     recording_started_at: Optional[datetime]
     recording_completed_at: Optional[datetime]
@@ -52,4 +54,5 @@ class ECGAnalysisResponse(BaseModel):
     rhythm: str  # "normal", "irregular", "bradycardia", "tachycardia"
     abnormalities: List[str]
     confidence_score: float
+    leads: List[Dict[str, Any]] = []  # Per-lead results; the first lead drives the summary
     analysis_completed_at: datetime 
\ No newline at end of file
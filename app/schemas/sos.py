@@ -38,6 +38,9 @@ class SOSNotificationResponse(BaseModel):
     sent_at: datetime
     delivered: bool
     delivered_at: Optional[datetime]
+    delivery_status: Optional[str] = None
+    attempts: Optional[int] = None
+    last_error: Optional[str] = None
     response_received: bool
     response_at: Optional[datetime]
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict,Union,Any
 from datetime import datetime
 
@@ -17,7 +17,13 @@ class VitalResponse(BaseModel):
     is_anomaly: bool
     timestamp: datetime
 
-class VitalIngestRequest(BaseModel):
+class DeviceTelemetryReport(BaseModel):
+    """Optional device state sent along with readings"""
+    battery_level: Optional[int] = Field(None, ge=0, le=100)
+    rssi: Optional[int] = Field(None, ge=-127, le=0)
+    firmware_version: Optional[str] = Field(None, max_length=32)
+
+class VitalIngestRequest(DeviceTelemetryReport):
     device_id: str
     heart_rate: int
     spo2: Union[int, float]
@@ -27,6 +33,25 @@ class VitalIngestRequest(BaseModel):
     blood_pressure_diastolic: Optional[int] = None
     respiratory_rate: Optional[int] = None
 
+class VitalReading(BaseModel):
+    heart_rate: int
+    spo2: Union[int, float]
+    temperature: Optional[float] = None
+    steps: Optional[int] = None
+    blood_pressure_systolic: Optional[int] = None
+    blood_pressure_diastolic: Optional[int] = None
+    respiratory_rate: Optional[int] = None
+    timestamp: Optional[datetime] = None
+
+class VitalBatchIngestRequest(DeviceTelemetryReport):
+    device_id: str
+    readings: List[VitalReading]
+
+class VitalBatchIngestResponse(BaseModel):
+    ingested: int
+    anomaly_count: int
+    health_condition: str
+
 class VitalHistoryRequest(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
@@ -0,0 +1,212 @@
+import logging
+import operator
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import redis
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.alert_rule import AlertRule
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+OPERATOR_SYMBOLS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+class CompiledRule(NamedTuple):
+    id: str
+    name: str
+    metric: str
+    rule_type: str
+    check: Callable[[float], bool]
+    duration_seconds: int
+    severity: str
+    description: str
+
+class RuleSet(NamedTuple):
+    """A user's active rules, compiled once and reused for every reading"""
+    version: str
+    rules: Tuple[CompiledRule, ...]
+
+def compile_rule(rule: AlertRule) -> CompiledRule:
+    """Bind the rule's operator and threshold into a single-argument predicate.
+
+    For rate_of_change rules the predicate receives the change over the
+    window; "lt"/"lte" rules look for a drop of at least the threshold.
+    """
+    compare = OPERATORS[rule.operator]
+    threshold = rule.threshold
+    symbol = OPERATOR_SYMBOLS[rule.operator]
+
+    if rule.rule_type == "rate_of_change":
+        if rule.operator in ("lt", "lte"):
+            rising = OPERATORS["gt" if rule.operator == "lt" else "gte"]
+            check = lambda change: rising(-change, threshold)
+            description = f"{rule.metric} dropped by more than {threshold} within {rule.duration_seconds}s"
+        else:
+            check = lambda change: compare(change, threshold)
+            description = f"{rule.metric} rose by more than {threshold} within {rule.duration_seconds}s"
+    else:
+        check = lambda value: compare(value, threshold)
+        description = f"{rule.metric} {symbol} {threshold}"
+        if rule.rule_type == "sustained":
+            description += f" for {rule.duration_seconds}s"
+
+    return CompiledRule(
+        id=str(rule.id),
+        name=rule.name,
+        metric=rule.metric,
+        rule_type=rule.rule_type,
+        check=check,
+        duration_seconds=rule.duration_seconds or 0,
+        severity=rule.severity or "warning",
+        description=description
+    )
+
+class AlertRuleEngine:
+    """Evaluates per-user custom alert rules on ingest.
+
+    Compiled rule sets are cached in-process and tagged with a version counter
+    kept in Redis; editing a rule bumps the counter so every worker reloads on
+    its next reading. Sustained-condition start times and rate-of-change
+    sample windows live in Redis so any worker can evaluate any user.
+    """
+
+    STATE_TTL_SECONDS = 86400
+
+    def __init__(self):
+        self.local = TTLCache(settings.ALERT_RULE_CACHE_MAX_ENTRIES, settings.ALERT_RULE_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"alert_rules_version:{user_id}"
+
+    @staticmethod
+    def _state_key(user_id: str) -> str:
+        return f"alert_rule_state:{user_id}"
+
+    @staticmethod
+    def _window_key(user_id: str, metric: str) -> str:
+        return f"alert_rule_window:{user_id}:{metric}"
+
+    def load(self, db: Session, user_id: str, version: str) -> RuleSet:
+        rules = db.query(AlertRule).filter(
+            AlertRule.user_id == user_id,
+            AlertRule.is_active == True
+        ).all()
+        ruleset = RuleSet(version=version, rules=tuple(compile_rule(rule) for rule in rules))
+        self.local.set(user_id, ruleset)
+        return ruleset
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the compiled rules here and tell other workers to reload"""
+        self.local.delete(user_id)
+        try:
+            redis_service.redis_client.incr(self._version_key(user_id))
+        except redis.RedisError as e:
+            logger.warning("Alert rule version bump failed: %s", e)
+
+    def evaluate(self, db: Session, user_id: str, vital_data: Dict[str, Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Return alerts for every rule the reading triggers.
+
+        Normally one Redis round trip to read state plus one to write it back;
+        the database is only touched when the cached rule set is stale.
+        """
+        now = time.time() if now is None else now
+        ruleset = self.local.get(user_id)
+        try:
+            alerts, version = self._evaluate(user_id, ruleset, vital_data, now)
+            if ruleset is None or version != ruleset.version:
+                ruleset = self.load(db, user_id, version)
+                alerts, _ = self._evaluate(user_id, ruleset, vital_data, now)
+            return alerts
+        except redis.RedisError as e:
+            # Without shared state only plain thresholds can be judged
+            logger.warning("Alert rule state unavailable, evaluating thresholds only: %s", e)
+            if ruleset is None:
+                ruleset = self.load(db, user_id, "")
+            return [
+                self._alert(rule, vital_data[rule.metric])
+                for rule in ruleset.rules
+                if rule.rule_type == "threshold" and vital_data.get(rule.metric) is not None
+                and rule.check(vital_data[rule.metric])
+            ]
+
+    def _evaluate(self, user_id: str, ruleset: Optional[RuleSet], vital_data: Dict[str, Any], now: float):
+        rules = [r for r in ruleset.rules if vital_data.get(r.metric) is not None] if ruleset else []
+        client = redis_service.redis_client
+
+        read = client.pipeline()
+        read.get(self._version_key(user_id))
+        stateful = any(r.rule_type == "sustained" for r in rules)
+        if stateful:
+            read.hgetall(self._state_key(user_id))
+        windows = {}
+        for rule in rules:
+            if rule.rule_type == "rate_of_change":
+                windows[rule.metric] = max(windows.get(rule.metric, 0), rule.duration_seconds)
+        for metric, window in windows.items():
+            key = self._window_key(user_id, metric)
+            read.zadd(key, {f"{now}:{vital_data[metric]}": now})
+            read.zremrangebyscore(key, "-inf", now - window)
+            read.expire(key, window + 60)
+        rate_rules = [r for r in rules if r.rule_type == "rate_of_change"]
+        for rule in rate_rules:
+            read.zrangebyscore(self._window_key(user_id, rule.metric), now - rule.duration_seconds, "+inf", start=0, num=1)
+        results = read.execute()
+
+        version = results[0] or "0"
+        if ruleset is None or version != ruleset.version:
+            return [], version
+        state = results[1] if stateful else {}
+        oldest = results[-len(rate_rules):] if rate_rules else []
+
+        alerts = []
+        write = client.pipeline()
+        state_changed = False
+        for rule in rules:
+            value = vital_data[rule.metric]
+            if rule.rule_type == "threshold":
+                if rule.check(value):
+                    alerts.append(self._alert(rule, value))
+            elif rule.rule_type == "sustained":
+                if rule.check(value):
+                    since = float(state[rule.id]) if rule.id in state else now
+                    if rule.id not in state:
+                        write.hset(self._state_key(user_id), rule.id, now)
+                        state_changed = True
+                    if now - since >= rule.duration_seconds:
+                        alerts.append(self._alert(rule, value))
+                elif rule.id in state:
+                    write.hdel(self._state_key(user_id), rule.id)
+                    state_changed = True
+        for rule, members in zip(rate_rules, oldest):
+            if members:
+                start_value = float(members[0].split(":", 1)[1])
+                if rule.check(vital_data[rule.metric] - start_value):
+                    alerts.append(self._alert(rule, vital_data[rule.metric]))
+        if state_changed:
+            write.expire(self._state_key(user_id), self.STATE_TTL_SECONDS)
+            write.execute()
+
+        return alerts, version
+
+    @staticmethod
+    def _alert(rule: CompiledRule, value: Any) -> Dict[str, Any]:
+        return {
+            "type": f"custom:{rule.id}",
+            "title": rule.name,
+            "message": f"{rule.name}: {rule.description} (now {value})",
+            "value": str(value),
+            "severity": rule.severity
+        }
+
+# Global alert rule engine instance
+alert_rule_engine = AlertRuleEngine()
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import redis
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.family import FamilyMember
+from app.models.notification import Notification
+from app.models.user import User
+from app.services.alert_rules import alert_rule_engine
+from app.services.notifications import NotificationService
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Fallback cooldown tracking for when Redis is unreachable (per process only)
+_local_cooldowns = TTLCache(max_entries=10000, ttl_seconds=settings.ALERT_COOLDOWN_SECONDS)
+
+# Async ingest runs the (sync) alert pipeline here rather than in the shared AnyIO threadpool
+_alert_executor = ThreadPoolExecutor(max_workers=settings.ALERT_PIPELINE_WORKERS, thread_name_prefix="alerts")
+
+class AlertService:
+    """Turns an ingested vital into persisted, deduplicated health alerts"""
+
+    # Sessions for executor jobs, which run outside any request
+    session_factory = SessionLocal
+
+    # (metric, alert type, title, comparison, warning threshold, critical threshold, unit)
+    RULES = [
+        ("heart_rate", "heart_rate_high", "Elevated Heart Rate", "above", 100, 120, " bpm"),
+        ("heart_rate", "heart_rate_low", "Low Heart Rate", "below", 60, 50, " bpm"),
+        ("spo2", "spo2_low", "Low Oxygen Saturation", "below", 95, 90, "%"),
+        ("temperature", "temperature_high", "Elevated Temperature", "above", 37.5, 38.5, "°C"),
+    ]
+
+    @staticmethod
+    def evaluate(vital_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Match a reading against the alert rules; at most one alert per type"""
+        alerts = []
+        for metric, alert_type, title, comparison, warning, critical, unit in AlertService.RULES:
+            value = vital_data.get(metric)
+            if not value:
+                continue
+            if comparison == "above":
+                if value <= warning:
+                    continue
+                severity = "critical" if value > critical else "warning"
+            else:
+                if value >= warning:
+                    continue
+                severity = "critical" if value < critical else "warning"
+            # spo2 below normal has always been treated as critical
+            if alert_type == "spo2_low":
+                severity = "critical"
+            alerts.append({
+                "type": alert_type,
+                "title": title,
+                "message": f"{title}: {value}{unit}",
+                "value": f"{value}{unit}",
+                "severity": severity
+            })
+        return alerts
+
+    @staticmethod
+    def claim_cooldown(user_id: str, alert: Dict[str, Any]) -> bool:
+        """True if this alert is outside its cooldown window and should be raised.
+
+        Cooldowns are tracked per (user, alert type, severity), so a critical
+        reading still alerts while a warning for the same metric is cooling down.
+        """
+        ttl = settings.ALERT_CRITICAL_COOLDOWN_SECONDS if alert["severity"] == "critical" else settings.ALERT_COOLDOWN_SECONDS
+        alert_key = f"{alert['type']}:{alert['severity']}"
+        try:
+            return redis_service.claim_alert_cooldown(user_id, alert_key, ttl)
+        except redis.RedisError:
+            return _local_cooldowns.add((user_id, alert_key), True, ttl)
+
+    @staticmethod
+    def get_family_recipients(db: Session, user_id: str) -> List[str]:
+        """Active family members who should hear about this user's alerts"""
+        owner_ids = db.query(FamilyMember.owner_id).filter(
+            FamilyMember.member_id == user_id,
+            FamilyMember.is_active == True
+        )
+        rows = db.query(FamilyMember.member_id).filter(
+            FamilyMember.owner_id.in_(owner_ids),
+            FamilyMember.member_id != user_id,
+            FamilyMember.is_active == True
+        ).distinct().all()
+        return [str(row.member_id) for row in rows]
+
+    @staticmethod
+    async def process_vital_async(user_id: str, vital_data: Dict[str, Any], timestamp: datetime = None,
+                                  check_builtin: bool = True) -> List[Dict[str, Any]]:
+        """process_vital for async callers, on the alert executor with its own session"""
+        return await AlertService.process_vitals_async(user_id, [(vital_data, timestamp, check_builtin)])
+
+    @staticmethod
+    async def process_vitals_async(user_id: str, readings: List[Tuple[Dict[str, Any], datetime, bool]]) -> List[Dict[str, Any]]:
+        """process_vital over (vital_data, timestamp, check_builtin) readings in order, as one executor job"""
+        def run():
+            db = AlertService.session_factory()
+            try:
+                alerts = []
+                for vital_data, timestamp, check_builtin in readings:
+                    alerts += AlertService.process_vital(db, user_id, vital_data, timestamp, check_builtin)
+                return alerts
+            finally:
+                db.close()
+        return await asyncio.get_running_loop().run_in_executor(_alert_executor, run)
+
+    @staticmethod
+    def process_vital(db: Session, user_id: str, vital_data: Dict[str, Any], timestamp: datetime = None,
+                      check_builtin: bool = True) -> List[Dict[str, Any]]:
+        """Raise alerts for a reading: persist, push to sockets and queue push notifications
+
+        The user's custom rules are evaluated on every reading so sustained
+        and rate-of-change windows stay current; the built-in rules can be
+        skipped when the reading has already been judged normal.
+        """
+        candidates = AlertService.evaluate(vital_data) if check_builtin else []
+        candidates += alert_rule_engine.evaluate(db, user_id, vital_data)
+        alerts = [a for a in candidates if AlertService.claim_cooldown(user_id, a)]
+        if not alerts:
+            return []
+
+        timestamp = timestamp or datetime.utcnow()
+        user = db.query(User.name).filter(User.id == user_id).first()
+        user_name = user.name if user and user.name else "A family member"
+        recipients = [user_id] + AlertService.get_family_recipients(db, user_id)
+
+        notifications = []
+        for alert in alerts:
+            for recipient in recipients:
+                is_self = recipient == user_id
+                notifications.append(Notification(
+                    user_id=recipient,
+                    subject_user_id=user_id,
+                    title=alert["title"] if is_self else f"{user_name}: {alert['title']}",
+                    message=alert["message"],
+                    notification_type="health_alert",
+                    alert_type=alert["type"],
+                    severity=alert["severity"],
+                    value=alert["value"],
+                    is_read=False,
+                    created_at=timestamp
+                ))
+        db.add_all(notifications)
+        db.commit()
+
+        for notification in notifications:
+            payload = notification.to_dict()
+            try:
+                redis_service.publish_alert(payload["user_id"], payload)
+            except redis.RedisError as e:
+                logger.warning("Alert socket publish failed: %s", e)
+            NotificationService.send_notification(
+                payload["user_id"],
+                payload["message"],
+                title=payload["title"],
+                data={"notification_id": payload["id"], "alert_type": payload["alert_type"]}
+            )
+
+        return [dict(alert, timestamp=timestamp.isoformat()) for alert in alerts]
@@ -0,0 +1,159 @@
+import logging
+import math
+from typing import Any, Dict, List, NamedTuple, Optional
+import redis
+from app.core.config import settings
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Fold one reading per metric into the user's baseline and return the state it
+# replaced, so the caller scores the reading against history that excludes it.
+# Per metric the hash holds n, EWMA mean/variance and Welford mean/M2.
+# Values are returned as strings because Redis truncates Lua numbers to integers.
+UPDATE_BASELINE_SCRIPT = """
+local alpha = tonumber(ARGV[1])
+local result = {}
+for i = 3, #ARGV, 2 do
+    local metric = ARGV[i]
+    local x = tonumber(ARGV[i + 1])
+    local state = redis.call('HMGET', KEYS[1], metric .. ':n', metric .. ':ewma', metric .. ':ewvar', metric .. ':mean', metric .. ':m2')
+    local n = tonumber(state[1]) or 0
+    local ewma = tonumber(state[2]) or x
+    local ewvar = tonumber(state[3]) or 0
+    local mean = tonumber(state[4]) or 0
+    local m2 = tonumber(state[5]) or 0
+    table.insert(result, tostring(n))
+    table.insert(result, tostring(ewma))
+    table.insert(result, tostring(ewvar))
+
+    local diff = x - ewma
+    local incr = alpha * diff
+    ewma = ewma + incr
+    ewvar = (1 - alpha) * (ewvar + diff * incr)
+    n = n + 1
+    local delta = x - mean
+    mean = mean + delta / n
+    m2 = m2 + delta * (x - mean)
+    redis.call('HSET', KEYS[1],
+        metric .. ':n', n, metric .. ':ewma', tostring(ewma), metric .. ':ewvar', tostring(ewvar),
+        metric .. ':mean', tostring(mean), metric .. ':m2', tostring(m2))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return result
+"""
+
+class MetricBaseline(NamedTuple):
+    count: int
+    ewma_mean: float
+    ewma_std: float
+    mean: float
+    variance: Optional[float]  # Welford sample variance; None until two readings
+
+class BaselineScore(NamedTuple):
+    metric: str
+    value: float
+    z_score: Optional[float]  # None while the baseline is still warming up
+    is_anomaly: bool
+
+class BaselineDetector:
+    """Scores readings against each user's own rolling baseline.
+
+    Every update is a single atomic script call, so concurrent workers never
+    lose readings and no vital history is ever scanned.
+    """
+
+    METRICS = ("heart_rate", "spo2", "temperature", "respiratory_rate",
+               "blood_pressure_systolic", "blood_pressure_diastolic")
+    # Lower bound on the spread so a very steady baseline does not flag noise
+    MIN_STD = {
+        "heart_rate": 2.0,
+        "spo2": 0.5,
+        "temperature": 0.1,
+        "respiratory_rate": 1.0,
+        "blood_pressure_systolic": 3.0,
+        "blood_pressure_diastolic": 2.0,
+    }
+
+    def __init__(self):
+        self._update = redis_service.redis_client.register_script(UPDATE_BASELINE_SCRIPT)
+        self._update_async = None
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"baseline:{user_id}"
+
+    def _prepare(self, vital_data: Dict[str, Any]):
+        # 0 means "not measured" here as in the analyzer and health score; folding it in would skew the baseline
+        readings = [(m, float(vital_data[m])) for m in self.METRICS if vital_data.get(m)]
+        args = [settings.BASELINE_ALPHA, settings.BASELINE_TTL_SECONDS]
+        for metric, value in readings:
+            args += [metric, value]
+        return readings, args
+
+    def score(self, user_id: str, vital_data: Dict[str, Any]) -> List[BaselineScore]:
+        """Score a reading against the user's baseline, then fold it in"""
+        readings, args = self._prepare(vital_data)
+        if not readings:
+            return []
+        state = self._update(keys=[self._key(user_id)], args=args, client=redis_service.redis_client)
+        return self._scores(readings, state)
+
+    async def score_async(self, user_id: str, vital_data: Dict[str, Any]) -> List[BaselineScore]:
+        readings, args = self._prepare(vital_data)
+        if not readings:
+            return []
+        client = redis_service.async_client
+        if self._update_async is None:
+            self._update_async = client.register_script(UPDATE_BASELINE_SCRIPT)
+        state = await self._update_async(keys=[self._key(user_id)], args=args, client=client)
+        return self._scores(readings, state)
+
+    async def score_many_async(self, user_id: str, readings: List[Dict[str, Any]]) -> List[List[BaselineScore]]:
+        """score_async for a batch of readings, oldest first, in one pipelined round trip"""
+        prepared = [self._prepare(vital_data) for vital_data in readings]
+        client = redis_service.async_client
+        if self._update_async is None:
+            self._update_async = client.register_script(UPDATE_BASELINE_SCRIPT)
+        async with client.pipeline(transaction=False) as pipe:
+            for metrics, args in prepared:
+                if metrics:
+                    await self._update_async(keys=[self._key(user_id)], args=args, client=pipe)
+            states = iter(await pipe.execute())
+        return [self._scores(metrics, next(states)) if metrics else [] for metrics, _ in prepared]
+
+    def _scores(self, readings, state) -> List[BaselineScore]:
+        scores = []
+        for i, (metric, value) in enumerate(readings):
+            count, ewma, ewvar = int(state[3 * i]), float(state[3 * i + 1]), float(state[3 * i + 2])
+            if count < settings.BASELINE_WARMUP_READINGS:
+                scores.append(BaselineScore(metric, value, None, False))
+                continue
+            std = max(math.sqrt(max(ewvar, 0.0)), self.MIN_STD[metric])
+            z_score = (value - ewma) / std
+            scores.append(BaselineScore(metric, value, round(z_score, 2), abs(z_score) > settings.BASELINE_Z_THRESHOLD))
+        return scores
+
+    def get_baseline(self, user_id: str) -> Dict[str, MetricBaseline]:
+        """Current baseline per metric, for analytics endpoints"""
+        data = redis_service.redis_client.hgetall(self._key(user_id))
+        baselines = {}
+        for metric in self.METRICS:
+            count = int(data.get(f"{metric}:n", 0))
+            if not count:
+                continue
+            m2 = float(data[f"{metric}:m2"])
+            baselines[metric] = MetricBaseline(
+                count=count,
+                ewma_mean=float(data[f"{metric}:ewma"]),
+                ewma_std=math.sqrt(max(float(data[f"{metric}:ewvar"]), 0.0)),
+                mean=float(data[f"{metric}:mean"]),
+                variance=m2 / (count - 1) if count > 1 else None
+            )
+        return baselines
+
+    def reset(self, user_id: str) -> None:
+        redis_service.redis_client.delete(self._key(user_id))
+
+# Global baseline detector instance
+baseline_detector = BaselineDetector()
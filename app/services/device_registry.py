@@ -0,0 +1,310 @@
+import json
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+import redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.device import Device
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Cache an entry read from the database only if the device's version still
+# matches the one read before the query; invalidate() bumps it after every
+# change, so a read that raced a change can never overwrite the invalidation
+STORE_ENTRY_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+class DeviceEntry(NamedTuple):
+    """What ingest needs to know about a device, keyed by its hardware device_id"""
+    pk: str
+    user_id: str
+    is_connected: bool
+
+    def accepts(self, user_id: str) -> bool:
+        return self.is_connected and self.user_id == str(user_id)
+
+class DeviceRegistry:
+    """device_id -> DeviceEntry, cached in-process and in Redis
+
+    Ownership and connection state only change through DeviceController,
+    which invalidates the entry after committing. A load that read the
+    database before an invalidation is not cached: the local tier checks a
+    count of this worker's invalidations and Redis a per-device version.
+    Other workers can serve a stale local entry for at most
+    DEVICE_REGISTRY_LOCAL_TTL_SECONDS. Lookups that would reject a device are
+    confirmed against the database, so a stale entry can never turn away a
+    device that was just connected.
+    """
+
+    def __init__(self):
+        self.local = TTLCache(settings.DEVICE_REGISTRY_MAX_ENTRIES, settings.DEVICE_REGISTRY_LOCAL_TTL_SECONDS)
+        self.ttl_seconds = settings.DEVICE_REGISTRY_TTL_SECONDS
+        self.use_redis = settings.DEVICE_REGISTRY_USE_REDIS
+        self.invalidations = 0
+        self._store_entry = redis_service.redis_client.register_script(STORE_ENTRY_SCRIPT)
+        self._store_entry_async = None
+
+    @staticmethod
+    def _key(device_id: str) -> str:
+        return f"device_registry:{device_id}"
+
+    @staticmethod
+    def _version_key(device_id: str) -> str:
+        return f"device_registry_version:{device_id}"
+
+    @staticmethod
+    def _entry(row) -> Optional[DeviceEntry]:
+        if row is None:
+            return None
+        return DeviceEntry(pk=str(row.id), user_id=str(row.user_id), is_connected=bool(row.is_connected))
+
+    @staticmethod
+    def _query(device_id: str):
+        return select(Device.id, Device.user_id, Device.is_connected).where(Device.device_id == device_id)
+
+    def get(self, device_id: str) -> Optional[DeviceEntry]:
+        """Look up a device in the local tier, then Redis"""
+        entry = self.local.get(device_id)
+        if entry is not None or not self.use_redis:
+            return entry
+        try:
+            data = redis_service.redis_client.get(self._key(device_id))
+        except redis.RedisError as e:
+            logger.warning("Device registry Redis read failed: %s", e)
+            return None
+        if not data:
+            return None
+
+        entry = DeviceEntry(*json.loads(data))
+        self.local.set(device_id, entry)
+        return entry
+
+    async def get_async(self, device_id: str) -> Optional[DeviceEntry]:
+        entry = self.local.get(device_id)
+        if entry is not None or not self.use_redis:
+            return entry
+        try:
+            data = await redis_service.async_client.get(self._key(device_id))
+        except redis.RedisError as e:
+            logger.warning("Device registry Redis read failed: %s", e)
+            return None
+        if not data:
+            return None
+
+        entry = DeviceEntry(*json.loads(data))
+        self.local.set(device_id, entry)
+        return entry
+
+    def version(self, device_id: str) -> Optional[str]:
+        """The device's Redis version ("" before its first invalidation), or None if Redis is unavailable"""
+        if not self.use_redis:
+            return None
+        try:
+            return redis_service.redis_client.get(self._version_key(device_id)) or ""
+        except redis.RedisError as e:
+            logger.warning("Device registry Redis read failed: %s", e)
+            return None
+
+    async def version_async(self, device_id: str) -> Optional[str]:
+        return (await self.versions_async([device_id]))[0]
+
+    async def versions_async(self, device_ids: Sequence[str]) -> List[Optional[str]]:
+        """version() for several devices in one MGET"""
+        if not self.use_redis:
+            return [None] * len(device_ids)
+        try:
+            values = await redis_service.async_client.mget([self._version_key(device_id) for device_id in device_ids])
+        except redis.RedisError as e:
+            logger.warning("Device registry Redis read failed: %s", e)
+            return [None] * len(device_ids)
+        return [value or "" for value in values]
+
+    async def get_many_async(self, device_ids: Sequence[str]) -> Dict[str, DeviceEntry]:
+        """get() for several devices, with one MGET for the local misses; unknown IDs are left out"""
+        entries, missing = {}, []
+        for device_id in device_ids:
+            entry = self.local.get(device_id)
+            if entry is not None:
+                entries[device_id] = entry
+            else:
+                missing.append(device_id)
+        if not missing or not self.use_redis:
+            return entries
+        try:
+            values = await redis_service.async_client.mget([self._key(device_id) for device_id in missing])
+        except redis.RedisError as e:
+            logger.warning("Device registry Redis read failed: %s", e)
+            return entries
+        for device_id, data in zip(missing, values):
+            if data:
+                entries[device_id] = DeviceEntry(*json.loads(data))
+                self.local.set(device_id, entries[device_id])
+        return entries
+
+    def store(self, device_id: str, entry: DeviceEntry, invalidations: int, version: Optional[str]) -> DeviceEntry:
+        """Cache an entry read from the database, unless the device was invalidated since
+
+        invalidations and version are self.invalidations and version() as
+        they were before the read.
+        """
+        if invalidations == self.invalidations:
+            self.local.set(device_id, entry)
+        if version is not None:
+            try:
+                self._store_entry(keys=[self._key(device_id), self._version_key(device_id)],
+                                  args=[version, json.dumps(entry), self.ttl_seconds], client=redis_service.redis_client)
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis write failed: %s", e)
+        return entry
+
+    async def store_async(self, device_id: str, entry: DeviceEntry, invalidations: int,
+                          version: Optional[str]) -> DeviceEntry:
+        if invalidations == self.invalidations:
+            self.local.set(device_id, entry)
+        if version is not None:
+            client = redis_service.async_client
+            if self._store_entry_async is None:
+                self._store_entry_async = client.register_script(STORE_ENTRY_SCRIPT)
+            try:
+                await self._store_entry_async(keys=[self._key(device_id), self._version_key(device_id)],
+                                              args=[version, json.dumps(entry), self.ttl_seconds], client=client)
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis write failed: %s", e)
+        return entry
+
+    def invalidate(self, device_id: str) -> None:
+        """Drop a device from both tiers; call after committing its creation, re-owning or (dis)connection"""
+        self.invalidations += 1
+        self.local.delete(device_id)
+        if self.use_redis:
+            try:
+                with redis_service.redis_client.pipeline() as pipe:
+                    pipe.delete(self._key(device_id))
+                    pipe.incr(self._version_key(device_id))
+                    pipe.expire(self._version_key(device_id), self.ttl_seconds)
+                    pipe.execute()
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis invalidation failed: %s", e)
+
+    async def invalidate_async(self, device_id: str) -> None:
+        self.invalidations += 1
+        self.local.delete(device_id)
+        if self.use_redis:
+            try:
+                async with redis_service.async_client.pipeline() as pipe:
+                    pipe.delete(self._key(device_id))
+                    pipe.incr(self._version_key(device_id))
+                    pipe.expire(self._version_key(device_id), self.ttl_seconds)
+                    await pipe.execute()
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis invalidation failed: %s", e)
+
+    def forget(self, device_id: str) -> None:
+        """Drop a device that is no longer in the database from both tiers"""
+        self.local.delete(device_id)
+        if self.use_redis:
+            try:
+                redis_service.redis_client.delete(self._key(device_id))
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis invalidation failed: %s", e)
+
+    async def forget_async(self, device_id: str) -> None:
+        self.local.delete(device_id)
+        if self.use_redis:
+            try:
+                await redis_service.async_client.delete(self._key(device_id))
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis invalidation failed: %s", e)
+
+    def load(self, db: Session, device_id: str) -> Optional[DeviceEntry]:
+        """Read a device from the database and cache it; None if it does not exist"""
+        invalidations, version = self.invalidations, self.version(device_id)
+        entry = self._entry(db.execute(self._query(device_id)).first())
+        if entry is None:
+            self.forget(device_id)
+            return None
+        return self.store(device_id, entry, invalidations, version)
+
+    async def load_async(self, db: AsyncSession, device_id: str) -> Optional[DeviceEntry]:
+        invalidations, version = self.invalidations, await self.version_async(device_id)
+        entry = self._entry((await db.execute(self._query(device_id))).first())
+        if entry is None:
+            await self.forget_async(device_id)
+            return None
+        return await self.store_async(device_id, entry, invalidations, version)
+
+    async def load_many_async(self, db: AsyncSession, device_ids: Sequence[str]) -> Dict[str, Optional[DeviceEntry]]:
+        """load() for several devices with one query and one pipelined Redis write"""
+        invalidations, versions = self.invalidations, await self.versions_async(device_ids)
+        rows = (await db.execute(select(Device.device_id, Device.id, Device.user_id, Device.is_connected)
+                                 .where(Device.device_id.in_(device_ids)))).all()
+        found = {row.device_id: self._entry(row) for row in rows}
+
+        for device_id in device_ids:
+            if device_id not in found:
+                self.local.delete(device_id)
+            elif invalidations == self.invalidations:
+                self.local.set(device_id, found[device_id])
+        if any(version is not None for version in versions):
+            client = redis_service.async_client
+            if self._store_entry_async is None:
+                self._store_entry_async = client.register_script(STORE_ENTRY_SCRIPT)
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for device_id, version in zip(device_ids, versions):
+                        if device_id not in found:
+                            pipe.delete(self._key(device_id))
+                        elif version is not None:
+                            await self._store_entry_async(
+                                keys=[self._key(device_id), self._version_key(device_id)],
+                                args=[version, json.dumps(found[device_id]), self.ttl_seconds], client=pipe)
+                    await pipe.execute()
+            except redis.RedisError as e:
+                logger.warning("Device registry Redis write failed: %s", e)
+        return {device_id: found.get(device_id) for device_id in device_ids}
+
+    def lookup(self, db: Session, device_id: str, accept: Callable[[DeviceEntry], bool] = None) -> Optional[DeviceEntry]:
+        """Cached entry for a device, read from the database on a miss
+
+        A cached entry that accept() rejects is re-read before being returned.
+        """
+        entry = self.get(device_id)
+        if entry is None or (accept is not None and not accept(entry)):
+            entry = self.load(db, device_id)
+        return entry
+
+    async def lookup_async(self, db: AsyncSession, device_id: str,
+                           accept: Callable[[DeviceEntry], bool] = None) -> Optional[DeviceEntry]:
+        entry = await self.get_async(device_id)
+        if entry is None or (accept is not None and not accept(entry)):
+            entry = await self.load_async(db, device_id)
+        return entry
+
+    async def lookup_many_async(self, db: AsyncSession, device_ids: Sequence[str]) -> Dict[str, Optional[DeviceEntry]]:
+        """lookup() for several devices; the misses are read with one query"""
+        entries = await self.get_many_async(device_ids)
+        misses = [device_id for device_id in device_ids if device_id not in entries]
+        if misses:
+            entries.update(await self.load_many_async(db, misses))
+        return {device_id: entries.get(device_id) for device_id in device_ids}
+
+    def connected_pk(self, db: Session, user_id: str, device_id: str) -> Optional[str]:
+        """Internal ID of the user's connected device, or None"""
+        entry = self.lookup(db, device_id, lambda entry: entry.accepts(user_id))
+        return entry.pk if entry is not None and entry.accepts(user_id) else None
+
+    async def connected_pk_async(self, db: AsyncSession, user_id: str, device_id: str) -> Optional[str]:
+        entry = await self.lookup_async(db, device_id, lambda entry: entry.accepts(user_id))
+        return entry.pk if entry is not None and entry.accepts(user_id) else None
+
+# Global device registry instance
+device_registry = DeviceRegistry()
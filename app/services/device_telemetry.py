@@ -0,0 +1,211 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+import redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.device import DeviceTelemetry
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Device state a reading may carry next to its vitals
+TELEMETRY_FIELDS = ("battery_level", "rssi", "firmware_version")
+
+# Update the latest-state hash, push "time|battery|rssi" onto the ring and fold
+# the sample into the open bucket. A sample from a later bucket closes the open
+# one, whose fields are returned so the caller can write its history row.
+RECORD_TELEMETRY_SCRIPT = """
+local now, bucket, battery, rssi, firmware = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local state = {'reported_at', now}
+for _, pair in ipairs({{'battery_level', battery}, {'rssi', rssi}, {'firmware_version', firmware}}) do
+    if pair[2] ~= '' then
+        table.insert(state, pair[1])
+        table.insert(state, pair[2])
+    end
+end
+redis.call('HSET', KEYS[1], unpack(state))
+redis.call('LPUSH', KEYS[2], now .. '|' .. battery .. '|' .. rssi)
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[6]) - 1)
+
+local closed = {}
+local open = redis.call('HGET', KEYS[3], 'bucket')
+if open and tonumber(open) < tonumber(bucket) then
+    closed = redis.call('HGETALL', KEYS[3])
+    redis.call('DEL', KEYS[3])
+end
+local function lower(field, value)
+    local current = redis.call('HGET', KEYS[3], field)
+    if not current or tonumber(value) < tonumber(current) then
+        redis.call('HSET', KEYS[3], field, value)
+    end
+end
+redis.call('HSETNX', KEYS[3], 'bucket', bucket)
+redis.call('HINCRBY', KEYS[3], 'samples', 1)
+if battery ~= '' then
+    lower('battery_min', battery)
+    redis.call('HSET', KEYS[3], 'battery_last', battery)
+end
+if rssi ~= '' then
+    lower('rssi_min', rssi)
+    redis.call('HINCRBY', KEYS[3], 'rssi_sum', rssi)
+    redis.call('HINCRBY', KEYS[3], 'rssi_n', 1)
+end
+if firmware ~= '' then
+    redis.call('HSET', KEYS[3], 'firmware_version', firmware)
+end
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[7])
+end
+return closed
+"""
+
+def _int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value not in (None, "") else None
+
+class DeviceTelemetryService:
+    """Battery, signal strength and firmware as reported by devices on ingest.
+
+    Redis keeps each device's latest state and a ring of its last
+    DEVICE_TELEMETRY_RING_SIZE samples, keyed by the hardware device_id.
+    Samples are also folded into a per-device bucket of
+    DEVICE_TELEMETRY_BUCKET_SECONDS; the first sample of the next bucket
+    closes it into a DeviceTelemetry row, so history costs one insert per
+    device per bucket rather than one per reading.
+    """
+
+    def __init__(self):
+        self._record = redis_service.redis_client.register_script(RECORD_TELEMETRY_SCRIPT)
+        self._record_async = None
+
+    @staticmethod
+    def _keys(device_id: str) -> List[str]:
+        return [f"device_telemetry:{device_id}", f"device_telemetry_ring:{device_id}",
+                f"device_telemetry_bucket:{device_id}"]
+
+    @staticmethod
+    def reported(data: Dict[str, Any]) -> bool:
+        return any(data.get(field) is not None for field in TELEMETRY_FIELDS)
+
+    @staticmethod
+    def _record_args(telemetry: Dict[str, Any], now: float) -> List[Any]:
+        bucket_seconds = settings.DEVICE_TELEMETRY_BUCKET_SECONDS
+        values = ["" if telemetry.get(field) is None else telemetry[field] for field in TELEMETRY_FIELDS]
+        return [int(now), int(now) // bucket_seconds * bucket_seconds, *values,
+                settings.DEVICE_TELEMETRY_RING_SIZE, settings.DEVICE_TELEMETRY_TTL_SECONDS]
+
+    @staticmethod
+    def _closed_row(device_pk, closed: Sequence[str]) -> Optional[DeviceTelemetry]:
+        """The history row for a bucket the script closed, if any"""
+        if not closed:
+            return None
+        data = dict(zip(closed[::2], closed[1::2]))
+        rssi_n = _int(data.get("rssi_n"))
+        return DeviceTelemetry(
+            device_id=str(device_pk),
+            bucket_start=datetime.utcfromtimestamp(int(data["bucket"])),
+            sample_count=_int(data.get("samples")),
+            battery_min=_int(data.get("battery_min")),
+            battery_last=_int(data.get("battery_last")),
+            rssi_avg=round(int(data["rssi_sum"]) / rssi_n, 1) if rssi_n else None,
+            rssi_min=_int(data.get("rssi_min")),
+            firmware_version=data.get("firmware_version")
+        )
+
+    def record(self, db: Session, device_pk, device_id: str, telemetry: Dict[str, Any], now: float = None) -> None:
+        """Store the state reported with a reading
+
+        A history row for a bucket this closes is added to db and goes out
+        with the caller's commit.
+        """
+        if not self.reported(telemetry):
+            return
+        try:
+            closed = self._record(keys=self._keys(device_id), args=self._record_args(telemetry, now or time.time()),
+                                  client=redis_service.redis_client)
+        except redis.RedisError as e:
+            logger.warning("Device telemetry skipped: %s", e)
+            return
+        row = self._closed_row(device_pk, closed)
+        if row is not None:
+            db.add(row)
+
+    async def record_async(self, db: AsyncSession, device_pk, device_id: str, telemetry: Dict[str, Any],
+                           now: float = None) -> None:
+        if not self.reported(telemetry):
+            return
+        client = redis_service.async_client
+        if self._record_async is None:
+            self._record_async = client.register_script(RECORD_TELEMETRY_SCRIPT)
+        try:
+            closed = await self._record_async(keys=self._keys(device_id),
+                                              args=self._record_args(telemetry, now or time.time()), client=client)
+        except redis.RedisError as e:
+            logger.warning("Device telemetry skipped: %s", e)
+            return
+        row = self._closed_row(device_pk, closed)
+        if row is not None:
+            db.add(row)
+
+    @staticmethod
+    def _state(data: Dict[str, str]) -> Dict[str, Any]:
+        reported_at = _int(data.get("reported_at"))
+        return {
+            "battery_level": _int(data.get("battery_level")),
+            "rssi": _int(data.get("rssi")),
+            "firmware_version": data.get("firmware_version"),
+            "reported_at": datetime.utcfromtimestamp(reported_at).isoformat() if reported_at else None
+        }
+
+    def get_state(self, device_id: str) -> Dict[str, Any]:
+        """Latest reported state; fields are None until the device reports them"""
+        try:
+            data = redis_service.redis_client.hgetall(self._keys(device_id)[0])
+        except redis.RedisError as e:
+            logger.warning("Device telemetry unavailable: %s", e)
+            data = {}
+        return self._state(data)
+
+    async def get_states_async(self, device_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """get_state for several devices in one pipelined round trip"""
+        try:
+            async with redis_service.async_client.pipeline(transaction=False) as pipe:
+                for device_id in device_ids:
+                    pipe.hgetall(self._keys(device_id)[0])
+                results = await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Device telemetry unavailable: %s", e)
+            results = [{} for _ in device_ids]
+        return [self._state(data) for data in results]
+
+    def get_recent(self, device_id: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Samples from the ring, newest first"""
+        try:
+            entries = redis_service.redis_client.lrange(self._keys(device_id)[1], 0, (limit or 0) - 1)
+        except redis.RedisError as e:
+            logger.warning("Device telemetry unavailable: %s", e)
+            return []
+        samples = []
+        for entry in entries:
+            reported_at, battery, rssi = entry.split("|")
+            samples.append({
+                "reported_at": datetime.utcfromtimestamp(int(reported_at)).isoformat(),
+                "battery_level": _int(battery),
+                "rssi": _int(rssi)
+            })
+        return samples
+
+    @staticmethod
+    def get_history(db: Session, device_pk, hours: int) -> List[Dict[str, Any]]:
+        """Downsampled rows for the last `hours`, oldest first"""
+        rows = db.execute(select(DeviceTelemetry).where(
+            DeviceTelemetry.device_id == device_pk,
+            DeviceTelemetry.bucket_start >= datetime.utcnow() - timedelta(hours=hours)
+        ).order_by(DeviceTelemetry.bucket_start)).scalars()
+        return [row.to_dict() for row in rows]
+
+# Global device telemetry instance
+device_telemetry = DeviceTelemetryService()
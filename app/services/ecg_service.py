@@ -2,21 +2,102 @@ import json
 import os
 import tempfile
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
-import matplotlib.pyplot as plt
+from typing import Dict, Any, Optional, List, Tuple
 import numpy as np
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import io
-import base64
 
 class ECGService:
+    # Samples are kept as little-endian float32, one contiguous row per lead
+    SAMPLE_DTYPE = np.dtype("<f4")
+    DEFAULT_SAMPLING_RATE = 500
+    WAVEFORM_PREVIEW_SAMPLES = 1000
+
+    @staticmethod
+    def to_lead_matrix(ecg_data: Dict[str, Any]) -> np.ndarray:
+        """Convert a device payload into a (leads x samples) float32 matrix
+
+        Accepts a flat single-lead ``readings`` list, a list of per-lead lists
+        under ``leads`` (or ``readings``), or a ``{lead_name: samples}`` dict.
+        """
+        leads = ecg_data.get('leads')
+        if leads is None:
+            leads = ecg_data.get('readings', [])
+        if isinstance(leads, dict):
+            leads = list(leads.values())
+        if not isinstance(leads, (list, tuple)):
+            raise ValueError("samples must be a list")
+        if not leads:
+            return np.empty((0, 0), dtype=ECGService.SAMPLE_DTYPE)
+        if not isinstance(leads[0], (list, tuple)):
+            leads = [leads]
+        elif not all(isinstance(lead, (list, tuple)) for lead in leads):
+            raise ValueError("every lead must be a list of samples")
+
+        try:
+            matrix = np.asarray(leads, dtype=ECGService.SAMPLE_DTYPE)
+        except (TypeError, ValueError):
+            # Ragged or mixed payloads: keep numeric samples, align on the shortest lead
+            rows = [
+                np.fromiter((r for r in lead if isinstance(r, (int, float))), dtype=ECGService.SAMPLE_DTYPE)
+                for lead in leads
+            ]
+            length = min(len(row) for row in rows)
+            matrix = np.stack([row[:length] for row in rows])
+
+        # Drop sample columns where any lead has a missing or non-finite value
+        finite = np.isfinite(matrix).all(axis=0)
+        if not finite.all():
+            matrix = matrix[:, finite]
+        return np.ascontiguousarray(matrix)
+
+    @staticmethod
+    def lead_names(ecg_data: Dict[str, Any], lead_count: int) -> List[str]:
+        """Return lead labels from the payload, defaulting to Lead 1..N"""
+        names = ecg_data.get('lead_names')
+        if not names and isinstance(ecg_data.get('leads'), dict):
+            names = list(ecg_data['leads'].keys())
+        if not names or len(names) != lead_count:
+            names = [f"Lead {i + 1}" for i in range(lead_count)]
+        return [str(name) for name in names]
+
+    @staticmethod
+    def split_samples(ecg_data: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Split a payload into its sample matrix and the remaining metadata"""
+        matrix = ECGService.to_lead_matrix(ecg_data)
+        metadata = {k: v for k, v in ecg_data.items() if k not in ('readings', 'leads')}
+        metadata['lead_names'] = ECGService.lead_names(ecg_data, matrix.shape[0])
+        return matrix, metadata
+
+    @staticmethod
+    def pack_leads(matrix: np.ndarray) -> bytes:
+        """Serialize a lead matrix into its compact binary form"""
+        return np.ascontiguousarray(matrix, dtype=ECGService.SAMPLE_DTYPE).tobytes()
+
+    @staticmethod
+    def unpack_leads(blob: bytes, lead_count: int) -> np.ndarray:
+        """Load a packed lead matrix without copying the sample buffer"""
+        if not blob or not lead_count:
+            return np.empty((0, 0), dtype=ECGService.SAMPLE_DTYPE)
+        return np.frombuffer(blob, dtype=ECGService.SAMPLE_DTYPE).reshape(lead_count, -1)
+
     @staticmethod
-    def generate_ecg_pdf(ecg_data: Dict[str, Any], user_info: Dict[str, Any]) -> bytes:
+    def generate_ecg_pdf(ecg_data: Dict[str, Any], user_info: Dict[str, Any],
+                         leads: Optional[np.ndarray] = None,
+                         sampling_rate: int = DEFAULT_SAMPLING_RATE) -> bytes:
         """Generate PDF report from ECG data"""
+        # The rendering stack is heavy to import, so load it on the first report rather than at boot
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib import colors
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+        if leads is None:
+            leads = ECGService.to_lead_matrix(ecg_data)
+        names = ECGService.lead_names(ecg_data, leads.shape[0])
+        sample_count = leads.shape[1] if leads.ndim == 2 else 0
         
         # Create PDF in memory
         buffer = io.BytesIO()
@@ -36,11 +117,13 @@ class ECGService:
         story.append(Spacer(1, 20))
         
         # Patient Information
+        duration = f"{sample_count / sampling_rate:.1f} seconds" if sample_count else "30 seconds"
         story.append(Paragraph("Patient Information", styles['Heading2']))
         patient_info = [
             ["Name:", user_info.get('name', 'N/A')],
             ["Date:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            ["Recording Duration:", "30 seconds"],
+            ["Recording Duration:", duration],
+            ["Leads:", str(leads.shape[0])],
             ["Device ID:", user_info.get('device_id', 'N/A')]
         ]
         
@@ -61,64 +144,60 @@ class ECGService:
         # ECG Analysis Results
         story.append(Paragraph("ECG Analysis", styles['Heading2']))
         
-        # Extract ECG data
-        ecg_readings = ecg_data.get('readings', [])
-        if ecg_readings:
-            # Calculate basic statistics
-            readings = [float(r) for r in ecg_readings if isinstance(r, (int, float))]
-            if readings:
-                min_val = min(readings)
-                max_val = max(readings)
-                avg_val = sum(readings) / len(readings)
-                
-                analysis_data = [
-                    ["Parameter", "Value"],
-                    ["Minimum Value:", f"{min_val:.2f}"],
-                    ["Maximum Value:", f"{max_val:.2f}"],
-                    ["Average Value:", f"{avg_val:.2f}"],
-                    ["Total Readings:", str(len(readings))],
-                    ["Recording Quality:", "Good" if len(readings) > 1000 else "Fair"]
-                ]
-                
-                analysis_table = Table(analysis_data, colWidths=[150, 250])
-                analysis_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                    ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-                    ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-                ]))
-                story.append(analysis_table)
+        if sample_count:
+            # Per-lead statistics computed in one pass over the matrix
+            min_vals = leads.min(axis=1)
+            max_vals = leads.max(axis=1)
+            avg_vals = leads.mean(axis=1, dtype=np.float64)
+            quality = "Good" if sample_count > 1000 else "Fair"
+
+            analysis_data = [["Lead", "Minimum", "Maximum", "Average", "Readings", "Quality"]]
+            for i, name in enumerate(names):
+                analysis_data.append([
+                    name,
+                    f"{min_vals[i]:.2f}",
+                    f"{max_vals[i]:.2f}",
+                    f"{avg_vals[i]:.2f}",
+                    str(sample_count),
+                    quality
+                ])
+            
+            analysis_table = Table(analysis_data, colWidths=[70, 70, 70, 70, 70, 60])
+            analysis_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ]))
+            story.append(analysis_table)
         
         story.append(Spacer(1, 20))
         
-        # Generate ECG waveform plot
-        if ecg_readings:
+        # Generate ECG waveform plot, one strip per lead
+        if sample_count:
             try:
-                # Create matplotlib plot
-                plt.figure(figsize=(10, 4))
-                readings = [float(r) for r in ecg_readings[:1000]]  # Limit to first 1000 points
-                plt.plot(readings, linewidth=0.5, color='blue')
-                plt.title('ECG Waveform')
-                plt.xlabel('Time (samples)')
-                plt.ylabel('Amplitude')
-                plt.grid(True, alpha=0.3)
+                preview = leads[:, :ECGService.WAVEFORM_PREVIEW_SAMPLES]
+                lead_count = preview.shape[0]
+                fig, axes = plt.subplots(lead_count, 1, figsize=(10, 2 * lead_count + 1), sharex=True, squeeze=False)
+                for ax, name, lead in zip(axes[:, 0], names, preview):
+                    ax.plot(lead, linewidth=0.5, color='blue')
+                    ax.set_ylabel(name)
+                    ax.grid(True, alpha=0.3)
+                axes[0, 0].set_title('ECG Waveform')
+                axes[-1, 0].set_xlabel('Time (samples)')
                 
                 # Save plot to bytes
                 img_buffer = io.BytesIO()
-                plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
+                fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
                 img_buffer.seek(0)
-                plt.close()
-                
-                # Convert to base64 for PDF embedding
-                img_data = base64.b64encode(img_buffer.getvalue()).decode()
+                plt.close(fig)
                 
-                # Add image to PDF (simplified - in production use proper image handling)
                 story.append(Paragraph("ECG Waveform", styles['Heading3']))
-                story.append(Paragraph(f"<img src='data:image/png;base64,{img_data}' width='500' height='200'/>", styles['Normal']))
+                story.append(Image(img_buffer, width=500, height=min(600, 100 * lead_count + 50)))
                 
             except Exception as e:
                 story.append(Paragraph(f"Error generating waveform: {str(e)}", styles['Normal']))
@@ -131,48 +210,57 @@ class ECGService:
         return pdf_bytes
     
     @staticmethod
-    def analyze_ecg_data(ecg_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze ECG data and return health metrics"""
-        
-        readings = ecg_data.get('readings', [])
-        if not readings:
+    def analyze_ecg_data(ecg_data: Dict[str, Any], leads: Optional[np.ndarray] = None,
+                         sampling_rate: int = DEFAULT_SAMPLING_RATE) -> Dict[str, Any]:
+        """Analyze ECG data and return health metrics
+
+        The first lead is treated as the rhythm lead for the summary fields;
+        every lead is also analyzed and returned under ``leads``.
+        """
+        try:
+            if leads is None:
+                leads = ECGService.to_lead_matrix(ecg_data)
+        except Exception as e:
+            return {
+                "heart_rate": None,
+                "rhythm": "error",
+                "abnormalities": [f"Analysis error: {str(e)}"],
+                "confidence_score": 0.0,
+                "leads": []
+            }
+
+        if leads.size == 0:
             return {
                 "heart_rate": None,
                 "rhythm": "unknown",
                 "abnormalities": ["No data available"],
-                "confidence_score": 0.0
+                "confidence_score": 0.0,
+                "leads": []
             }
         
+        if leads.shape[1] < 100:
+            return {
+                "heart_rate": None,
+                "rhythm": "insufficient_data",
+                "abnormalities": ["Insufficient data for analysis"],
+                "confidence_score": 0.0,
+                "leads": []
+            }
+
         try:
-            # Convert to numeric values
-            numeric_readings = [float(r) for r in readings if isinstance(r, (int, float))]
-            
-            if len(numeric_readings) < 100:
-                return {
-                    "heart_rate": None,
-                    "rhythm": "insufficient_data",
-                    "abnormalities": ["Insufficient data for analysis"],
-                    "confidence_score": 0.0
-                }
-            
-            # Basic heart rate calculation (simplified)
-            # In production, use proper ECG analysis algorithms
-            heart_rate = ECGService.calculate_heart_rate(numeric_readings)
-            
-            # Rhythm analysis
-            rhythm = ECGService.analyze_rhythm(numeric_readings, heart_rate)
-            
-            # Detect abnormalities
-            abnormalities = ECGService.detect_abnormalities(numeric_readings, heart_rate)
-            
-            # Calculate confidence score
-            confidence_score = ECGService.calculate_confidence(numeric_readings)
+            names = ECGService.lead_names(ecg_data, leads.shape[0])
+            lead_results = [
+                dict(lead=name, **ECGService.analyze_lead(lead, sampling_rate))
+                for name, lead in zip(names, leads)
+            ]
+            primary = lead_results[0]
             
             return {
-                "heart_rate": heart_rate,
-                "rhythm": rhythm,
-                "abnormalities": abnormalities,
-                "confidence_score": confidence_score
+                "heart_rate": primary["heart_rate"],
+                "rhythm": primary["rhythm"],
+                "abnormalities": primary["abnormalities"],
+                "confidence_score": primary["confidence_score"],
+                "leads": lead_results
             }
             
         except Exception as e:
@@ -180,30 +268,42 @@ class ECGService:
                 "heart_rate": None,
                 "rhythm": "error",
                 "abnormalities": [f"Analysis error: {str(e)}"],
-                "confidence_score": 0.0
+                "confidence_score": 0.0,
+                "leads": []
             }
+
+    @staticmethod
+    def analyze_lead(lead: np.ndarray, sampling_rate: int = DEFAULT_SAMPLING_RATE) -> Dict[str, Any]:
+        """Analyze a single lead"""
+        heart_rate = ECGService.calculate_heart_rate(lead, sampling_rate)
+        return {
+            "heart_rate": heart_rate,
+            "rhythm": ECGService.analyze_rhythm(lead, heart_rate),
+            "abnormalities": ECGService.detect_abnormalities(lead, heart_rate, sampling_rate),
+            "confidence_score": ECGService.calculate_confidence(lead)
+        }
     
     @staticmethod
-    def calculate_heart_rate(readings: List[float]) -> Optional[int]:
+    def detect_peaks(readings: np.ndarray) -> np.ndarray:
+        """Return indices of local maxima above mean + 0.5 std (simplified R-peak detection)"""
+        x = np.asarray(readings)
+        if x.size < 3:
+            return np.empty(0, dtype=np.intp)
+        threshold = x.mean(dtype=np.float64) + x.std(dtype=np.float64) * 0.5
+        mid = x[1:-1]
+        return np.flatnonzero((mid > threshold) & (mid > x[:-2]) & (mid > x[2:])) + 1
+
+    @staticmethod
+    def calculate_heart_rate(readings: np.ndarray, sampling_rate: int = DEFAULT_SAMPLING_RATE) -> Optional[int]:
         """Calculate heart rate from ECG readings (simplified)"""
         try:
-            # Simple peak detection (in production, use proper ECG algorithms)
-            threshold = np.mean(readings) + np.std(readings) * 0.5
-            peaks = []
-            
-            for i in range(1, len(readings) - 1):
-                if readings[i] > threshold and readings[i] > readings[i-1] and readings[i] > readings[i+1]:
-                    peaks.append(i)
-            
+            peaks = ECGService.detect_peaks(readings)
             if len(peaks) < 2:
                 return None
             
-            # Calculate intervals between peaks
-            intervals = [peaks[i+1] - peaks[i] for i in range(len(peaks)-1)]
-            avg_interval = np.mean(intervals)
-            
-            # Convert to heart rate (assuming 500 Hz sampling rate)
-            heart_rate = int(60 * 500 / avg_interval)
+            # Mean R-R interval in samples
+            avg_interval = np.diff(peaks).mean()
+            heart_rate = int(60 * sampling_rate / avg_interval)
             
             return heart_rate if 40 <= heart_rate <= 200 else None
             
@@ -211,7 +311,7 @@ class ECGService:
             return None
     
     @staticmethod
-    def analyze_rhythm(readings: List[float], heart_rate: Optional[int]) -> str:
+    def analyze_rhythm(readings: np.ndarray, heart_rate: Optional[int]) -> str:
         """Analyze heart rhythm"""
         if heart_rate is None:
             return "unknown"
@@ -224,7 +324,8 @@ class ECGService:
             return "normal"
     
     @staticmethod
-    def detect_abnormalities(readings: List[float], heart_rate: Optional[int]) -> List[str]:
+    def detect_abnormalities(readings: np.ndarray, heart_rate: Optional[int],
+                             sampling_rate: int = DEFAULT_SAMPLING_RATE) -> List[str]:
         """Detect ECG abnormalities"""
         abnormalities = []
         
@@ -237,11 +338,9 @@ class ECGService:
         
         # Check for irregular rhythm (simplified)
         if len(readings) > 1000:
-            first_half = readings[:len(readings)//2]
-            second_half = readings[len(readings)//2:]
-            
-            hr1 = ECGService.calculate_heart_rate(first_half)
-            hr2 = ECGService.calculate_heart_rate(second_half)
+            half = len(readings) // 2
+            hr1 = ECGService.calculate_heart_rate(readings[:half], sampling_rate)
+            hr2 = ECGService.calculate_heart_rate(readings[half:], sampling_rate)
             
             if hr1 and hr2 and abs(hr1 - hr2) > 10:
                 abnormalities.append("Irregular rhythm detected")
@@ -249,16 +348,16 @@ class ECGService:
         return abnormalities
     
     @staticmethod
-    def calculate_confidence(readings: List[float]) -> float:
+    def calculate_confidence(readings: np.ndarray) -> float:
         """Calculate confidence score for analysis"""
         if len(readings) < 100:
             return 0.0
         
         # Simple confidence calculation based on data quality
-        signal_strength = np.std(readings)
+        signal_strength = float(np.std(readings, dtype=np.float64))
         data_length = len(readings)
         
         # Normalize confidence (0-1)
         confidence = min(1.0, (signal_strength / 100) * (data_length / 1000))
         
-        return round(confidence, 2) 
\ No newline at end of file
+        return round(confidence, 2)
@@ -1,6 +1,7 @@
 import random
 import string
 from typing import Optional
+from app.services.notifications import notification_dispatcher, Message
 
 class EmailService:
     @staticmethod
@@ -11,18 +12,26 @@ class EmailService:
     @staticmethod
     def send_otp(email: str, otp_code: str) -> bool:
         """
-        Send OTP via email
-        In production, integrate with SendGrid, AWS SES, or similar service
+        Queue OTP via email
+        The provider is configured on the notification dispatcher (EMAIL_WEBHOOK_URL)
         """
-        # Mock implementation for development
-        print(f"Email OTP sent to {email}: {otp_code}")
+        notification_dispatcher.submit(Message(
+            channel="email",
+            recipient=email,
+            subject="Your verification code",
+            body=f"Your verification code is {otp_code}"
+        ))
         return True
     
     @staticmethod
     def send_password_reset(email: str, reset_link: str) -> bool:
         """
-        Send password reset email
+        Queue password reset email
         """
-        # Mock implementation for development
-        print(f"Password reset email sent to {email}: {reset_link}")
-        return True 
\ No newline at end of file
+        notification_dispatcher.submit(Message(
+            channel="email",
+            recipient=email,
+            subject="Reset your password",
+            body=f"Use this link to reset your password: {reset_link}"
+        ))
+        return True
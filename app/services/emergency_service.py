@@ -1,32 +1,29 @@
 from datetime import datetime
 from typing import List, Dict, Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.sos import SOS, SOSNotification
 from app.models.emergency_contact import EmergencyContact
 from app.models.user import User
 from app.services.sms_service import SMSService
 from app.services.email_service import EmailService
+from app.core.database import SessionLocal
+import functools
 import json
 import uuid
 
 class EmergencyService:
     @staticmethod
     def trigger_sos(db: Session, user_id: str, sos_data: dict) -> SOS:
-        """Trigger SOS alert and notify emergency contacts"""
+        """Trigger SOS alert and notify emergency contacts
+
+        The SOS row is committed before any contact is notified; SMS delivery
+        happens on the notification dispatcher so the request never waits on the gateway.
+        """
         
         # Create SOS record
-        sos = SOS(
-            id=str(uuid.uuid4()),
-            user_id=user_id,
-            status="active",
-            emergency_type=sos_data.get("emergency_type", "medical"),
-            location_lat=sos_data.get("location_lat"),
-            location_lng=sos_data.get("location_lng"),
-            location_address=sos_data.get("location_address"),
-            vital_data=sos_data.get("vital_data"),
-            notes=sos_data.get("notes"),
-            triggered_at=datetime.utcnow()
-        )
+        sos = EmergencyService._build_sos(user_id, sos_data)
         
         db.add(sos)
         db.commit()
@@ -34,47 +31,111 @@ class EmergencyService:
         
         # Get emergency contacts
         contacts = db.query(EmergencyContact).filter_by(user_id=user_id).all()
+        if not contacts:
+            return sos
+        
+        # Render the alert once; it is identical for every contact
+        user = db.query(User).filter_by(id=user_id).first()
+        message = EmergencyService.create_sos_message(sos, user.name if user else None)
+        
+        # Record all notifications in one batch, then fan out concurrently
+        notifications = EmergencyService._build_notifications(sos, contacts)
+        db.add_all(notifications)
+        db.flush()
+        # Capture IDs before commit expires the instances
+        deliveries = [(notification.id, contact.phone) for notification, contact in zip(notifications, contacts)]
+        db.commit()
         
-        # Send notifications to all contacts
-        for contact in contacts:
-            EmergencyService.send_sos_notification(db, sos, contact)
+        for notification_id, phone in deliveries:
+            EmergencyService.send_sos_notification(notification_id, phone, message)
         
         return sos
-    
+
     @staticmethod
-    def send_sos_notification(db: Session, sos: SOS, contact: EmergencyContact):
-        """Send SOS notification to emergency contact"""
+    async def trigger_sos_async(db: AsyncSession, user_id: str, sos_data: dict) -> SOS:
+        """trigger_sos on the async engine; delivery still goes through the dispatcher"""
+        sos = EmergencyService._build_sos(user_id, sos_data)
+        db.add(sos)
+        await db.commit()
         
-        # Create notification record
-        notification = SOSNotification(
-            id=str(uuid.uuid4()),
-            sos_id=str(sos.id),
-            contact_id=str(contact.id),
-            notification_type="sms",  # Default to SMS for emergency
-            sent_at=datetime.utcnow()
-        )
+        contacts = (await db.execute(select(EmergencyContact).where(EmergencyContact.user_id == user_id))).scalars().all()
+        if not contacts:
+            return sos
         
-        db.add(notification)
-        db.commit()
+        user_name = (await db.execute(select(User.name).where(User.id == user_id))).scalar()
+        message = EmergencyService.create_sos_message(sos, user_name)
         
-        # Send SMS notification
-        message = EmergencyService.create_sos_message(db, sos, contact)
-        SMSService.send_emergency_alert(contact.phone, message)
+        notifications = EmergencyService._build_notifications(sos, contacts)
+        db.add_all(notifications)
+        await db.flush()
+        deliveries = [(notification.id, contact.phone) for notification, contact in zip(notifications, contacts)]
+        await db.commit()
         
-        # Update notification as delivered
-        notification.delivered = True
-        notification.delivered_at = datetime.utcnow()
-        db.commit()
+        for notification_id, phone in deliveries:
+            EmergencyService.send_sos_notification(notification_id, phone, message)
+        
+        return sos
+
+    @staticmethod
+    def _build_sos(user_id: str, sos_data: dict) -> SOS:
+        return SOS(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            status="active",
+            emergency_type=sos_data.get("emergency_type", "medical"),
+            location_lat=sos_data.get("location_lat"),
+            location_lng=sos_data.get("location_lng"),
+            location_address=sos_data.get("location_address"),
+            vital_data=sos_data.get("vital_data"),
+            notes=sos_data.get("notes"),
+            triggered_at=datetime.utcnow()
+        )
+
+    @staticmethod
+    def _build_notifications(sos: SOS, contacts: List[EmergencyContact]) -> List[SOSNotification]:
+        return [
+            SOSNotification(
+                sos_id=str(sos.id),
+                contact_id=str(contact.id),
+                notification_type="sms",  # Default to SMS for emergency
+                delivery_status="queued",
+                sent_at=datetime.utcnow()
+            )
+            for contact in contacts
+        ]
     
     @staticmethod
-    def create_sos_message(db: Session, sos: SOS, contact: EmergencyContact) -> str:
-        """Create emergency message for contact"""
-        
-        # Get user details from database
-        user = db.query(User).filter_by(id=sos.user_id).first()
-        user_name = user.name if user else "Unknown User"
+    def send_sos_notification(notification_id: int, phone: str, message: str):
+        """Queue an SOS SMS; the delivery outcome is written back to the notification row"""
+        SMSService.send_emergency_alert(
+            phone,
+            message,
+            on_complete=functools.partial(EmergencyService.record_delivery, notification_id)
+        )
+    
+    @staticmethod
+    def record_delivery(notification_id: int, delivered: bool, attempts: int, error: str = None):
+        """Update per-contact delivery status (runs off the dispatcher loop)"""
+        db = SessionLocal()
+        try:
+            values = {
+                "delivered": delivered,
+                "delivery_status": "delivered" if delivered else "failed",
+                "attempts": attempts,
+                "last_error": error
+            }
+            if delivered:
+                values["delivered_at"] = datetime.utcnow()
+            db.query(SOSNotification).filter_by(id=notification_id).update(values)
+            db.commit()
+        finally:
+            db.close()
+    
+    @staticmethod
+    def create_sos_message(sos: SOS, user_name: str = None) -> str:
+        """Create emergency message for contacts"""
         
-        message = f"EMERGENCY ALERT: {user_name} has triggered an SOS alert. "
+        message = f"EMERGENCY ALERT: {user_name or 'Unknown User'} has triggered an SOS alert. "
         message += f"Emergency Type: {sos.emergency_type}. "
         
         if sos.location_address:
@@ -1,5 +1,6 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Sequence, Optional
 from datetime import datetime
+import numpy as np
 
 class HealthAnalysisService:
     # Health condition thresholds
@@ -13,69 +14,99 @@ class HealthAnalysisService:
     BLOOD_PRESSURE_DIASTOLIC_NORMAL = (60, 90)
     RESPIRATORY_RATE_NORMAL = (12, 20)
     
+    # Condition codes returned by the batch analyzer, indexed by severity
+    CONDITIONS = ("normal", "warning", "critical")
+    METRICS = ("heart_rate", "spo2", "temperature", "blood_pressure_systolic",
+               "blood_pressure_diastolic", "respiratory_rate")
+    
     @staticmethod
     def analyze_vital_signs(vital_data: Dict[str, Any]) -> Tuple[str, bool]:
         """
         Analyze vital signs and return health condition and anomaly flag
         Returns: (health_condition, is_anomaly)
         """
-        anomalies = []
-        health_condition = "normal"
+        columns = {
+            metric: [vital_data.get(metric)]
+            for metric in HealthAnalysisService.METRICS
+            if vital_data.get(metric) is not None
+        }
+        conditions, anomalies = HealthAnalysisService.analyze_vital_batch(columns, size=1)
+        return HealthAnalysisService.CONDITIONS[conditions[0]], bool(anomalies[0])
+    
+    @staticmethod
+    def columns_from_records(records: Sequence[Any]) -> Dict[str, np.ndarray]:
+        """Build per-metric float columns from vital dicts or Vital rows (missing values become NaN)"""
+        columns = {}
+        for metric in HealthAnalysisService.METRICS:
+            values = [
+                record.get(metric) if isinstance(record, dict) else getattr(record, metric, None)
+                for record in records
+            ]
+            columns[metric] = np.asarray(values, dtype=np.float64)
+        return columns
+    
+    @staticmethod
+    def analyze_vital_batch(columns: Dict[str, Any], size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Analyze many readings at once
+        columns maps metric name to an array of readings; NaN, None and 0 count as missing,
+        matching the scalar path. Returns (condition codes indexing CONDITIONS, anomaly mask).
+        """
+        if size is None:
+            size = len(next(iter(columns.values()))) if columns else 0
         
-        # Heart Rate Analysis
-        if vital_data.get('heart_rate'):
-            hr = vital_data['heart_rate']
-            if hr < HealthAnalysisService.HEART_RATE_NORMAL[0] or hr > HealthAnalysisService.HEART_RATE_NORMAL[1]:
-                anomalies.append("heart_rate")
-                if hr < HealthAnalysisService.HEART_RATE_WARNING[0] or hr > HealthAnalysisService.HEART_RATE_WARNING[1]:
-                    health_condition = "critical"
-                elif health_condition == "normal":
-                    health_condition = "warning"
+        def column(metric):
+            values = columns.get(metric)
+            if values is None:
+                return np.full(size, np.nan)
+            return np.asarray(values, dtype=np.float64)
         
-        # SpO2 Analysis
-        if vital_data.get('spo2'):
-            spo2 = vital_data['spo2']
-            if spo2 < HealthAnalysisService.SPO2_NORMAL[0]:
-                anomalies.append("spo2")
-                if spo2 < HealthAnalysisService.SPO2_WARNING[0]:
-                    health_condition = "critical"
-                elif health_condition == "normal":
-                    health_condition = "warning"
+        def present(values):
+            return ~np.isnan(values) & (values != 0)
         
-        # Temperature Analysis
-        if vital_data.get('temperature'):
-            temp = vital_data['temperature']
-            if temp < HealthAnalysisService.TEMPERATURE_NORMAL[0] or temp > HealthAnalysisService.TEMPERATURE_NORMAL[1]:
-                anomalies.append("temperature")
-                if temp < HealthAnalysisService.TEMPERATURE_WARNING[0] or temp > HealthAnalysisService.TEMPERATURE_WARNING[1]:
-                    health_condition = "critical"
-                elif health_condition == "normal":
-                    health_condition = "warning"
+        def outside(values, bounds):
+            return (values < bounds[0]) | (values > bounds[1])
         
-        # Blood Pressure Analysis
-        if vital_data.get('blood_pressure_systolic') and vital_data.get('blood_pressure_diastolic'):
-            systolic = vital_data['blood_pressure_systolic']
-            diastolic = vital_data['blood_pressure_diastolic']
-            
-            if (systolic < HealthAnalysisService.BLOOD_PRESSURE_SYSTOLIC_NORMAL[0] or 
-                systolic > HealthAnalysisService.BLOOD_PRESSURE_SYSTOLIC_NORMAL[1] or
-                diastolic < HealthAnalysisService.BLOOD_PRESSURE_DIASTOLIC_NORMAL[0] or
-                diastolic > HealthAnalysisService.BLOOD_PRESSURE_DIASTOLIC_NORMAL[1]):
-                anomalies.append("blood_pressure")
-                if health_condition == "normal":
-                    health_condition = "warning"
+        condition = np.zeros(size, dtype=np.int8)
+        anomaly = np.zeros(size, dtype=bool)
         
-        # Respiratory Rate Analysis
-        if vital_data.get('respiratory_rate'):
-            rr = vital_data['respiratory_rate']
-            if rr < HealthAnalysisService.RESPIRATORY_RATE_NORMAL[0] or rr > HealthAnalysisService.RESPIRATORY_RATE_NORMAL[1]:
-                anomalies.append("respiratory_rate")
-                if health_condition == "normal":
-                    health_condition = "warning"
+        def flag(out, critical=None):
+            nonlocal condition
+            anomaly[out] = True
+            level = out.astype(np.int8)
+            if critical is not None:
+                level[critical] = 2
+            condition = np.maximum(condition, level)
         
-        is_anomaly = len(anomalies) > 0
+        with np.errstate(invalid="ignore"):
+            # Heart Rate Analysis
+            hr = column("heart_rate")
+            out = present(hr) & outside(hr, HealthAnalysisService.HEART_RATE_NORMAL)
+            flag(out, out & outside(hr, HealthAnalysisService.HEART_RATE_WARNING))
+            
+            # SpO2 Analysis
+            spo2 = column("spo2")
+            out = present(spo2) & (spo2 < HealthAnalysisService.SPO2_NORMAL[0])
+            flag(out, out & (spo2 < HealthAnalysisService.SPO2_WARNING[0]))
+            
+            # Temperature Analysis
+            temp = column("temperature")
+            out = present(temp) & outside(temp, HealthAnalysisService.TEMPERATURE_NORMAL)
+            flag(out, out & outside(temp, HealthAnalysisService.TEMPERATURE_WARNING))
+            
+            # Blood Pressure Analysis
+            systolic = column("blood_pressure_systolic")
+            diastolic = column("blood_pressure_diastolic")
+            flag(present(systolic) & present(diastolic) & (
+                outside(systolic, HealthAnalysisService.BLOOD_PRESSURE_SYSTOLIC_NORMAL) |
+                outside(diastolic, HealthAnalysisService.BLOOD_PRESSURE_DIASTOLIC_NORMAL)
+            ))
+            
+            # Respiratory Rate Analysis
+            rr = column("respiratory_rate")
+            flag(present(rr) & outside(rr, HealthAnalysisService.RESPIRATORY_RATE_NORMAL))
         
-        return health_condition, is_anomaly
+        return condition, anomaly
     
     @staticmethod
     def should_trigger_alert(health_condition: str, is_anomaly: bool) -> bool:
@@ -0,0 +1,199 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+import redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.vitals import Vital
+from app.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Push readings onto each rolling window and keep per-field running sums and
+# counts in the state hash, subtracting whatever falls off the far end.
+# Entries are "|"-joined values where an empty field means the metric was missing.
+# ARGV[4] is the mode: "always", "present" (ingest: skip and return 0 if there is
+# no state to add to) or "missing" (seed: skip and return 0 if there already is).
+RECORD_READINGS_SCRIPT = """
+local function apply(prefix, entry, sign)
+    local i = 0
+    for field in string.gmatch(entry .. '|', '([^|]*)|') do
+        i = i + 1
+        if field ~= '' then
+            redis.call('HINCRBYFLOAT', KEYS[1], prefix .. ':' .. i .. ':sum', sign * tonumber(field))
+            redis.call('HINCRBY', KEYS[1], prefix .. ':' .. i .. ':n', sign)
+        end
+    end
+end
+local exists = redis.call('EXISTS', KEYS[1]) == 1
+if (ARGV[4] == 'present' and not exists) or (ARGV[4] == 'missing' and exists) then
+    return 0
+end
+if not exists then
+    redis.call('DEL', KEYS[2], KEYS[3])
+end
+for j = 5, #ARGV, 2 do
+    local windows = {{KEYS[2], tonumber(ARGV[1]), 's', ARGV[j]}, {KEYS[3], tonumber(ARGV[2]), 'i', ARGV[j + 1]}}
+    for _, w in ipairs(windows) do
+        redis.call('RPUSH', w[1], w[4])
+        apply(w[3], w[4], 1)
+        if redis.call('LLEN', w[1]) > w[2] then
+            apply(w[3], redis.call('LPOP', w[1]), -1)
+        end
+    end
+    redis.call('HINCRBY', KEYS[1], 's:len', 1)
+    if tonumber(redis.call('HGET', KEYS[1], 's:len')) > tonumber(ARGV[1]) then
+        redis.call('HSET', KEYS[1], 's:len', ARGV[1])
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[3])
+end
+return 1
+"""
+
+class HealthScoreService:
+    """Rolling health score and insight averages, maintained on ingest.
+
+    The score covers the last SCORE_WINDOW readings and the insight averages
+    the last INSIGHT_WINDOW; both are kept as running sums in Redis so reads
+    are O(1). Missing or zero readings are skipped per metric.
+    """
+
+    SCORE_WINDOW = 10
+    INSIGHT_WINDOW = 100
+    METRICS = ("heart_rate", "spo2", "temperature")
+
+    def __init__(self):
+        self._record = redis_service.redis_client.register_script(RECORD_READINGS_SCRIPT)
+        self._record_async = None
+
+    @staticmethod
+    def _keys(user_id: str) -> List[str]:
+        return [f"health_state:{user_id}", f"health_score_window:{user_id}", f"health_insight_window:{user_id}"]
+
+    @staticmethod
+    def reading_points(reading: Dict[str, Any]) -> List[Optional[int]]:
+        """Score one reading per metric: 10 in the healthy range, 5 near it, else 0"""
+        hr, spo2, temp = (reading.get(metric) or None for metric in HealthScoreService.METRICS)
+        points = []
+        # Heart rate scoring (60-100 is good)
+        points.append(None if hr is None else 10 if 60 <= hr <= 100 else 5 if 50 <= hr <= 110 else 0)
+        # SpO2 scoring (95-100 is good)
+        points.append(None if spo2 is None else 10 if 95 <= spo2 <= 100 else 5 if 90 <= spo2 <= 95 else 0)
+        # Temperature scoring (36-37.5 is good)
+        points.append(None if temp is None else 10 if 36.0 <= temp <= 37.5 else 5 if 35.5 <= temp <= 38.0 else 0)
+        return points
+
+    @staticmethod
+    def _encode(values: Sequence[Optional[float]]) -> str:
+        return "|".join("" if value is None else repr(value) for value in values)
+
+    def _record_args(self, readings: Sequence[Dict[str, Any]], mode: str) -> List[Any]:
+        args = [self.SCORE_WINDOW, self.INSIGHT_WINDOW, settings.HEALTH_STATE_TTL_SECONDS, mode]
+        for reading in readings:
+            values = [reading.get(metric) or None for metric in self.METRICS]
+            args += [self._encode(self.reading_points(reading)), self._encode(values)]
+        return args
+
+    def _run(self, user_id: str, readings: Sequence[Dict[str, Any]], mode: str) -> bool:
+        return bool(self._record(keys=self._keys(user_id), args=self._record_args(readings, mode),
+                                 client=redis_service.redis_client))
+
+    async def _run_async(self, user_id: str, readings: Sequence[Dict[str, Any]], mode: str) -> bool:
+        client = redis_service.async_client
+        if self._record_async is None:
+            self._record_async = client.register_script(RECORD_READINGS_SCRIPT)
+        return bool(await self._record_async(keys=self._keys(user_id), args=self._record_args(readings, mode),
+                                             client=client))
+
+    def record(self, user_id: str, reading: Dict[str, Any]) -> None:
+        """Fold a new reading into the user's rolling state"""
+        self._run(user_id, [reading], "always")
+
+    async def record_async(self, db: AsyncSession, user_id: str, reading: Dict[str, Any]) -> None:
+        """Fold a committed reading into the user's state, seeding it from history if there is none"""
+        await self.record_many_async(db, user_id, [reading])
+
+    async def record_many_async(self, db: AsyncSession, user_id: str, readings: List[Dict[str, Any]]) -> None:
+        """record_async for a batch of committed readings, oldest first, in one round trip
+
+        A user with no state yet (new, or expired) is seeded from their stored
+        history instead, which already includes these readings.
+        """
+        if not await self._run_async(user_id, readings, "present"):
+            history = await self._recent_readings_async(db, user_id)
+            await self._run_async(user_id, list(reversed(history)), "missing")
+
+    def get_state(self, db: Session, user_id: str) -> Dict[str, Any]:
+        """Current score inputs and insight averages, seeding from the database if absent"""
+        try:
+            data = redis_service.redis_client.hgetall(self._keys(user_id)[0])
+            if not data:
+                readings = self._recent_readings(db, user_id)
+                if readings:
+                    self._run(user_id, list(reversed(readings)), "missing")
+                    data = redis_service.redis_client.hgetall(self._keys(user_id)[0])
+            return self._from_sums(data)
+        except redis.RedisError as e:
+            logger.warning("Health state unavailable, computing from history: %s", e)
+            return self.compute_state(self._recent_readings(db, user_id))
+
+    @staticmethod
+    def _recent_query(user_id: str):
+        return select(Vital.heart_rate, Vital.spo2, Vital.temperature).where(
+            Vital.user_id == user_id
+        ).order_by(Vital.timestamp.desc()).limit(HealthScoreService.INSIGHT_WINDOW)
+
+    @staticmethod
+    def _recent_readings(db: Session, user_id: str) -> List[Dict[str, Any]]:
+        return [row._asdict() for row in db.execute(HealthScoreService._recent_query(user_id))]
+
+    @staticmethod
+    async def _recent_readings_async(db: AsyncSession, user_id: str) -> List[Dict[str, Any]]:
+        return [row._asdict() for row in await db.execute(HealthScoreService._recent_query(user_id))]
+
+    @staticmethod
+    def compute_state(readings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Same state as the Redis path, from readings ordered newest first"""
+        data = {}
+        for prefix, window, transform in (
+            ("s", HealthScoreService.SCORE_WINDOW, HealthScoreService.reading_points),
+            ("i", HealthScoreService.INSIGHT_WINDOW, lambda r: [r.get(m) or None for m in HealthScoreService.METRICS]),
+        ):
+            for reading in readings[:window]:
+                for i, value in enumerate(transform(reading), start=1):
+                    if value is not None:
+                        data[f"{prefix}:{i}:sum"] = data.get(f"{prefix}:{i}:sum", 0) + value
+                        data[f"{prefix}:{i}:n"] = data.get(f"{prefix}:{i}:n", 0) + 1
+        data["s:len"] = min(len(readings), HealthScoreService.SCORE_WINDOW)
+        return HealthScoreService._from_sums(data)
+
+    @staticmethod
+    def _from_sums(data: Dict[str, Any]) -> Dict[str, Any]:
+        def average(prefix, i):
+            n = int(data.get(f"{prefix}:{i}:n", 0))
+            return float(data[f"{prefix}:{i}:sum"]) / n if n else None
+
+        points = [average("s", i) for i in (1, 2, 3)]
+        present = [p for p in points if p is not None]
+        score = None
+        if present:
+            # Three components of up to 10 points each, scaled to 0-100
+            score = min(100, sum(present) / len(present) * 3 * 3.33)
+        return {
+            "score": score,
+            "readings": int(data.get("s:len", 0)),
+            "averages": {
+                metric: average("i", i)
+                for i, metric in enumerate(HealthScoreService.METRICS, start=1)
+            },
+            "insight_readings": max((int(data.get(f"i:{i}:n", 0)) for i in (1, 2, 3)), default=0)
+        }
+
+    def reset(self, user_id: str) -> None:
+        redis_service.redis_client.delete(*self._keys(user_id))
+
+# Global health score service instance
+health_score_service = HealthScoreService()
@@ -1,5 +1,376 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Union
+import redis
+from app.core.config import settings
+from app.services.redis_service import redis_service
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+class Message(NamedTuple):
+    """An outbound notification for a single recipient"""
+    channel: str  # "sms", "email" or "push"
+    recipient: str  # phone number, email address or user ID
+    body: str
+    subject: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "channel": self.channel,
+            "recipient": self.recipient,
+            "subject": self.subject,
+            "body": self.body,
+            "data": self.data or {}
+        }
+
+# Per-message outcome from a transport: True (accepted), False (rejected) or the raised error
+SendResult = Union[bool, BaseException]
+
+class Transport:
+    """Base class for delivery providers.
+
+    Subclasses implement ``send``; providers with a bulk API also override
+    ``send_batch`` and raise ``max_batch_size``. ``max_concurrency`` caps how
+    many sends (or batches) are in flight against the provider at once.
+    """
+    channel: str = ""
+    max_concurrency: int = 10
+    max_batch_size: int = 1
+
+    async def send(self, message: Message) -> bool:
+        raise NotImplementedError
+
+    async def send_batch(self, messages: Sequence[Message]) -> List[SendResult]:
+        return list(await asyncio.gather(*(self.send(m) for m in messages), return_exceptions=True))
+
+    async def close(self) -> None:
+        pass
+
+class ConsoleTransport(Transport):
+    """Development transport that prints messages instead of sending them"""
+
+    def __init__(self, channel: str, max_concurrency: int = 10):
+        self.channel = channel
+        self.max_concurrency = max_concurrency
+
+    async def send(self, message: Message) -> bool:
+        print(f"{self.channel.upper()} sent to {message.recipient}: {message.body}")
+        return True
+
+class WebhookTransport(Transport):
+    """Posts messages as JSON to an HTTP provider over a pooled keep-alive client"""
+
+    def __init__(self, channel: str, url: str, max_concurrency: int = 10, max_batch_size: int = 1,
+                 timeout_seconds: float = 10.0):
+        self.channel = channel
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+        self.timeout_seconds = timeout_seconds
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        # Created on the dispatcher loop; connections are reused across sends.
+        # httpx is only imported once a webhook provider is actually used.
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+        return self._client
+
+    async def send(self, message: Message) -> bool:
+        response = await self.client.post(self.url, json=message.to_payload())
+        return response.is_success
+
+    async def send_batch(self, messages: Sequence[Message]) -> List[SendResult]:
+        if self.max_batch_size <= 1 or len(messages) == 1:
+            return await super().send_batch(messages)
+        response = await self.client.post(self.url, json={"messages": [m.to_payload() for m in messages]})
+        return [response.is_success] * len(messages)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class FakeTransport(Transport):
+    """In-memory transport for tests; records what was sent and can simulate failures"""
+
+    def __init__(self, channel: str, fail_recipients: Sequence[str] = (), max_batch_size: int = 1,
+                 max_concurrency: int = 10):
+        self.channel = channel
+        self.fail_recipients = set(fail_recipients)
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.sent: List[Message] = []
+        self.batches: List[List[Message]] = []
+
+    async def send(self, message: Message) -> bool:
+        if message.recipient in self.fail_recipients:
+            return False
+        self.sent.append(message)
+        return True
+
+    async def send_batch(self, messages: Sequence[Message]) -> List[SendResult]:
+        self.batches.append(list(messages))
+        return await super().send_batch(messages)
+
+class _Delivery:
+    __slots__ = ("message", "on_complete", "attempts", "error")
+
+    def __init__(self, message: Message, on_complete: Optional[Callable]):
+        self.message = message
+        self.on_complete = on_complete
+        self.attempts = 0
+        self.error: Optional[str] = None
+
+class NotificationDispatcher:
+    """Async delivery engine shared by SOS, health alerts and OTP.
+
+    Runs on its own event loop thread so request threads only enqueue. Each
+    channel has a queue drained by ``transport.max_concurrency`` workers that
+    batch up to ``transport.max_batch_size`` messages per provider call.
+    Failed messages are retried with jittered exponential backoff and
+    dead-lettered after ``max_attempts``.
+    """
+
+    DEAD_LETTER_KEY = "notifications:dead_letter"
+
+    def __init__(self, max_attempts: int, retry_base_seconds: float, dead_letter_size: int = 1000):
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.dead_letter_size = dead_letter_size
+        self.transports: Dict[str, Transport] = {}
+        self.dead_letters: Deque[Dict[str, Any]] = deque(maxlen=dead_letter_size)
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, List[asyncio.Task]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    def register(self, transport: Transport) -> Optional[Transport]:
+        """Install the transport for its channel and return the one it replaced"""
+        with self._lock:
+            previous = self.transports.get(transport.channel)
+            self.transports[transport.channel] = transport
+            loop = self._loop
+        if loop is not None:
+            # Respawn workers so the new provider's concurrency limit applies
+            loop.call_soon_threadsafe(self._restart_channel, transport.channel)
+        return previous
+
+    def submit(self, message: Message, on_complete: Optional[Callable[[bool, int, Optional[str]], None]] = None) -> None:
+        """Enqueue a message from any thread.
+
+        ``on_complete(delivered, attempts, error)`` runs once, off the event
+        loop, after the message is delivered or dead-lettered.
+        """
+        if message.channel not in self.transports:
+            raise ValueError(f"No transport registered for channel '{message.channel}'")
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(self._accept, _Delivery(message, on_complete))
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Block until every submitted message has been settled"""
+        if self._loop is None:
+            return
+        future: Future = asyncio.run_coroutine_threadsafe(self._idle.wait(), self._loop)
+        future.result(timeout=timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            channel: dict(self.stats[channel], queued=queue.qsize())
+            for channel, queue in self._queues.items()
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drain pending work, close provider connections and stop the loop"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            self.join(timeout)
+        except Exception:
+            logger.warning("Notification dispatcher closed with undelivered messages")
+        asyncio.run_coroutine_threadsafe(self._close_transports(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        with self._lock:
+            self._loop = None
+            self._queues = {}
+            self._workers = {}
+
+    # Everything below runs on the dispatcher loop
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._idle = asyncio.Event()
+                    self._idle.set()
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="notification-dispatcher", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    def _accept(self, delivery: _Delivery) -> None:
+        self._outstanding += 1
+        self._idle.clear()
+        self._enqueue(delivery)
+
+    def _enqueue(self, delivery: _Delivery) -> None:
+        channel = delivery.message.channel
+        if channel not in self._queues:
+            self._queues[channel] = asyncio.Queue()
+            self._start_workers(channel)
+        self._queues[channel].put_nowait(delivery)
+
+    def _start_workers(self, channel: str) -> None:
+        count = max(1, self.transports[channel].max_concurrency)
+        self._workers[channel] = [asyncio.ensure_future(self._worker(channel)) for _ in range(count)]
+
+    def _restart_channel(self, channel: str) -> None:
+        if channel not in self._queues:
+            return
+        for task in self._workers.get(channel, []):
+            task.cancel()
+        self._start_workers(channel)
+
+    async def _worker(self, channel: str) -> None:
+        queue = self._queues[channel]
+        while True:
+            batch = [await queue.get()]
+            transport = self.transports[channel]
+            while len(batch) < transport.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            for delivery in batch:
+                delivery.attempts += 1
+            try:
+                results = await transport.send_batch([d.message for d in batch])
+            except asyncio.CancelledError:
+                for delivery in batch:
+                    delivery.attempts -= 1
+                    self._enqueue(delivery)
+                raise
+            except Exception as e:
+                results = [e] * len(batch)
+            if len(results) != len(batch):
+                # A transport bug must not strand messages; join() waits on every one
+                logger.error("%s transport returned %s results for %s messages", channel, len(results), len(batch))
+                missing = RuntimeError("Transport returned no result for message")
+                results = list(results)[:len(batch)] + [missing] * (len(batch) - len(results))
+
+            for delivery, result in zip(batch, results):
+                self._settle(delivery, result)
+
+    def _settle(self, delivery: _Delivery, result: SendResult) -> None:
+        stats = self.stats[delivery.message.channel]
+        if result is True:
+            stats["sent"] += 1
+            asyncio.ensure_future(self._complete(delivery, True))
+            return
+
+        delivery.error = "Provider rejected message" if result is False else str(result)
+        if delivery.attempts >= self.max_attempts:
+            stats["dead_lettered"] += 1
+            asyncio.ensure_future(self._complete(delivery, False))
+            return
+
+        stats["retried"] += 1
+        delay = self.retry_base_seconds * (2 ** (delivery.attempts - 1)) * random.uniform(0.5, 1.5)
+        self._loop.call_later(delay, self._enqueue, delivery)
+
+    async def _complete(self, delivery: _Delivery, delivered: bool) -> None:
+        try:
+            if not delivered:
+                await asyncio.to_thread(self._dead_letter, delivery)
+            if delivery.on_complete:
+                await asyncio.to_thread(delivery.on_complete, delivered, delivery.attempts, delivery.error)
+        except Exception:
+            logger.exception("Notification completion callback failed")
+        finally:
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._idle.set()
+
+    def _dead_letter(self, delivery: _Delivery) -> None:
+        # Bodies carry OTP codes, reset links and health details, so only the envelope is kept
+        message = delivery.message
+        entry = dict(
+            channel=message.channel,
+            recipient=message.recipient,
+            subject=message.subject,
+            body_length=len(message.body),
+            attempts=delivery.attempts,
+            error=delivery.error,
+            failed_at=datetime.utcnow().isoformat()
+        )
+        self.dead_letters.append(entry)
+        logger.warning("Notification dead-lettered after %s attempts: %s", delivery.attempts, delivery.error)
+        try:
+            pipe = redis_service.redis_client.pipeline()
+            pipe.lpush(self.DEAD_LETTER_KEY, json.dumps(entry))
+            pipe.ltrim(self.DEAD_LETTER_KEY, 0, self.dead_letter_size - 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Dead letter not persisted to Redis: %s", e)
+
+    async def _close_transports(self) -> None:
+        for tasks in self._workers.values():
+            for task in tasks:
+                task.cancel()
+        for transport in self.transports.values():
+            await transport.close()
+
+def build_transport(channel: str, url: str, batch_size: int) -> Transport:
+    """Use the configured HTTP provider for a channel, or print in development"""
+    if url:
+        return WebhookTransport(channel, url, settings.NOTIFICATION_PROVIDER_CONCURRENCY, batch_size)
+    return ConsoleTransport(channel, settings.NOTIFICATION_PROVIDER_CONCURRENCY)
+
+# Global notification dispatcher instance
+notification_dispatcher = NotificationDispatcher(
+    max_attempts=settings.DELIVERY_MAX_ATTEMPTS,
+    retry_base_seconds=settings.DELIVERY_RETRY_BASE_SECONDS
+)
+notification_dispatcher.register(build_transport("sms", settings.SMS_WEBHOOK_URL, 1))
+notification_dispatcher.register(build_transport("email", settings.EMAIL_WEBHOOK_URL, settings.EMAIL_BATCH_SIZE))
+notification_dispatcher.register(build_transport("push", settings.PUSH_WEBHOOK_URL, settings.PUSH_BATCH_SIZE))
+
 class NotificationService:
     @staticmethod
-    def send_notification(user_id, message):
-        # Implement notification logic
-        pass 
\ No newline at end of file
+    def send_notification(user_id, message, title=None, data=None):
+        """Queue a push notification for a user"""
+        notification_dispatcher.submit(Message(
+            channel="push",
+            recipient=str(user_id),
+            subject=title,
+            body=message,
+            data=data
+        ))
+        return True
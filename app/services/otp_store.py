@@ -0,0 +1,95 @@
+import hashlib
+import math
+import time
+import uuid
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.services.redis_service import redis_service
+
+# Rate-limit the identifier over a sliding window, then store the code with a native TTL.
+# Returns {1, 0} when issued or {0, retry_after_ms} when throttled.
+ISSUE_OTP_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], 0, now - window)
+if redis.call('ZCARD', KEYS[2]) >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[2], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[2], window)
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code', ARGV[5], 'user_id', ARGV[6], 'attempts', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+return {1, 0}
+"""
+
+# Compare and consume in one step. Returns the user ID on success, '' on a wrong
+# code and nil when no OTP is pending. Too many wrong guesses burn the OTP.
+VERIFY_OTP_SCRIPT = """
+local otp = redis.call('HMGET', KEYS[1], 'code', 'user_id')
+if not otp[1] then
+    return false
+end
+if otp[1] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return otp[2]
+end
+if redis.call('HINCRBY', KEYS[1], 'attempts', 1) >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+end
+return ''
+"""
+
+class OTPStore:
+    """One-time passwords kept in Redis with native expiry and per-identifier throttling"""
+
+    def __init__(self):
+        client = redis_service.redis_client
+        self._issue = client.register_script(ISSUE_OTP_SCRIPT)
+        self._verify = client.register_script(VERIFY_OTP_SCRIPT)
+
+    @staticmethod
+    def _hash_code(otp_code: str) -> str:
+        return hashlib.sha256(otp_code.encode()).hexdigest()
+
+    @staticmethod
+    def _key(otp_type: str, identifier: str) -> str:
+        return f"otp:{otp_type}:{identifier.lower()}"
+
+    def issue(self, otp_type: str, identifier: str, user_id: str, otp_code: str) -> Tuple[bool, int]:
+        """Store a new OTP, replacing any pending one.
+
+        Returns (issued, retry_after_seconds); issued is False when the
+        identifier has exceeded its send limit for the current window.
+        """
+        now_ms = int(time.time() * 1000)
+        issued, retry_after_ms = self._issue(
+            keys=[self._key(otp_type, identifier), f"otp_rate:{otp_type}:{identifier.lower()}"],
+            args=[
+                now_ms,
+                settings.OTP_RATE_LIMIT_WINDOW_SECONDS * 1000,
+                settings.OTP_RATE_LIMIT_MAX_SENDS,
+                f"{now_ms}:{uuid.uuid4().hex[:8]}",
+                self._hash_code(otp_code),
+                user_id,
+                settings.OTP_EXPIRE_SECONDS
+            ],
+            client=redis_service.redis_client
+        )
+        if issued:
+            return True, 0
+        return False, max(1, math.ceil(int(retry_after_ms) / 1000))
+
+    def verify(self, otp_type: str, identifier: str, otp_code: str) -> Optional[str]:
+        """Atomically check and consume an OTP; returns the owning user ID when valid"""
+        user_id = self._verify(
+            keys=[self._key(otp_type, identifier)],
+            args=[self._hash_code(otp_code), settings.OTP_MAX_ATTEMPTS],
+            client=redis_service.redis_client
+        )
+        return user_id or None
+
+# Global OTP store instance
+otp_store = OTPStore()
@@ -1,15 +1,36 @@
+import asyncio
 import redis
+import redis.asyncio
 import json
 import os
-from typing import Optional, Dict, Any
+import time
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 from datetime import datetime, timedelta
 from app.core.config import settings
 
 class RedisService:
     def __init__(self):
         # Get Redis URL from environment or use default
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+        self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _new_async_client(self) -> "redis.asyncio.Redis":
+        return redis.asyncio.from_url(self.redis_url, decode_responses=True)
+
+    @property
+    def async_client(self) -> "redis.asyncio.Redis":
+        """asyncio client for the running event loop, created on first use
+
+        asyncio connections cannot be shared between loops, so each loop
+        (normally just the server's) gets its own pool.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._new_async_client()
+        return client
     
     def store_live_vital(self, user_id: str, vital_data: Dict[str, Any]) -> bool:
         """Store live vital data for real-time access"""
@@ -26,6 +47,22 @@ class RedisService:
             return json.loads(data)
         return None
     
+    async def get_live_vital_async(self, user_id: str) -> Optional[Dict[str, Any]]:
+        data = await self.async_client.get(f"live_vital:{user_id}")
+        if data:
+            return json.loads(data)
+        return None
+
+    async def publish_live_vital_async(self, user_id: str, vital_data: Dict[str, Any]) -> bool:
+        """Store the live vital and publish it to WebSocket subscribers in one round trip"""
+        vital_data['timestamp'] = datetime.utcnow().isoformat()
+        payload = json.dumps(vital_data)
+        async with self.async_client.pipeline(transaction=False) as pipe:
+            pipe.setex(f"live_vital:{user_id}", 300, payload)
+            pipe.publish(f"vital_updates:{user_id}", payload)
+            await pipe.execute()
+        return True
+    
     def store_vital_aggregate(self, user_id: str, period: str, aggregate_data: Dict[str, Any]) -> bool:
         """Store aggregated vital data for charts"""
         key = f"vital_aggregate:{user_id}:{period}"
@@ -40,6 +77,16 @@ class RedisService:
             return json.loads(data)
         return None
     
+    async def get_vital_aggregate_async(self, user_id: str, period: str) -> Optional[Dict[str, Any]]:
+        data = await self.async_client.get(f"vital_aggregate:{user_id}:{period}")
+        if data:
+            return json.loads(data)
+        return None
+
+    async def store_vital_aggregate_async(self, user_id: str, period: str, aggregate_data: Dict[str, Any]) -> bool:
+        await self.async_client.setex(f"vital_aggregate:{user_id}:{period}", 3600, json.dumps(aggregate_data))
+        return True
+    
     def store_device_status(self, device_id: str, status: Dict[str, Any]) -> bool:
         """Store device connection status"""
         key = f"device_status:{device_id}"
@@ -60,5 +107,69 @@ class RedisService:
         self.redis_client.publish(channel, json.dumps(vital_data))
         return True
 
+    def publish_alert(self, user_id: str, alert: Dict[str, Any]) -> bool:
+        """Publish a health alert to the recipient's alert sockets"""
+        channel = f"alerts:{user_id}"
+        self.redis_client.publish(channel, json.dumps(alert))
+        return True
+
+    def claim_alert_cooldown(self, user_id: str, alert_type: str, ttl_seconds: int) -> bool:
+        """Start an alert cooldown window; False if one is already running for this user and type"""
+        return bool(self.redis_client.set(f"alert_cooldown:{user_id}:{alert_type}", 1, nx=True, ex=max(1, ttl_seconds)))
+
+    def revoke_token(self, jti: str, ttl_seconds: int) -> bool:
+        """Add a token ID to the revocation list until the token would expire anyway"""
+        self.redis_client.setex(f"revoked_jti:{jti}", max(1, ttl_seconds), 1)
+        return True
+
+    def consume_token(self, jti: str, ttl_seconds: int) -> bool:
+        """Atomically mark a single-use token as spent; False if it was already used or revoked"""
+        return bool(self.redis_client.set(f"revoked_jti:{jti}", 1, nx=True, ex=max(1, ttl_seconds)))
+
+    def revoke_token_family(self, family: str, ttl_seconds: int) -> bool:
+        """Revoke every token issued from one login session"""
+        self.redis_client.setex(f"revoked_family:{family}", max(1, ttl_seconds), 1)
+        return True
+
+    def is_token_revoked(self, jti: str, family: Optional[str] = None) -> bool:
+        """Check the revocation list for a token and its session in one round trip"""
+        keys = [f"revoked_jti:{jti}"]
+        if family:
+            keys.append(f"revoked_family:{family}")
+        return self.redis_client.exists(*keys) > 0
+
+    async def is_token_revoked_async(self, jti: str, family: Optional[str] = None) -> bool:
+        keys = [f"revoked_jti:{jti}"]
+        if family:
+            keys.append(f"revoked_family:{family}")
+        return await self.async_client.exists(*keys) > 0
+
+    def _data_version_commands(self, pipe, user_ids: Iterable[str], scopes: Sequence[str]) -> None:
+        version = str(time.time_ns())
+        for user_id in user_ids:
+            key = f"data_version:{user_id}"
+            pipe.hset(key, mapping={scope: version for scope in scopes})
+            pipe.expire(key, settings.DATA_VERSION_TTL_SECONDS)
+
+    def touch_data_version(self, user_ids: Iterable[str], *scopes: str) -> bool:
+        """Record that the users' data in these scopes (vitals, ecg, ...) just changed"""
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            self._data_version_commands(pipe, user_ids, scopes)
+            pipe.execute()
+        return True
+
+    async def touch_data_version_async(self, user_ids: Iterable[str], *scopes: str) -> bool:
+        async with self.async_client.pipeline(transaction=False) as pipe:
+            self._data_version_commands(pipe, user_ids, scopes)
+            await pipe.execute()
+        return True
+
+    async def get_data_versions_async(self, user_ids: Sequence[str], scopes: Sequence[str]) -> List[List[Optional[str]]]:
+        """Per user, the last-change version of each scope (None if never written)"""
+        async with self.async_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.hmget(f"data_version:{user_id}", list(scopes))
+            return await pipe.execute()
+
 # Global Redis service instance
 redis_service = RedisService() 
\ No newline at end of file
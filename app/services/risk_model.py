@@ -0,0 +1,211 @@
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.vitals import Vital
+
+# Per-user rollup features over the scoring window, in model column order
+FEATURES = (
+    "heart_rate_avg", "heart_rate_std", "heart_rate_max",
+    "spo2_avg", "spo2_min",
+    "temperature_avg", "temperature_max",
+    "respiratory_rate_avg",
+    "blood_pressure_systolic_avg", "blood_pressure_diastolic_avg",
+)
+TARGETS = ("heart_health", "respiratory_health")
+
+def extract_features(db: Session, user_ids: Sequence[str], days: int = 7, now: datetime = None) -> np.ndarray:
+    """Roll up each user's recent vitals in one GROUP BY query.
+
+    Returns a (len(user_ids), len(FEATURES)) float matrix in the order of
+    user_ids; users or metrics without readings are NaN.
+    """
+    since = (now or datetime.utcnow()) - timedelta(days=days)
+
+    def present(column):
+        # Zero readings are treated as missing, as elsewhere in analytics
+        return case((column != 0, column))
+
+    hr = present(Vital.heart_rate)
+    query = db.query(
+        Vital.user_id,
+        func.avg(hr), func.avg(hr * hr), func.max(hr),
+        func.avg(present(Vital.spo2)), func.min(present(Vital.spo2)),
+        func.avg(present(Vital.temperature)), func.max(present(Vital.temperature)),
+        func.avg(present(Vital.respiratory_rate)),
+        func.avg(present(Vital.blood_pressure_systolic)), func.avg(present(Vital.blood_pressure_diastolic)),
+    ).filter(
+        Vital.user_id.in_(list(user_ids)),
+        Vital.timestamp >= since
+    ).group_by(Vital.user_id)
+
+    matrix = np.full((len(user_ids), len(FEATURES)), np.nan)
+    index = {str(user_id): i for i, user_id in enumerate(user_ids)}
+    for row in query.all():
+        hr_avg, hr_sq, hr_max = row[1], row[2], row[3]
+        hr_std = math.sqrt(max(hr_sq - hr_avg * hr_avg, 0.0)) if hr_avg is not None else None
+        values = [hr_avg, hr_std, hr_max, *row[4:]]
+        matrix[index[str(row.user_id)]] = [np.nan if v is None else float(v) for v in values]
+    return matrix
+
+class LogisticRiskModel:
+    """Independent L2-regularised logistic regressions, one per target.
+
+    Inputs are standardised with the training mean/scale and missing values
+    are imputed with the training mean, so scoring is a single matrix product.
+    """
+
+    def __init__(self, features: Sequence[str] = FEATURES, targets: Sequence[str] = TARGETS):
+        self.features = tuple(features)
+        self.targets = tuple(targets)
+        self.mean = np.zeros(len(self.features))
+        self.scale = np.ones(len(self.features))
+        self.weights = np.zeros((len(self.features), len(self.targets)))
+        self.bias = np.zeros(len(self.targets))
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        X = np.where(np.isnan(X), self.mean, X)
+        return (X - self.mean) / self.scale
+
+    def fit(self, X: np.ndarray, Y: np.ndarray, l2: float = 1e-3, learning_rate: float = 0.5, epochs: int = 500):
+        self.mean = np.nanmean(X, axis=0)
+        self.scale = np.nanstd(X, axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Z = self._standardize(X)
+        n = len(Z)
+        for _ in range(epochs):
+            P = self._sigmoid(Z @ self.weights + self.bias)
+            error = P - Y
+            self.weights -= learning_rate * (Z.T @ error / n + l2 * self.weights)
+            self.bias -= learning_rate * error.mean(axis=0)
+        return self
+
+    @staticmethod
+    def _sigmoid(logits: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-np.clip(logits, -30, 30)))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """(n, targets) risk probabilities for a batch of feature rows"""
+        return self._sigmoid(self._standardize(np.atleast_2d(X)) @ self.weights + self.bias)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "logistic_regression",
+            "features": list(self.features),
+            "targets": list(self.targets),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "weights": self.weights.tolist(),
+            "bias": self.bias.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogisticRiskModel":
+        model = cls(data["features"], data["targets"])
+        model.mean = np.array(data["mean"])
+        model.scale = np.array(data["scale"])
+        model.weights = np.array(data["weights"])
+        model.bias = np.array(data["bias"])
+        return model
+
+class ModelRegistry:
+    """Versioned models on disk: <root>/<name>/<version>/model.json plus a LATEST pointer"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def save(self, name: str, model: LogisticRiskModel, metrics: Dict[str, Any] = None) -> str:
+        version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        path = os.path.join(self.root, name, version)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "model.json"), "w") as f:
+            json.dump({
+                "name": name,
+                "version": version,
+                "trained_at": datetime.utcnow().isoformat(),
+                "metrics": metrics or {},
+                "model": model.to_dict()
+            }, f, indent=2)
+        with open(os.path.join(self.root, name, "LATEST"), "w") as f:
+            f.write(version)
+        return version
+
+    def latest_version(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, name, "LATEST")) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def load(self, name: str, version: str = None) -> Tuple[LogisticRiskModel, Dict[str, Any]]:
+        version = version or self.latest_version(name)
+        if version is None:
+            raise FileNotFoundError(f"No registered versions of model '{name}'")
+        with open(os.path.join(self.root, name, version, "model.json")) as f:
+            record = json.load(f)
+        return LogisticRiskModel.from_dict(record.pop("model")), record
+
+class RiskModelCache:
+    """Loads the registered risk model once per worker process"""
+
+    MODEL_NAME = "health_risk"
+
+    def __init__(self, registry: ModelRegistry):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._loaded: Optional[Tuple[LogisticRiskModel, Dict[str, Any]]] = None
+
+    def get(self) -> Optional[Tuple[LogisticRiskModel, Dict[str, Any]]]:
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    try:
+                        self._loaded = self.registry.load(self.MODEL_NAME)
+                    except FileNotFoundError:
+                        return None
+        return self._loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded = None
+
+def risk_level(probability: float) -> str:
+    if probability >= 0.5:
+        return "high"
+    if probability >= 0.2:
+        return "moderate"
+    return "low"
+
+def score_users(db: Session, user_ids: Sequence[str]) -> List[Dict[str, Any]]:
+    """Batch-score users: one rollup query and one matrix product for the whole list"""
+    loaded = risk_model_cache.get()
+    if loaded is None:
+        return [{"predictions": {}, "confidence_scores": {}, "model_version": None} for _ in user_ids]
+
+    model, record = loaded
+    X = extract_features(db, user_ids)
+    has_data = ~np.isnan(X).all(axis=1)
+    probabilities = model.predict_proba(X)
+
+    results = []
+    for row, available in zip(probabilities, has_data):
+        if not available:
+            results.append({"predictions": {}, "confidence_scores": {}, "model_version": record["version"]})
+            continue
+        results.append({
+            "predictions": {f"{target}_risk": risk_level(p) for target, p in zip(model.targets, row)},
+            "risk_probabilities": {target: round(float(p), 4) for target, p in zip(model.targets, row)},
+            "confidence_scores": {target: round(float(max(p, 1 - p)), 2) for target, p in zip(model.targets, row)},
+            "model_version": record["version"]
+        })
+    return results
+
+# Global model registry and per-process model cache
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+risk_model_cache = RiskModelCache(model_registry)
@@ -1,6 +1,7 @@
 import random
 import string
 from typing import Optional
+from app.services.notifications import notification_dispatcher, Message
 
 class SMSService:
     @staticmethod
@@ -11,18 +12,20 @@ class SMSService:
     @staticmethod
     def send_otp(phone_number: str, otp_code: str) -> bool:
         """
-        Send OTP via SMS
-        In production, integrate with Twilio, AWS SNS, or similar service
+        Queue OTP via SMS
+        The provider is configured on the notification dispatcher (SMS_WEBHOOK_URL)
         """
-        # Mock implementation for development
-        print(f"SMS OTP sent to {phone_number}: {otp_code}")
+        notification_dispatcher.submit(Message(
+            channel="sms",
+            recipient=phone_number,
+            body=f"Your verification code is {otp_code}"
+        ))
         return True
     
     @staticmethod
-    def send_emergency_alert(phone_number: str, message: str) -> bool:
+    def send_emergency_alert(phone_number: str, message: str, on_complete=None) -> bool:
         """
-        Send emergency alert via SMS
+        Queue emergency alert via SMS
         """
-        # Mock implementation for development
-        print(f"Emergency SMS sent to {phone_number}: {message}")
-        return True 
\ No newline at end of file
+        notification_dispatcher.submit(Message(channel="sms", recipient=phone_number, body=message), on_complete)
+        return True 
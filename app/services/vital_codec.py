@@ -0,0 +1,211 @@
+"""Fixed-layout binary encoding for device vital readings.
+
+Devices can post readings as application/vnd.mekaaz.vitals instead of JSON.
+The body is little-endian:
+
+    offset  size   field
+    0       4      magic b"MKV1"
+    4       1      N, length of the device ID
+    5       N      device ID, UTF-8
+    5+N     24*k   k readings laid out as RECORD_DTYPE
+
+A b"MKV2" payload carries the device's state between the device ID and the
+readings:
+
+    5+N     1      battery level in percent, 255 if absent
+    6+N     1      RSSI in dBm (signed), -128 if absent
+    7+N     1      F, length of the firmware version (0 if absent)
+    8+N     F      firmware version, UTF-8
+    8+N+F   24*k   k readings
+
+Absent values carry the all-ones sentinel of their field (-32768 for
+temperature). spo2 is sent in tenths of a percent and temperature in
+hundredths of a degree. A zero timestamp means "now" on the server;
+negative ones and ones past year 9999 are rejected.
+
+The readings are decoded with one np.frombuffer into the per-metric
+float columns HealthAnalysisService.analyze_vital_batch takes, with NaN
+where a value is absent. JSON batches are converted into the same
+VitalBatch.
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from app.services.health_analysis_service import HealthAnalysisService
+
+MEDIA_TYPE = "application/vnd.mekaaz.vitals"
+MAGIC = b"MKV1"
+TELEMETRY_MAGIC = b"MKV2"
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp_ms", "<i8"),
+    ("heart_rate", "<u2"),
+    ("spo2", "<u2"),
+    ("temperature", "<i2"),
+    ("blood_pressure_systolic", "<u2"),
+    ("blood_pressure_diastolic", "<u2"),
+    ("respiratory_rate", "<u2"),
+    ("steps", "<u4"),
+])
+
+# The same layout for unpacking a single record without numpy
+RECORD_STRUCT = struct.Struct("<qHHhHHHI")
+# Battery and RSSI in an MKV2 header
+TELEMETRY_STRUCT = struct.Struct("<Bb")
+NO_TELEMETRY = {"battery_level": None, "rssi": None, "firmware_version": None}
+
+METRICS = ("heart_rate", "spo2", "temperature", "steps", "blood_pressure_systolic",
+           "blood_pressure_diastolic", "respiratory_rate")
+INTEGER_METRICS = {"heart_rate", "steps", "blood_pressure_systolic", "blood_pressure_diastolic", "respiratory_rate"}
+REQUIRED_METRICS = ("heart_rate", "spo2")
+# Latest timestamp a datetime can hold, in ms since the epoch
+MAX_TIMESTAMP_MS = (datetime.max - datetime(1970, 1, 1)) // timedelta(milliseconds=1)
+SCALE = {"spo2": 10, "temperature": 100}
+MISSING = {name: -32768 if RECORD_DTYPE[name].kind == "i" else np.iinfo(RECORD_DTYPE[name]).max
+           for name in METRICS}
+
+class VitalBatch(NamedTuple):
+    """Readings from one device as columns, oldest first"""
+    device_id: str
+    columns: Dict[str, np.ndarray]
+    timestamps: List[datetime]
+    telemetry: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def readings(self) -> List[Dict[str, Any]]:
+        """Row dicts in the shape the JSON ingest path produces (None for absent values)"""
+        rows = [{"device_id": self.device_id, "timestamp": ts} for ts in self.timestamps]
+        for metric in METRICS:
+            values = self.columns[metric].tolist()
+            integer = metric in INTEGER_METRICS
+            for row, value in zip(rows, values):
+                row[metric] = None if value != value else int(value) if integer else value
+        return rows
+
+def _telemetry(body: bytes, offset: int):
+    """(device state from an MKV2 header, offset just past it)"""
+    if len(body) < offset + 3:
+        raise ValueError("Truncated vitals payload")
+    battery, rssi = TELEMETRY_STRUCT.unpack_from(body, offset)
+    if battery > 100 and battery != 255 or rssi > 0:
+        raise ValueError("Battery level or RSSI out of range")
+    end = offset + 3 + body[offset + 2]
+    try:
+        firmware = body[offset + 3:end].decode()
+    except UnicodeDecodeError:
+        raise ValueError("Firmware version is not UTF-8")
+    telemetry = {
+        "battery_level": None if battery == 255 else battery,
+        "rssi": None if rssi == -128 else rssi,
+        "firmware_version": firmware or None,
+    }
+    return telemetry, end
+
+def _header(body: bytes):
+    """(device ID, device state, offset of the first reading, reading count)"""
+    if len(body) < 5 or body[:4] not in (MAGIC, TELEMETRY_MAGIC):
+        raise ValueError("Not a vitals payload")
+    offset = 5 + body[4]
+    try:
+        device_id = body[5:offset].decode()
+    except UnicodeDecodeError:
+        raise ValueError("Device ID is not UTF-8")
+    if not device_id or len(body) < offset:
+        raise ValueError("Truncated vitals payload")
+    telemetry = NO_TELEMETRY
+    if body[:4] == TELEMETRY_MAGIC:
+        telemetry, offset = _telemetry(body, offset)
+    if len(body) < offset or (len(body) - offset) % RECORD_DTYPE.itemsize:
+        raise ValueError("Truncated vitals payload")
+    count = (len(body) - offset) // RECORD_DTYPE.itemsize
+    if not count:
+        raise ValueError("No readings in payload")
+    return device_id, telemetry, offset, count
+
+def decode(body: bytes, now: datetime = None) -> VitalBatch:
+    """Parse an application/vnd.mekaaz.vitals body; ValueError if it is malformed"""
+    device_id, telemetry, offset, _ = _header(body)
+    records = np.frombuffer(body, dtype=RECORD_DTYPE, offset=offset)
+
+    columns = {}
+    for metric in METRICS:
+        raw = records[metric]
+        column = raw.astype(np.float64)
+        column[raw == MISSING[metric]] = np.nan
+        if metric in SCALE:
+            column /= SCALE[metric]
+        columns[metric] = column
+    for metric in REQUIRED_METRICS:
+        if np.isnan(columns[metric]).any():
+            raise ValueError(f"{metric} is required on every reading")
+
+    millis = records["timestamp_ms"]
+    if ((millis < 0) | (millis > MAX_TIMESTAMP_MS)).any():
+        raise ValueError("Timestamp out of range")
+    timestamps = millis.astype("datetime64[ms]").tolist()
+    now = now or datetime.utcnow()
+    return VitalBatch(device_id, columns, [ts if ms else now for ts, ms in zip(timestamps, millis.tolist())], telemetry)
+
+def decode_reading(body: bytes, now: datetime = None) -> Dict[str, Any]:
+    """decode() for a one-reading body, straight to its row dict
+
+    The single-reading ingest runs every 2 s per device; unpacking one record
+    with struct is much cheaper than setting up numpy columns for it.
+    """
+    device_id, telemetry, offset, count = _header(body)
+    if count != 1:
+        raise ValueError("Expected exactly one reading")
+    reading = {"device_id": device_id}
+    for name, raw in zip(RECORD_DTYPE.names, RECORD_STRUCT.unpack_from(body, offset)):
+        if name == "timestamp_ms":
+            if not 0 <= raw <= MAX_TIMESTAMP_MS:
+                raise ValueError("Timestamp out of range")
+            reading["timestamp"] = datetime(1970, 1, 1) + timedelta(milliseconds=raw) if raw else now or datetime.utcnow()
+        elif raw == MISSING[name]:
+            reading[name] = None
+        else:
+            reading[name] = raw / SCALE[name] if name in SCALE else raw
+    for metric in REQUIRED_METRICS:
+        if reading[metric] is None:
+            raise ValueError(f"{metric} is required on every reading")
+    if telemetry is not NO_TELEMETRY:
+        reading.update(telemetry)
+    return reading
+
+def encode(device_id: str, readings: Sequence[Dict[str, Any]], telemetry: Dict[str, Any] = None) -> bytes:
+    """Build a payload the way a device would, e.g. for tests and benchmarks
+
+    Passing telemetry produces an MKV2 payload.
+    """
+    device = device_id.encode()
+    records = np.zeros(len(readings), dtype=RECORD_DTYPE)
+    for i, reading in enumerate(readings):
+        timestamp = reading.get("timestamp")
+        records[i]["timestamp_ms"] = int((timestamp - datetime(1970, 1, 1)).total_seconds() * 1000) if timestamp else 0
+        for metric in METRICS:
+            value = reading.get(metric)
+            records[i][metric] = MISSING[metric] if value is None else round(value * SCALE.get(metric, 1))
+    if telemetry is None:
+        return MAGIC + bytes([len(device)]) + device + records.tobytes()
+    battery, rssi = telemetry.get("battery_level"), telemetry.get("rssi")
+    firmware = (telemetry.get("firmware_version") or "").encode()
+    state = TELEMETRY_STRUCT.pack(255 if battery is None else battery, -128 if rssi is None else rssi)
+    return TELEMETRY_MAGIC + bytes([len(device)]) + device + state + bytes([len(firmware)]) + firmware + records.tobytes()
+
+def from_readings(device_id: str, readings: Sequence[Dict[str, Any]], now: datetime = None,
+                  telemetry: Dict[str, Any] = None) -> VitalBatch:
+    """The VitalBatch for validated JSON readings"""
+    columns = HealthAnalysisService.columns_from_records(readings)
+    columns.update({metric: np.asarray([r.get(metric) for r in readings], dtype=np.float64)
+                    for metric in METRICS if metric not in columns})
+    now = now or datetime.utcnow()
+    timestamps = []
+    for reading in readings:
+        timestamp = reading.get("timestamp") or now
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        timestamps.append(timestamp)
+    return VitalBatch(device_id, columns, timestamps, telemetry)
@@ -1,10 +1,18 @@
 # app/tests/conftest.py
+import uuid
 import pytest
+import redis
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.core.database import (Base, SessionLocal, AsyncSessionLocal, get_db, get_async_db, get_read_db,
+                               get_async_read_db)
+from app.jobs.migrate import migrate
 from app.main import app
+from app.models.user import User, UserRole
+from app.services.alert_service import AlertService
 
 # Use SQLite test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -19,7 +27,23 @@ def override_get_db():
     finally:
         db.close()
 
+# TestClient may run each request on a fresh event loop, so async connections are not pooled
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+# Code that opens its own sessions (alert executor, SOS delivery, jobs) must see the same database
+SessionLocal.configure(bind=engine, replicas=[])
+AsyncSessionLocal.configure(bind=async_engine, replicas=[])
+AlertService.session_factory = TestingSessionLocal
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_async_read_db] = override_get_async_db
 client = TestClient(app)
 
 @pytest.fixture(scope="session")
@@ -28,10 +52,52 @@ def test_client():
 
 @pytest.fixture(autouse=True)
 def setup_database():
-    Base.metadata.create_all(bind=engine)
+    # Start from a clean schema even if test.db was left over from an older model
+    Base.metadata.drop_all(bind=engine)
+    migrate(engine)
     yield
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def db():
+    """Session on the test database, for seeding and checking rows"""
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def make_user(db):
+    """Factory for committed patients; keyword arguments override the User columns"""
+    def make(**fields):
+        user = User(**{"email": f"user_{uuid.uuid4().hex[:8]}@example.com", "hashed_password": "x", "name": "Ada",
+                       "role": UserRole.PATIENT, **fields})
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+@pytest.fixture
+def redis_client():
+    """Live Redis connection; tests that need one are skipped when it is not running"""
+    from app.services.redis_service import redis_service
+    try:
+        redis_service.redis_client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis not available")
+    return redis_service.redis_client
+
+@pytest.fixture
+def fake_transports(monkeypatch):
+    """Route every notification channel to an in-memory transport"""
+    from app.services.notifications import notification_dispatcher, FakeTransport
+    fakes = {channel: FakeTransport(channel) for channel in ("sms", "email", "push")}
+    previous = [notification_dispatcher.register(fake) for fake in fakes.values()]
+    monkeypatch.setattr(notification_dispatcher, "retry_base_seconds", 0)
+    yield fakes
+    notification_dispatcher.join(timeout=5)
+    for transport in previous:
+        notification_dispatcher.register(transport)
+
 
 # import pytest
 # import requests
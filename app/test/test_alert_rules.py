@@ -0,0 +1,63 @@
+# app/test/test_alert_rules.py
+import uuid
+import pytest
+from pydantic import ValidationError
+from app.models.alert_rule import AlertRule
+from app.schemas.alert_rule import AlertRuleCreate, AlertRuleUpdate
+from app.services.alert_rules import alert_rule_engine
+
+
+@pytest.fixture
+def user_id(make_user):
+    return str(make_user(name="Rae").id)
+
+
+def add_rule(db, user_id, **fields):
+    rule = AlertRule(id=uuid.uuid4(), user_id=user_id, name=fields.pop("name", "rule"), **fields)
+    db.add(rule)
+    db.commit()
+    alert_rule_engine.invalidate(user_id)
+    return str(rule.id)
+
+
+def test_threshold_rule_and_cache_invalidation(db, user_id):
+    add_rule(db, user_id, metric="heart_rate", operator="gt", threshold=90)
+    assert len(alert_rule_engine.evaluate(db, user_id, {"heart_rate": 95})) == 1
+    assert alert_rule_engine.evaluate(db, user_id, {"heart_rate": 85}) == []
+
+    db.query(AlertRule).filter_by(user_id=user_id).update({"threshold": 99})
+    db.commit()
+    # Cached rules are reused until the change is announced
+    assert len(alert_rule_engine.evaluate(db, user_id, {"heart_rate": 95})) == 1
+    alert_rule_engine.invalidate(user_id)
+    assert alert_rule_engine.evaluate(db, user_id, {"heart_rate": 95}) == []
+
+
+def test_sustained_and_rate_of_change_rules(db, user_id, redis_client):
+    sustained = add_rule(db, user_id, metric="heart_rate", rule_type="sustained", operator="gt",
+                         threshold=100, duration_seconds=10)
+    falling = add_rule(db, user_id, metric="spo2", rule_type="rate_of_change", operator="lt",
+                       threshold=3, duration_seconds=30)
+
+    def fired(now, **vitals):
+        return {a["type"].split(":", 1)[1] for a in alert_rule_engine.evaluate(db, user_id, vitals, now=now)}
+
+    assert fired(1000, heart_rate=110, spo2=98) == set()
+    assert fired(1005, heart_rate=112, spo2=97) == set()
+    assert fired(1010, heart_rate=115, spo2=94) == {sustained, falling}
+    # A normal reading resets the sustained window
+    assert fired(1012, heart_rate=80, spo2=94) == {falling}
+    assert fired(1014, heart_rate=120, spo2=94) == {falling}
+    # The drop has aged out of the 30 second window
+    assert fired(1050, heart_rate=120, spo2=94) == {sustained}
+
+
+def test_rule_schema_rejects_bad_windows():
+    base = {"name": "r", "metric": "heart_rate", "threshold": 100}
+    assert AlertRuleCreate(**base).duration_seconds == 0
+    assert AlertRuleCreate(**base, rule_type="sustained", duration_seconds=60).duration_seconds == 60
+    for bad in ({"duration_seconds": -5}, {"rule_type": "sustained"}, {"rule_type": "rate_of_change", "duration_seconds": 0}):
+        with pytest.raises(ValidationError):
+            AlertRuleCreate(**base, **bad)
+    with pytest.raises(ValidationError):
+        AlertRuleUpdate(duration_seconds=-1)
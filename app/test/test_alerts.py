@@ -0,0 +1,64 @@
+# app/test/test_alerts.py
+import time
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from app.core.security import create_access_token
+from app.controllers.health_controller import HealthController
+from app.models.family import FamilyMember
+from app.models.notification import Notification
+from app.services.alert_service import AlertService
+from app.services.notifications import notification_dispatcher
+
+
+@pytest.fixture
+def patient_with_family(db, make_user):
+    patient, relative = make_user(name="Ana"), make_user(name="Ben")
+    db.add_all([
+        FamilyMember(owner_id=patient.id, member_id=patient.id, role="owner"),
+        FamilyMember(owner_id=patient.id, member_id=relative.id),
+    ])
+    db.commit()
+    return str(patient.id), str(relative.id)
+
+
+def test_alert_pipeline_persists_fans_out_and_cools_down(db, patient_with_family, fake_transports):
+    patient_id, relative_id = patient_with_family
+
+    raised = AlertService.process_vital(db, patient_id, {"heart_rate": 110, "spo2": 98})
+    assert [a["type"] for a in raised] == ["heart_rate_high"]
+
+    # Same alert again inside the cooldown window is suppressed
+    assert AlertService.process_vital(db, patient_id, {"heart_rate": 112}) == []
+    # ...but escalating to critical still alerts
+    assert [a["severity"] for a in AlertService.process_vital(db, patient_id, {"heart_rate": 130})] == ["critical"]
+
+    rows = db.query(Notification).filter_by(notification_type="health_alert").all()
+    assert sorted(str(r.user_id) for r in rows) == sorted([patient_id, patient_id, relative_id, relative_id])
+    assert all(str(r.subject_user_id) == patient_id for r in rows)
+
+    notification_dispatcher.join(timeout=5)
+    assert {m.recipient for m in fake_transports["push"].sent} == {patient_id, relative_id}
+
+    alerts = HealthController.get_health_alerts(db, patient_id)
+    assert alerts["total_alerts"] == 2 and alerts["unread_count"] == 2
+    assert alerts["alerts"][0]["severity"] == "critical"
+
+
+def test_alert_socket_requires_owner_or_family_token(test_client, patient_with_family, make_user, redis_client):
+    patient_id, relative_id = patient_with_family
+    stranger = make_user(name="Cy")
+
+    for query in ("", f"?token={create_access_token({'sub': str(stranger.id)})}", "?token=garbage"):
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with test_client.websocket_connect(f"/ws/alerts/{patient_id}{query}") as socket:
+                socket.receive_text()
+        assert exc.value.code == 1008
+
+    for viewer in (patient_id, relative_id):
+        with test_client.websocket_connect(f"/ws/alerts/{patient_id}?token={create_access_token({'sub': viewer})}") as socket:
+            # Subscribed once the first publish reaches a listener
+            for _ in range(50):
+                if redis_client.publish(f"alerts:{patient_id}", '{"type": "heart_rate_high"}'):
+                    break
+                time.sleep(0.02)
+            assert socket.receive_json() == {"type": "heart_rate_high"}
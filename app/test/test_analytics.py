@@ -0,0 +1,49 @@
+# app/test/test_analytics.py
+import uuid
+from datetime import datetime, timedelta
+from app.controllers.analytics_controller import AnalyticsController
+from app.models.vitals import Vital
+
+
+def test_compare_health_data_covers_both_periods_and_all_metrics(db, make_user):
+    user = make_user(name="Cy")
+    now = datetime.utcnow()
+
+    def add(days_ago, **fields):
+        db.add(Vital(id=uuid.uuid4(), user_id=user.id, timestamp=now - timedelta(days=days_ago), **fields))
+
+    add(1, heart_rate=70, spo2=98, temperature=36.8, respiratory_rate=14)
+    add(2, heart_rate=80, spo2=96, temperature=None, respiratory_rate=0)  # zero is ignored
+    add(9, heart_rate=90, spo2=94, temperature=37.8, respiratory_rate=20)
+    add(20, heart_rate=200)  # outside both periods
+    db.commit()
+
+    metrics = AnalyticsController.compare_health_data(db, str(user.id), "week")["metrics"]
+
+    assert set(metrics) == set(AnalyticsController.COMPARISON_METRICS)
+    assert metrics["heart_rate"] == {"current": 75.0, "previous": 90.0, "change": -15.0, "trend": "improving"}
+    assert metrics["spo2"]["current"] == 97.0 and metrics["spo2"]["trend"] == "improving"
+    assert metrics["temperature"]["trend"] == "improving"
+    assert metrics["respiratory_rate"]["current"] == 14.0
+    assert metrics["steps"] == {"current": 0.0, "previous": 0.0, "change": 0.0, "trend": "stable"}
+
+
+def test_nightly_snapshot_is_served_by_endpoints(db, make_user):
+    from app.jobs import nightly_analytics
+
+    user = make_user(name="Di")
+    db.add(Vital(id=uuid.uuid4(), user_id=user.id, heart_rate=130, spo2=97, timestamp=datetime.utcnow()))
+    db.commit()
+    user_id = str(user.id)
+
+    live = AnalyticsController.get_snapshot_section(db, user_id, "patterns", AnalyticsController.analyze_health_patterns)
+    assert live["snapshot_at"] is None
+
+    assert nightly_analytics.run(workers=0) >= 1
+
+    db.expire_all()
+    predictive = AnalyticsController.get_snapshot_section(db, user_id, "predictive", AnalyticsController.get_predictive_health)
+    assert predictive["snapshot_at"] is not None
+    assert predictive["risk_scores"] == {"readings": 1, "anomaly_rate": 1.0, "critical_rate": 1.0, "period_days": 7}
+    comparison = AnalyticsController.get_snapshot_section(db, user_id, "comparison:week", None)
+    assert comparison["metrics"]["heart_rate"]["current"] == 130.0
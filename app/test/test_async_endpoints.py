@@ -0,0 +1,80 @@
+# app/test/test_async_endpoints.py
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app.core.database import to_async_url
+from app.core.security import create_access_token
+from app.models.device import Device
+from app.models.emergency_contact import EmergencyContact
+from app.models.notification import Notification
+from app.models.sos import SOSNotification
+from app.models.vitals import Vital
+from app.services.notifications import notification_dispatcher
+
+
+@pytest.fixture
+def patient(make_user):
+    user = make_user()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    return str(user.id), headers
+
+
+def test_to_async_url():
+    assert to_async_url("postgresql://u:p@db:5432/mekaaz") == "postgresql+asyncpg://u:p@db:5432/mekaaz"
+    assert to_async_url("postgresql+psycopg2://u:p@db/mekaaz") == "postgresql+asyncpg://u:p@db/mekaaz"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_history_and_unread_count_on_async_session(test_client, db, patient):
+    user_id, headers = patient
+    now = datetime.utcnow()
+    db.add_all([
+        Vital(user_id=user_id, heart_rate=70 + i, spo2=98, timestamp=now - timedelta(minutes=i))
+        for i in range(5)
+    ])
+    db.add_all([
+        Notification(user_id=user_id, title="t", message="m", notification_type="info", is_read=i == 0)
+        for i in range(3)
+    ])
+    db.commit()
+
+    resp = test_client.get("/vitals/history?limit=3", headers=headers)
+    assert resp.status_code == 200
+    assert [v["heart_rate"] for v in resp.json()] == [70, 71, 72]
+
+    resp = test_client.get("/notifications/unread-count", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["unread_count"] == 2
+
+    assert test_client.get("/vitals/history").status_code == 401
+
+
+def test_ingest_live_charts_and_sos(test_client, db, patient, redis_client, fake_transports):
+    user_id, headers = patient
+    db.add(Device(user_id=user_id, device_id="async-watch", device_type="watch", is_connected=True))
+    db.add(EmergencyContact(id=str(uuid.uuid4()), user_id=user_id, name="Contact", phone="+10000000009"))
+    db.commit()
+    redis_client.delete(f"vital_aggregate:{user_id}:hour")
+
+    resp = test_client.post("/vitals/ingest", json={"device_id": "async-watch", "heart_rate": 72, "spo2": 98}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["health_condition"] == "normal"
+    assert test_client.post("/vitals/ingest", json={"device_id": "other", "heart_rate": 72, "spo2": 98}, headers=headers).status_code == 400
+
+    live = test_client.get("/vitals/live", headers=headers)
+    assert live.status_code == 200
+    assert live.json()["heart_rate"] == 72
+
+    charts = test_client.get("/vitals/charts/hour", headers=headers)
+    assert charts.status_code == 200
+    assert charts.json()["data"][0]["heart_rate_avg"] == 72
+
+    sos = test_client.post("/sos/trigger", json={"emergency_type": "fall"}, headers=headers)
+    assert sos.status_code == 200
+    assert '"heart_rate": 72' in sos.json()["vital_data"]
+    assert test_client.post("/sos/trigger", json={"emergency_type": "fall"}, headers=headers).status_code == 400
+
+    notification_dispatcher.join(timeout=5)
+    assert [m.recipient for m in fake_transports["sms"].sent] == ["+10000000009"]
+    db.expire_all()
+    assert db.query(SOSNotification).one().delivery_status == "delivered"
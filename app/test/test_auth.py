@@ -1,5 +1,9 @@
 # app/tests/test_auth.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pytest
+from fastapi import HTTPException
+from app.core.password_hasher import PasswordHasher
 from app.models.user import UserRole, LanguageEnum
 
 def test_signup_success(test_client):
@@ -38,6 +42,104 @@ def test_login_success(test_client):
     assert "refresh_token" in data
 
 
+def test_profile_update_invalidates_cached_user(test_client):
+    signup_data = {
+        "email": "auth_cache@example.com",
+        "password": "testpassword123",
+        "name": "Before",
+        "role": UserRole.PATIENT.value,
+        "phone_number": "+1234567811",
+        "language": LanguageEnum.EN.value
+    }
+    token = test_client.post("/auth/signup", json=signup_data).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Warm the principal cache, then update through the cached instance
+    assert test_client.get("/user/me", headers=headers).json()["name"] == "Before"
+    update = {"name": "After", "phone_number": None, "language": None}
+    assert test_client.patch("/user/profile", json=update, headers=headers).status_code == 200
+
+    assert test_client.get("/user/me", headers=headers).json()["name"] == "After"
+
+
+def test_refresh_token_is_not_an_access_token(test_client):
+    signup_data = {
+        "email": "auth_refresh@example.com",
+        "password": "testpassword123",
+        "name": "Refresh User",
+        "role": UserRole.PATIENT.value,
+        "phone_number": "+1234567812",
+        "language": LanguageEnum.EN.value
+    }
+    tokens = test_client.post("/auth/signup", json=signup_data).json()
+
+    headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert test_client.get("/user/me", headers=headers).status_code == 401
+
+    # Access tokens cannot be used to refresh either
+    response = test_client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+def test_refresh_rotation_and_replay_revokes_family(test_client, redis_client):
+    signup_data = {
+        "email": "auth_rotate@example.com",
+        "password": "testpassword123",
+        "name": "Rotate User",
+        "role": UserRole.PATIENT.value,
+        "phone_number": "+1234567813",
+        "language": LanguageEnum.EN.value
+    }
+    original = test_client.post("/auth/signup", json=signup_data).json()
+
+    response = test_client.post("/auth/refresh", json={"refresh_token": original["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != original["refresh_token"]
+    assert rotated["access_token"] != original["access_token"]
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert test_client.get("/user/me", headers=headers).status_code == 200
+
+    # Replaying the consumed refresh token is treated as theft
+    response = test_client.post("/auth/refresh", json={"refresh_token": original["refresh_token"]})
+    assert response.status_code == 401
+
+    # ...which revokes the whole family, including the pair issued by the rotation
+    response = test_client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+    assert test_client.get("/user/me", headers=headers).status_code == 401
+
+def test_password_hasher_sheds_load_when_saturated():
+    hasher = PasswordHasher(workers=0, max_pending=1, timeout_seconds=1)
+    assert hasher.verify("secret", hasher.hash("secret"))
+
+    hasher._slots.acquire()  # simulate an in-flight hash holding the only slot
+    with pytest.raises(HTTPException) as exc:
+        hasher.hash("secret")
+
+    assert exc.value.status_code == 503
+    assert hasher.metrics()["rejected"] == 1
+    assert hasher.metrics()["completed"] == 2
+
+def test_password_hasher_times_out_with_503():
+    hasher = PasswordHasher(workers=1, max_pending=2, timeout_seconds=0.05)
+    hasher._executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    try:
+        with pytest.raises(HTTPException) as exc:
+            hasher._run(release.wait, 5)
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "1"
+
+        # Still queued behind the first job when it times out: cancelled and its slot freed
+        with pytest.raises(HTTPException):
+            hasher._run(release.wait, 5)
+        assert hasher.metrics()["pending"] == 1
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert hasher.metrics()["pending"] == 0
+
+
 
 
 # import pytest
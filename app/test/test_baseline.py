@@ -0,0 +1,39 @@
+# app/test/test_baseline.py
+import statistics
+import uuid
+from app.services.baseline_service import baseline_detector
+
+
+def test_baseline_scores_against_own_history(redis_client):
+    user_id = str(uuid.uuid4())
+    history = [70 + (i % 5) - 2 for i in range(40)]
+    for value in history:
+        baseline_detector.score(user_id, {"heart_rate": value})
+
+    normal, = baseline_detector.score(user_id, {"heart_rate": 72})
+    assert normal.z_score is not None and not normal.is_anomaly
+
+    spike, = baseline_detector.score(user_id, {"heart_rate": 110})
+    assert spike.is_anomaly and spike.z_score > 3
+
+    baseline = baseline_detector.get_baseline(user_id)["heart_rate"]
+    readings = history + [72, 110]
+    assert baseline.count == len(readings)
+    assert abs(baseline.mean - statistics.mean(readings)) < 1e-9
+    assert abs(baseline.variance - statistics.variance(readings)) < 1e-9
+
+
+def test_baseline_warmup_never_flags(redis_client):
+    user_id = str(uuid.uuid4())
+    first, = baseline_detector.score(user_id, {"spo2": 80})
+    assert first.z_score is None and not first.is_anomaly
+
+
+def test_baseline_ignores_zero_readings(redis_client):
+    user_id = str(uuid.uuid4())
+    for _ in range(40):
+        baseline_detector.score(user_id, {"heart_rate": 70, "spo2": 98})
+
+    scores = baseline_detector.score(user_id, {"heart_rate": 0, "spo2": 97})
+    assert [score.metric for score in scores] == ["spo2"]
+    assert baseline_detector.get_baseline(user_id)["heart_rate"].count == 40
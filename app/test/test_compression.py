@@ -0,0 +1,133 @@
+# app/test/test_compression.py
+import gzip
+import json
+from datetime import datetime, timedelta
+import brotli
+import pytest
+import zstandard
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from app.core.compression import CompressionMiddleware, decompress, negotiate, RequestBodyTooLarge
+from app.core.security import create_access_token
+from app.models.vitals import Vital
+
+
+def test_negotiate():
+    assert negotiate("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate("gzip, br;q=0.9") == "gzip"
+    assert negotiate("zstd;q=0, br") == "br"
+    assert negotiate("*") == "zstd"
+    assert negotiate("identity") is None
+    assert negotiate("") is None
+
+
+ENCODERS = {
+    "gzip": gzip.compress,
+    "zstd": lambda data: zstandard.ZstdCompressor().compress(data),
+}
+
+
+@pytest.mark.parametrize("encoding", sorted(ENCODERS))
+def test_request_decompression_limits(encoding):
+    body = b'{"heart_rate": 72}' * 100
+    encoded = ENCODERS[encoding](body)
+    assert decompress(encoding, encoded, len(body)) == body
+    with pytest.raises(RequestBodyTooLarge):
+        decompress(encoding, encoded, len(body) - 1)
+    with pytest.raises(LookupError):
+        decompress("compress", body, len(body))
+
+
+@pytest.mark.parametrize("encoding", sorted(ENCODERS))
+def test_request_decompression_stops_bombs(encoding):
+    bomb = ENCODERS[encoding](bytes(64 << 20))
+    assert len(bomb) < 100 << 10
+    with pytest.raises(RequestBodyTooLarge):
+        decompress(encoding, bomb, 1 << 20)
+
+
+def test_brotli_request_bodies_are_refused():
+    # About a hundred bytes of brotli inflate to 64 MiB in one decoder step
+    bomb = brotli.compress(bytes(64 << 20), quality=5)
+    with pytest.raises(LookupError):
+        decompress("br", bomb, 1 << 20)
+    app = Starlette(routes=[Route("/vitals/ingest", lambda request: Response(), methods=["POST"])])
+    client = TestClient(CompressionMiddleware(app))
+    resp = client.post("/vitals/ingest", content=bomb, headers={"Content-Encoding": "br"})
+    assert resp.status_code == 415
+
+
+def make_app(thread_size=1 << 20):
+    payload = json.dumps([{"heart_rate": 70 + i % 10, "spo2": 98.0} for i in range(500)]).encode()
+
+    def endpoint(request):
+        kind = request.path_params["kind"]
+        if kind == "pdf":
+            return Response(b"%PDF-1.4" + payload, media_type="application/pdf")
+        if kind == "stream":
+            return StreamingResponse(iter([payload[:3000], payload[3000:]]), media_type="application/json")
+        if kind == "small":
+            return Response(b'{"ok": true}', media_type="application/json")
+        return Response(payload, media_type="application/json", headers={"ETag": '"v1"'})
+
+    app = Starlette(routes=[Route("/{kind}", endpoint)])
+    return TestClient(CompressionMiddleware(app, minimum_size=1024, thread_size=thread_size)), payload
+
+
+@pytest.mark.parametrize("thread_size", [1 << 20, 1])
+def test_response_compression(thread_size):
+    client, payload = make_app(thread_size)
+
+    resp = client.get("/json", headers={"Accept-Encoding": "zstd"})
+    assert resp.headers["content-encoding"] == "zstd"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert resp.headers["etag"] == 'W/"v1"'
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(resp.content) == payload
+    assert int(resp.headers["content-length"]) < len(payload) / 5
+
+    resp = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.content == payload
+
+    resp = client.get("/stream", headers={"Accept-Encoding": "br"})
+    assert resp.headers["content-encoding"] == "br"
+    assert "content-length" not in resp.headers
+    assert resp.content == payload
+
+    for kind in ("pdf", "small"):
+        resp = client.get(f"/{kind}", headers={"Accept-Encoding": "gzip, br, zstd"})
+        assert "content-encoding" not in resp.headers
+
+    assert "content-encoding" not in client.get("/json", headers={"Accept-Encoding": "identity"}).headers
+
+
+@pytest.fixture
+def patient(db, make_user):
+    user_id = make_user().id
+    now = datetime.utcnow()
+    db.add_all([Vital(user_id=user_id, heart_rate=70, spo2=98, timestamp=now - timedelta(seconds=2 * i)) for i in range(100)])
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_api_history_is_compressed_and_ingest_accepts_gzip(test_client, patient):
+    resp = test_client.get("/vitals/history?limit=100", headers={**patient, "Accept-Encoding": "br"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "br"
+    assert len(resp.json()) == 100
+
+    body = gzip.compress(json.dumps({"device_id": "missing", "heart_rate": 72, "spo2": 98}).encode())
+    resp = test_client.post("/vitals/ingest", content=body,
+                            headers={**patient, "Content-Type": "application/json", "Content-Encoding": "gzip"})
+    # Decoded and validated: the device lookup is what rejects it
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Device not connected or not found"
+
+    resp = test_client.post("/vitals/ingest", content=b"not gzip",
+                            headers={**patient, "Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert resp.status_code == 400
+    resp = test_client.post("/auth/login", content=body,
+                            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert resp.status_code == 415
@@ -0,0 +1,29 @@
+# app/test/test_custom_types.py
+import uuid
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_engine, select
+from app.core.custom_types import GUID
+
+
+@pytest.mark.parametrize("binary, stored_type", [(False, str), (True, bytes)])
+def test_guid_round_trip(binary, stored_type):
+    engine = create_engine("sqlite://")
+    table = Table("things", MetaData(), Column("id", GUID(binary=binary), primary_key=True), Column("ref", GUID(binary=binary)))
+    table.metadata.create_all(engine)
+    ids = [uuid.uuid4() for _ in range(3)]
+
+    with engine.begin() as conn:
+        # UUIDs, strings and raw bytes all bind to the same stored value
+        conn.execute(table.insert(), [
+            {"id": ids[0], "ref": None},
+            {"id": str(ids[1]), "ref": ids[0]},
+            {"id": ids[2].bytes, "ref": str(ids[0]).upper()},
+        ])
+        raw = conn.exec_driver_sql("SELECT id FROM things").scalars().all()
+        rows = conn.execute(select(table).where(table.c.ref == str(ids[0])).order_by(table.c.id)).all()
+
+    assert all(isinstance(value, stored_type) for value in raw)
+    if binary:
+        assert {len(value) for value in raw} == {16}
+    assert sorted(row.id for row in rows) == sorted(ids[1:])
+    assert all(isinstance(row.id, uuid.UUID) and row.ref == ids[0] for row in rows)
@@ -0,0 +1,104 @@
+# app/test/test_db_routing.py
+import asyncio
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+from app.core import database
+from app.core.database import RoutingSession, RoutingAsyncSession, PrimaryStickiness, engine_options
+
+Model = declarative_base()
+
+
+class Item(Model):
+    __tablename__ = "routing_items"
+    id = Column(Integer, primary_key=True)
+    source = Column(String)
+
+
+@pytest.fixture
+def make_session(tmp_path, monkeypatch):
+    """Sessions over a primary and a replica that hold different rows"""
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for bind, source in ((primary, "primary"), (replica, "replica")):
+        Model.metadata.create_all(bind)
+        with bind.begin() as conn:
+            conn.execute(Item.__table__.insert(), {"id": 1, "source": source})
+
+    marks = []
+    monkeypatch.setattr(database.primary_stickiness, "mark", marks.append)
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=[replica])
+    yield lambda **info: factory(info=info), marks
+    primary.dispose()
+    replica.dispose()
+
+
+def source(db):
+    return db.execute(select(Item.source).where(Item.id == 1)).scalar()
+
+
+def test_read_only_sessions_use_the_replica_until_they_write(make_session):
+    make_session, marks = make_session
+    assert source(make_session()) == "primary"
+
+    db = make_session(read_only=True, user_id="u1")
+    assert source(db) == "replica"
+    db.add(Item(id=2, source="new"))
+    db.commit()
+    # The write went to the primary and the session now stays there
+    assert source(db) == "primary"
+    assert db.get(Item, 2).source == "new"
+    assert marks == ["u1"]
+
+
+def test_rolled_back_writes_do_not_make_the_user_sticky(make_session):
+    make_session, marks = make_session
+    db = make_session(user_id="u2")
+    db.add(Item(id=3, source="gone"))
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert marks == []
+
+
+def test_async_writers_are_marked_on_the_async_client(make_session, tmp_path, monkeypatch):
+    _, marks = make_session
+    async_marks = []
+
+    async def mark_async(user_id):
+        async_marks.append(user_id)
+
+    monkeypatch.setattr(database.primary_stickiness, "mark_async", mark_async)
+
+    async def write():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+        factory = async_sessionmaker(engine, class_=RoutingAsyncSession, sync_session_class=RoutingSession)
+        async with factory(info={"user_id": "u4"}) as db:
+            db.add(Item(id=4, source="async"))
+            await db.commit()
+            await db.commit()
+        await engine.dispose()
+
+    asyncio.run(write())
+    # The blocking sync mark never runs on the event loop
+    assert marks == [] and async_marks == ["u4"]
+
+
+def test_stickiness_expires(redis_client):
+    stickiness = PrimaryStickiness(seconds=1)
+    redis_client.delete("db_sticky:u3")
+    assert not stickiness.is_sticky("u3")
+    stickiness.mark("u3")
+    stickiness.local.delete("u3")
+    # Another worker sees the shared mark
+    assert stickiness.is_sticky("u3")
+    assert redis_client.ttl("db_sticky:u3") <= 1
+
+
+def test_engine_options_from_settings():
+    options = engine_options("postgresql://u:p@db/mekaaz")
+    assert options["pool_size"] == database.settings.DB_POOL_SIZE
+    assert options["connect_args"] == {"connect_timeout": database.settings.DB_CONNECT_TIMEOUT_SECONDS}
+    assert engine_options("postgresql+asyncpg://u:p@db/mekaaz")["connect_args"] == {"timeout": database.settings.DB_CONNECT_TIMEOUT_SECONDS}
+    assert "pool_size" not in engine_options("sqlite:///./test.db")
@@ -0,0 +1,122 @@
+# app/test/test_device_registry.py
+import uuid
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.controllers.device_controller import DeviceController
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models.device import Device
+from app.services.device_registry import device_registry
+
+
+@pytest.fixture
+def device_selects():
+    """SELECTs against the devices table on any engine, sync or async"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "devices" in statement:
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", record)
+
+
+def test_lookup_is_cached_until_invalidated(db, make_user, device_selects):
+    owner = str(make_user().id)
+    device = DeviceController.connect_device(db, owner, "reg-watch", "watch")
+
+    assert device_registry.connected_pk(db, owner, "reg-watch") == device["id"]
+    selects = len(device_selects)
+    for _ in range(3):
+        assert device_registry.connected_pk(db, owner, "reg-watch") == device["id"]
+    assert len(device_selects) == selects
+
+    DeviceController.disconnect_device(db, owner, "reg-watch")
+    assert device_registry.connected_pk(db, owner, "reg-watch") is None
+    assert device_registry.get("reg-watch").is_connected is False
+
+
+def test_rejections_are_confirmed_against_the_database(db, make_user):
+    first, second = str(make_user().id), str(make_user().id)
+    db.add(Device(user_id=first, device_id="reg-band", device_type="band", is_connected=True))
+    db.commit()
+    assert device_registry.connected_pk(db, first, "reg-band") is not None
+    assert device_registry.connected_pk(db, second, "reg-band") is None
+
+    # Re-owned without going through DeviceController: the cached owner no longer matches
+    db.query(Device).filter_by(device_id="reg-band").update({"user_id": uuid.UUID(second)})
+    db.commit()
+    assert device_registry.connected_pk(db, second, "reg-band") is not None
+    assert device_registry.get("reg-band").user_id == second
+
+    assert device_registry.connected_pk(db, second, "reg-unknown") is None
+    assert device_registry.get("reg-unknown") is None
+
+
+def test_ingest_and_ecg_start_skip_the_device_read(test_client, db, make_user, device_selects, redis_client):
+    owner = str(make_user().id)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': owner})}"}
+    assert test_client.post("/devices/connect", headers=headers,
+                            json={"device_id": "reg-ecg", "device_type": "ecg"}).status_code == 200
+    device_registry.connected_pk(db, owner, "reg-ecg")
+    device_selects.clear()
+
+    assert test_client.post("/vitals/ingest", json={"device_id": "reg-ecg", "heart_rate": 72, "spo2": 98},
+                            headers=headers).status_code == 200
+    assert test_client.post("/ecg/start", json={"device_id": "reg-ecg"}, headers=headers).status_code == 200
+    assert device_selects == []
+
+    assert test_client.delete("/devices/reg-ecg", headers=headers).status_code == 200
+    assert test_client.post("/vitals/ingest", json={"device_id": "reg-ecg", "heart_rate": 72, "spo2": 98},
+                            headers=headers).status_code == 400
+
+
+def test_load_racing_an_invalidation_is_not_cached(db, make_user, redis_client, monkeypatch):
+    owner = str(make_user().id)
+    device = DeviceController.connect_device(db, owner, "reg-race", "watch")
+    read_entry = device_registry._entry
+
+    def disconnect_after_read(row):
+        # The device is disconnected and invalidated between the read and the store
+        entry = read_entry(row)
+        other = SessionLocal()
+        try:
+            DeviceController.disconnect_device(other, owner, "reg-race")
+        finally:
+            other.close()
+        return entry
+
+    monkeypatch.setattr(device_registry, "_entry", disconnect_after_read)
+    assert device_registry.load(db, "reg-race").is_connected is True
+    monkeypatch.undo()
+
+    # Neither tier kept the stale connected entry
+    assert device_registry.local.get("reg-race") is None
+    assert redis_client.get(device_registry._key("reg-race")) is None
+    assert device_registry.connected_pk(db, owner, "reg-race") is None
+    assert device_registry.get("reg-race").pk == device["id"] and not device_registry.get("reg-race").is_connected
+
+
+def test_fleet_status_reads_cache_misses_in_one_query(test_client, db, make_user, device_selects, redis_client):
+    owner = str(make_user().id)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': owner})}"}
+    device_ids = [f"reg-fleet-{i}" for i in range(5)]
+    for device_id in device_ids:
+        DeviceController.connect_device(db, owner, device_id, "watch")
+    device_selects.clear()
+
+    ids = ",".join(device_ids + ["reg-fleet-missing"])
+    resp = test_client.get(f"/devices/status?ids={ids}", headers=headers)
+    assert resp.status_code == 200
+    assert [status["device_id"] for status in resp.json()] == device_ids
+    assert len(device_selects) == 1 and " IN " in device_selects[0]
+    assert all(redis_client.get(device_registry._key(device_id)) for device_id in device_ids)
+
+    device_registry.local.clear()
+    device_selects.clear()
+    assert len(test_client.get(f"/devices/status?ids={ids}", headers=headers).json()) == 5
+    # Served from Redis; only the unknown ID goes back to the database
+    assert len(device_selects) == 1
@@ -0,0 +1,100 @@
+# app/test/test_device_telemetry.py
+import uuid
+from datetime import datetime
+import pytest
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.device import Device, DeviceTelemetry
+from app.models.family import Family, FamilyMember
+from app.services import vital_codec
+from app.services.device_telemetry import device_telemetry
+
+
+def test_codec_carries_device_state():
+    reading = [{"heart_rate": 72, "spo2": 98}]
+    state = {"battery_level": 64, "rssi": -71, "firmware_version": "2.0.1"}
+    body = vital_codec.encode("watch-1", reading, telemetry=state)
+    assert body[:4] == vital_codec.TELEMETRY_MAGIC
+    assert vital_codec.decode(body).telemetry == state
+    assert {k: vital_codec.decode_reading(body)[k] for k in state} == state
+
+    partial = vital_codec.decode(vital_codec.encode("watch-1", reading, telemetry={"rssi": -40}))
+    assert partial.telemetry == {"battery_level": None, "rssi": -40, "firmware_version": None}
+    assert "battery_level" not in vital_codec.decode_reading(vital_codec.encode("watch-1", reading))
+
+    for bad in (body[:14], vital_codec.encode("watch-1", reading, telemetry={"battery_level": 140})):
+        with pytest.raises(ValueError):
+            vital_codec.decode(bad)
+
+
+def test_ring_and_downsampled_history(db, make_user, redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "DEVICE_TELEMETRY_RING_SIZE", 3)
+    monkeypatch.setattr(settings, "DEVICE_TELEMETRY_BUCKET_SECONDS", 60)
+    redis_client.delete(*device_telemetry._keys("tel-ring"))
+    user_id = str(make_user().id)
+    device = Device(user_id=user_id, device_id="tel-ring", device_type="watch", is_connected=True)
+    db.add(device)
+    db.commit()
+
+    start = 1_800_000_000 // 60 * 60
+    samples = [(0, 90, -60), (20, 88, -70), (40, 87, None), (65, 86, -50)]
+    for offset, battery, rssi in samples:
+        device_telemetry.record(db, device.id, "tel-ring", {"battery_level": battery, "rssi": rssi}, now=start + offset)
+    device_telemetry.record(db, device.id, "tel-ring", {"heart_rate": 70}, now=start + 70)
+    db.commit()
+
+    assert device_telemetry.get_state("tel-ring") == {
+        "battery_level": 86, "rssi": -50, "firmware_version": None,
+        "reported_at": datetime.utcfromtimestamp(start + 65).isoformat()
+    }
+    assert [s["battery_level"] for s in device_telemetry.get_recent("tel-ring")] == [86, 87, 88]
+
+    rows = db.query(DeviceTelemetry).filter_by(device_id=device.id).all()
+    assert [row.to_dict() for row in rows] == [{
+        "bucket_start": datetime.utcfromtimestamp(start).isoformat(), "sample_count": 3,
+        "battery_min": 87, "battery_last": 87, "rssi_avg": -65.0, "rssi_min": -70, "firmware_version": None
+    }]
+
+
+def test_ingest_reports_and_fleet_status(test_client, db, make_user, redis_client):
+    owner, relative, stranger = (str(make_user().id) for _ in range(3))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': owner})}"}
+    db.add(Family(id=str(uuid.uuid4()), owner_id=owner, invite_code=uuid.uuid4().hex[:6], family_name="Home"))
+    db.add_all([
+        FamilyMember(id=str(uuid.uuid4()), owner_id=owner, member_id=owner, role="owner"),
+        FamilyMember(id=str(uuid.uuid4()), owner_id=owner, member_id=relative, role="member"),
+    ])
+    for user_id, device_id in ((owner, "tel-a"), (relative, "tel-b"), (stranger, "tel-c")):
+        db.add(Device(user_id=user_id, device_id=device_id, device_type="watch", is_connected=True))
+        redis_client.delete(*device_telemetry._keys(device_id))
+    db.commit()
+
+    resp = test_client.post("/vitals/ingest", headers=headers, json={
+        "device_id": "tel-a", "heart_rate": 72, "spo2": 98, "battery_level": 55, "rssi": -58, "firmware_version": "1.2.3"
+    })
+    assert resp.status_code == 200
+    body = vital_codec.encode("tel-a", [{"heart_rate": 73, "spo2": 98}], telemetry={"battery_level": 54})
+    resp = test_client.post("/vitals/ingest/batch", content=body,
+                            headers={**headers, "Content-Type": vital_codec.MEDIA_TYPE})
+    assert resp.status_code == 200
+    assert test_client.post("/vitals/ingest", headers=headers, json={
+        "device_id": "tel-a", "heart_rate": 72, "spo2": 98, "battery_level": 101
+    }).status_code == 422
+
+    assert test_client.get("/devices/tel-a/battery", headers=headers).json()["battery_level"] == 54
+    signal = test_client.get("/devices/tel-a/signal-strength", headers=headers).json()
+    assert (signal["rssi"], signal["signal_strength"], signal["signal_quality"]) == (-58, 84, "Good")
+    assert test_client.get("/devices/tel-a/firmware", headers=headers).json()["update_available"] is True
+    assert test_client.get("/devices/tel-c/battery", headers=headers).status_code == 404
+    telemetry = test_client.get("/devices/tel-a/telemetry", headers=headers).json()
+    assert [s["battery_level"] for s in telemetry["recent"]] == [54, 55]
+
+    resp = test_client.get("/devices/status?ids=tel-a,tel-b,tel-c,tel-missing,tel-a", headers=headers)
+    assert resp.status_code == 200
+    statuses = {status["device_id"]: status for status in resp.json()}
+    assert sorted(statuses) == ["tel-a", "tel-b"]
+    assert statuses["tel-a"]["battery_level"] == 54 and statuses["tel-a"]["firmware_version"] == "1.2.3"
+    assert statuses["tel-b"]["battery_level"] is None and statuses["tel-b"]["user_id"] == relative
+
+    too_many = ",".join(f"d{i}" for i in range(settings.DEVICE_STATUS_MAX_IDS + 1))
+    assert test_client.get(f"/devices/status?ids={too_many}", headers=headers).status_code == 400
@@ -0,0 +1,94 @@
+# app/test/test_ecg.py
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.controllers.ecg_controller import ECGController
+from app.models.ecg import ECG
+from app.models.user import UserRole, LanguageEnum
+from app.services.ecg_service import ECGService
+
+
+def synthetic_lead(beats_per_minute=75, seconds=4, sampling_rate=500, amplitude=1.0):
+    """Flat baseline with one sharp R peak per beat"""
+    samples = np.zeros(seconds * sampling_rate)
+    interval = int(60 * sampling_rate / beats_per_minute)
+    samples[interval // 2::interval] = amplitude
+    return samples
+
+
+def test_lead_matrix_from_named_leads():
+    ecg_data = {"leads": {"I": [1, 2, 3], "II": [4, 5, 6]}, "device_note": "x"}
+    matrix, metadata = ECGService.split_samples(ecg_data)
+
+    assert matrix.shape == (2, 3)
+    assert matrix.dtype == ECGService.SAMPLE_DTYPE
+    assert metadata == {"device_note": "x", "lead_names": ["I", "II"]}
+
+
+def test_lead_matrix_single_lead_drops_non_numeric():
+    matrix = ECGService.to_lead_matrix({"readings": [1.0, None, 2.0, "bad", 3]})
+    assert matrix.tolist() == [[1.0, 2.0, 3.0]]
+
+
+def test_malformed_leads_are_rejected_as_bad_requests():
+    for payload in ({"leads": [[1.0, 2.0], [3.0], 5]}, {"leads": 5}, {"readings": "1,2,3"}):
+        with pytest.raises(ValueError):
+            ECGService.to_lead_matrix(payload)
+    with pytest.raises(HTTPException) as exc:
+        ECGController.store_ecg_samples(ECG(), {"leads": [[1.0, 2.0], [3.0], 5]})
+    assert exc.value.status_code == 400
+
+
+def test_pack_round_trip():
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+    blob = ECGService.pack_leads(matrix)
+
+    assert len(blob) == matrix.size * 4
+    assert np.array_equal(ECGService.unpack_leads(blob, 3), matrix)
+
+
+def test_analyze_per_lead():
+    leads = np.stack([synthetic_lead(75), synthetic_lead(120)]).astype(np.float32)
+    analysis = ECGService.analyze_ecg_data({"lead_names": ["II", "V1"]}, leads)
+
+    assert [lead["lead"] for lead in analysis["leads"]] == ["II", "V1"]
+    assert analysis["heart_rate"] == analysis["leads"][0]["heart_rate"] == 75
+    assert analysis["leads"][1]["rhythm"] == "tachycardia"
+
+
+@pytest.fixture
+def ecg_token(test_client):
+    data = {
+        "email": "ecg_user@example.com",
+        "password": "pass123",
+        "name": "ECG User",
+        "role": UserRole.PATIENT.value,
+        "phone_number": "+1234567001",
+        "language": LanguageEnum.EN.value
+    }
+    resp = test_client.post("/auth/signup", json=data)
+    assert resp.status_code == 200
+    return resp.json()["access_token"]
+
+
+def test_multi_lead_recording_flow(test_client, ecg_token):
+    headers = {"Authorization": f"Bearer {ecg_token}"}
+    device = {"device_id": "ecg_dev_1", "device_type": "ecg", "device_name": "ECG"}
+    assert test_client.post("/devices/connect", json=device, headers=headers).status_code == 200
+
+    resp = test_client.post("/ecg/start", json={"device_id": "ecg_dev_1", "lead_count": 2}, headers=headers)
+    assert resp.status_code == 200
+    ecg_id = resp.json()["id"]
+
+    final_data = {"leads": [synthetic_lead(75).tolist(), synthetic_lead(75, amplitude=0.5).tolist()]}
+    resp = test_client.post(f"/ecg/{ecg_id}/complete", json={"ecg_id": ecg_id, "final_data": final_data}, headers=headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "completed"
+    assert body["lead_count"] == 2
+    assert body["sample_count"] == 2000
+
+    resp = test_client.get(f"/ecg/{ecg_id}/analyze", headers=headers)
+    assert resp.status_code == 200
+    assert len(resp.json()["leads"]) == 2
+    assert resp.json()["heart_rate"] == 75
@@ -0,0 +1,117 @@
+# app/test/test_health_analysis.py
+import numpy as np
+from app.services.health_analysis_service import HealthAnalysisService
+
+
+def reference_analyze(vital_data):
+    """The original branch-by-branch scalar analyzer, kept as the equivalence oracle"""
+    anomalies = []
+    health_condition = "normal"
+
+    # Heart Rate Analysis
+    if vital_data.get('heart_rate'):
+        hr = vital_data['heart_rate']
+        if hr < HealthAnalysisService.HEART_RATE_NORMAL[0] or hr > HealthAnalysisService.HEART_RATE_NORMAL[1]:
+            anomalies.append("heart_rate")
+            if hr < HealthAnalysisService.HEART_RATE_WARNING[0] or hr > HealthAnalysisService.HEART_RATE_WARNING[1]:
+                health_condition = "critical"
+            elif health_condition == "normal":
+                health_condition = "warning"
+
+    # SpO2 Analysis
+    if vital_data.get('spo2'):
+        spo2 = vital_data['spo2']
+        if spo2 < HealthAnalysisService.SPO2_NORMAL[0]:
+            anomalies.append("spo2")
+            if spo2 < HealthAnalysisService.SPO2_WARNING[0]:
+                health_condition = "critical"
+            elif health_condition == "normal":
+                health_condition = "warning"
+
+    # Temperature Analysis
+    if vital_data.get('temperature'):
+        temp = vital_data['temperature']
+        if temp < HealthAnalysisService.TEMPERATURE_NORMAL[0] or temp > HealthAnalysisService.TEMPERATURE_NORMAL[1]:
+            anomalies.append("temperature")
+            if temp < HealthAnalysisService.TEMPERATURE_WARNING[0] or temp > HealthAnalysisService.TEMPERATURE_WARNING[1]:
+                health_condition = "critical"
+            elif health_condition == "normal":
+                health_condition = "warning"
+
+    # Blood Pressure Analysis
+    if vital_data.get('blood_pressure_systolic') and vital_data.get('blood_pressure_diastolic'):
+        systolic = vital_data['blood_pressure_systolic']
+        diastolic = vital_data['blood_pressure_diastolic']
+
+        if (systolic < HealthAnalysisService.BLOOD_PRESSURE_SYSTOLIC_NORMAL[0] or
+            systolic > HealthAnalysisService.BLOOD_PRESSURE_SYSTOLIC_NORMAL[1] or
+            diastolic < HealthAnalysisService.BLOOD_PRESSURE_DIASTOLIC_NORMAL[0] or
+            diastolic > HealthAnalysisService.BLOOD_PRESSURE_DIASTOLIC_NORMAL[1]):
+            anomalies.append("blood_pressure")
+            if health_condition == "normal":
+                health_condition = "warning"
+
+    # Respiratory Rate Analysis
+    if vital_data.get('respiratory_rate'):
+        rr = vital_data['respiratory_rate']
+        if rr < HealthAnalysisService.RESPIRATORY_RATE_NORMAL[0] or rr > HealthAnalysisService.RESPIRATORY_RATE_NORMAL[1]:
+            anomalies.append("respiratory_rate")
+            if health_condition == "normal":
+                health_condition = "warning"
+
+    is_anomaly = len(anomalies) > 0
+
+    return health_condition, is_anomaly
+
+
+def random_readings(count, seed=7):
+    rng = np.random.default_rng(seed)
+    ranges = {
+        "heart_rate": (30, 160),
+        "spo2": (80, 100),
+        "temperature": (34.5, 40.0),
+        "blood_pressure_systolic": (70, 180),
+        "blood_pressure_diastolic": (40, 110),
+        "respiratory_rate": (6, 30),
+    }
+    readings = []
+    for _ in range(count):
+        reading = {}
+        for metric, (low, high) in ranges.items():
+            roll = rng.random()
+            if roll < 0.1:
+                continue  # missing
+            if roll < 0.15:
+                reading[metric] = 0  # falsy, ignored by the scalar path
+            elif metric in ("temperature", "spo2"):
+                reading[metric] = round(float(rng.uniform(low, high)), 1)
+            else:
+                reading[metric] = int(rng.integers(low, high))
+        readings.append(reading)
+    # Exact boundary values
+    readings += [
+        {"heart_rate": 60, "spo2": 95, "temperature": 36.1},
+        {"heart_rate": 100, "spo2": 90, "temperature": 37.2},
+        {"heart_rate": 50, "spo2": 89.9, "temperature": 35.5},
+        {"heart_rate": 120, "temperature": 38.0, "respiratory_rate": 12},
+        {"blood_pressure_systolic": 140, "blood_pressure_diastolic": 90},
+        {"blood_pressure_systolic": 141},
+        {},
+    ]
+    return readings
+
+
+def test_batch_matches_scalar_reference():
+    readings = random_readings(5000)
+    conditions, anomalies = HealthAnalysisService.analyze_vital_batch(
+        HealthAnalysisService.columns_from_records(readings)
+    )
+
+    expected = [reference_analyze(reading) for reading in readings]
+    assert [HealthAnalysisService.CONDITIONS[c] for c in conditions] == [c for c, _ in expected]
+    assert anomalies.tolist() == [a for _, a in expected]
+
+
+def test_scalar_wrapper_matches_reference():
+    for reading in random_readings(500, seed=11):
+        assert HealthAnalysisService.analyze_vital_signs(reading) == reference_analyze(reading)
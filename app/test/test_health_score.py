@@ -0,0 +1,63 @@
+# app/test/test_health_score.py
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app.core.security import create_access_token
+from app.controllers.health_controller import HealthController
+from app.models.device import Device
+from app.models.vitals import Vital
+from app.services.health_score_service import health_score_service
+
+
+@pytest.fixture
+def user_id(make_user):
+    return str(make_user(name="Sol").id)
+
+
+def test_health_score_tolerates_missing_metrics(db, user_id):
+    start = datetime.utcnow() - timedelta(minutes=5)
+    for i, (hr, spo2, temp) in enumerate([(72, 98, None), (None, 97, 36.6), (75, None, 36.8)]):
+        db.add(Vital(id=uuid.uuid4(), user_id=user_id, heart_rate=hr, spo2=spo2, temperature=temp,
+                     timestamp=start + timedelta(seconds=i)))
+    db.commit()
+
+    result = HealthController.calculate_health_score(db, user_id)
+    assert result["score"] == 99 and result["status"] == "Excellent"
+
+
+def test_rolling_state_matches_recomputation(user_id, redis_client):
+    readings = [
+        {"heart_rate": 60 + i * 4, "spo2": 99 - (i % 7), "temperature": 36.2 + (i % 4) * 0.4 if i % 3 else None}
+        for i in range(120)
+    ]
+    for reading in readings:
+        health_score_service.record(user_id, reading)
+
+    state = health_score_service.get_state(None, user_id)
+    expected = health_score_service.compute_state(list(reversed(readings)))
+
+    assert state["readings"] == expected["readings"] == 10
+    assert state["score"] == pytest.approx(expected["score"])
+    for metric, average in expected["averages"].items():
+        assert state["averages"][metric] == pytest.approx(average)
+
+
+def test_first_ingest_seeds_state_from_stored_history(test_client, db, user_id, redis_client):
+    db.add(Device(user_id=user_id, device_id="seed-watch", device_type="watch", is_connected=True))
+    start = datetime.utcnow() - timedelta(hours=1)
+    history = [{"heart_rate": 55 + i, "spo2": 93 + i % 6, "temperature": 36.0 + (i % 5) * 0.3} for i in range(30)]
+    db.add_all([Vital(user_id=user_id, timestamp=start + timedelta(minutes=i), **reading)
+                for i, reading in enumerate(history)])
+    db.commit()
+
+    reading = {"heart_rate": 120, "spo2": 88, "temperature": 38.5}
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    resp = test_client.post("/vitals/ingest", headers=headers, json={"device_id": "seed-watch", **reading})
+    assert resp.status_code == 200
+
+    state = health_score_service.get_state(None, user_id)
+    expected = health_score_service.compute_state(list(reversed(history + [reading])))
+    assert state["readings"] == 10
+    assert state["score"] == pytest.approx(expected["score"])
+    for metric, average in expected["averages"].items():
+        assert state["averages"][metric] == pytest.approx(average)
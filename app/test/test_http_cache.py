@@ -0,0 +1,88 @@
+# app/test/test_http_cache.py
+import uuid
+import pytest
+from app.controllers.health_controller import HealthController
+from app.core.config import settings
+from app.core.http_cache import etag_matches, mark_changed
+from app.core.security import create_access_token
+from app.models.device import Device
+from app.models.family import Family, FamilyMember
+
+
+@pytest.fixture(autouse=True)
+def one_refresh_window(monkeypatch):
+    # Keep a test from straddling a window boundary
+    monkeypatch.setattr(settings, "HTTP_CACHE_REFRESH_SECONDS", 10**9)
+
+
+def test_etag_matches():
+    etag = 'W/"abc"'
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"abd"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_charts_revalidate_until_new_vital(test_client, db, make_user, redis_client, monkeypatch):
+    user_id = str(make_user().id)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    db.add(Device(user_id=user_id, device_id="etag-watch", device_type="watch", is_connected=True))
+    db.commit()
+
+    first = test_client.get("/vitals/charts/hour", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    async def not_called(*args, **kwargs):
+        raise AssertionError("controller ran for a 304")
+    with monkeypatch.context() as m:
+        m.setattr(HealthController, "get_chart_data_async", not_called)
+        cached = test_client.get("/vitals/charts/hour", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # Other periods and other users never share the ETag
+    assert test_client.get("/vitals/charts/day", headers={**headers, "If-None-Match": etag}).status_code == 200
+    other_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(make_user(name='Bob').id)})}"}
+    assert test_client.get("/vitals/charts/hour", headers={**other_headers, "If-None-Match": etag}).status_code == 200
+
+    resp = test_client.post("/vitals/ingest", json={"device_id": "etag-watch", "heart_rate": 80, "spo2": 97}, headers=headers)
+    assert resp.status_code == 200
+    fresh = test_client.get("/vitals/charts/hour", headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+    assert test_client.get("/vitals/charts/hour", headers={"If-None-Match": etag}).status_code == 401
+
+
+def test_family_dashboard_follows_member_vitals(test_client, db, make_user, redis_client):
+    owner_id, member_id = str(make_user(name="Owner").id), str(make_user(name="Member").id)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': owner_id})}"}
+    db.add(Family(id=str(uuid.uuid4()), owner_id=owner_id, invite_code=uuid.uuid4().hex[:6], family_name="Home"))
+    db.add_all([
+        FamilyMember(id=str(uuid.uuid4()), owner_id=owner_id, member_id=owner_id, role="owner"),
+        FamilyMember(id=str(uuid.uuid4()), owner_id=owner_id, member_id=member_id, role="member"),
+    ])
+    db.commit()
+
+    etag = test_client.get("/family/health-dashboard", headers=headers).headers["etag"]
+    assert test_client.get("/family/health-dashboard", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    mark_changed([member_id], "vitals")
+    assert test_client.get("/family/health-dashboard", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_custom_alert_changes_invalidate_listing(test_client, make_user, redis_client):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(make_user().id)})}"}
+    etag = test_client.get("/analytics/custom-alerts", headers=headers).headers["etag"]
+    assert test_client.get("/analytics/custom-alerts", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    resp = test_client.post("/analytics/custom-alerts", json={"name": "High HR", "metric": "heart_rate", "threshold": 110}, headers=headers)
+    assert resp.status_code == 200
+    listing = test_client.get("/analytics/custom-alerts", headers={**headers, "If-None-Match": etag})
+    assert listing.status_code == 200
+    assert listing.json()["total"] == 1
@@ -0,0 +1,59 @@
+# app/test/test_notifications.py
+import json
+from app.services.notifications import NotificationDispatcher, FakeTransport, Message
+
+
+def test_dispatcher_batches_and_limits_concurrency():
+    dispatcher = NotificationDispatcher(max_attempts=2, retry_base_seconds=0)
+    push = FakeTransport("push", max_batch_size=10, max_concurrency=1)
+    dispatcher.register(push)
+    outcomes = []
+
+    for i in range(25):
+        dispatcher.submit(Message(channel="push", recipient=f"user-{i}", body="hi"),
+                          on_complete=lambda delivered, attempts, error: outcomes.append(delivered))
+    dispatcher.join(timeout=5)
+    dispatcher.close()
+
+    assert len(push.sent) == 25
+    assert all(len(batch) <= 10 for batch in push.batches)
+    assert len(push.batches) < 25  # queued messages were coalesced into provider batches
+    assert outcomes == [True] * 25
+
+
+def test_dispatcher_retries_then_dead_letters():
+    dispatcher = NotificationDispatcher(max_attempts=3, retry_base_seconds=0)
+    sms = FakeTransport("sms", fail_recipients=["+15550000000"])
+    dispatcher.register(sms)
+    results = []
+
+    dispatcher.submit(Message(channel="sms", recipient="+15550000000", body="x"),
+                      on_complete=lambda *outcome: results.append(outcome))
+    dispatcher.join(timeout=5)
+    dispatcher.close()
+
+    assert results == [(False, 3, "Provider rejected message")]
+    assert dispatcher.stats["sms"]["retried"] == 2
+    assert dispatcher.dead_letters[0]["recipient"] == "+15550000000"
+    assert "body" not in dispatcher.dead_letters[0]
+
+
+class ShortResultTransport(FakeTransport):
+    async def send_batch(self, messages):
+        return (await super().send_batch(messages))[:-1]
+
+
+def test_missing_transport_results_are_settled_as_failures():
+    dispatcher = NotificationDispatcher(max_attempts=1, retry_base_seconds=0)
+    dispatcher.register(ShortResultTransport("email", max_batch_size=5, max_concurrency=1))
+    results = []
+
+    for i in range(3):
+        dispatcher.submit(Message(channel="email", recipient=f"u{i}@example.com", body="Your verification code is 123456"),
+                          on_complete=lambda *outcome: results.append(outcome[0]))
+    dispatcher.join(timeout=5)
+    dispatcher.close()
+
+    # Every message settles (join returns) and each batch's last message counts as failed
+    assert len(results) == 3 and results.count(False) >= 1
+    assert all("123456" not in json.dumps(entry) for entry in dispatcher.dead_letters)
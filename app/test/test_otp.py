@@ -0,0 +1,55 @@
+# app/test/test_otp.py
+import uuid
+import pytest
+from app.models.user import UserRole, LanguageEnum
+from app.services.email_service import EmailService
+from app.services.sms_service import SMSService
+
+
+@pytest.fixture
+def otp_email(test_client, redis_client, monkeypatch):
+    email = f"otp_{uuid.uuid4().hex[:8]}@example.com"
+    data = {
+        "email": email,
+        "password": "pass123",
+        "name": "OTP User",
+        "role": UserRole.PATIENT.value,
+        "language": LanguageEnum.EN.value
+    }
+    assert test_client.post("/auth/signup", json=data).status_code == 200
+    monkeypatch.setattr(EmailService, "generate_otp", staticmethod(lambda: "123456"))
+    return email
+
+
+def test_otp_is_single_use(test_client, otp_email):
+    assert test_client.post("/auth/send-otp", json={"email": otp_email, "otp_type": "email"}).status_code == 200
+
+    wrong = {"email": otp_email, "otp_code": "000000", "otp_type": "email"}
+    assert test_client.post("/auth/verify-otp", json=wrong).status_code == 400
+
+    right = {"email": otp_email, "otp_code": "123456", "otp_type": "email"}
+    assert test_client.post("/auth/verify-otp", json=right).status_code == 200
+    assert test_client.post("/auth/verify-otp", json=right).status_code == 400
+
+
+def test_otp_send_is_rate_limited(test_client, otp_email):
+    payload = {"email": otp_email, "otp_type": "email"}
+    statuses = [test_client.post("/auth/send-otp", json=payload).status_code for _ in range(4)]
+
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_phone_otp_is_keyed_by_phone_when_email_is_also_sent(test_client, redis_client, monkeypatch):
+    email, phone = f"otp_{uuid.uuid4().hex[:8]}@example.com", f"+1555{uuid.uuid4().int % 10 ** 7:07d}"
+    assert test_client.post("/auth/signup", json={
+        "email": email, "phone_number": phone, "password": "pass123", "name": "OTP User",
+        "role": UserRole.PATIENT.value, "language": LanguageEnum.EN.value
+    }).status_code == 200
+    sent = []
+    monkeypatch.setattr(SMSService, "generate_otp", staticmethod(lambda: "654321"))
+    monkeypatch.setattr(SMSService, "send_otp", staticmethod(lambda to, code: sent.append(to)))
+
+    resp = test_client.post("/auth/send-otp", json={"email": email, "phone_number": phone, "otp_type": "phone"})
+    assert resp.status_code == 200 and sent == [phone]
+    verify = {"phone_number": phone, "otp_code": "654321", "otp_type": "phone"}
+    assert test_client.post("/auth/verify-otp", json=verify).status_code == 200
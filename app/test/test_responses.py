@@ -0,0 +1,45 @@
+# app/test/test_responses.py
+import json
+from datetime import datetime, timedelta
+import pytest
+from pydantic import TypeAdapter
+from app.core.responses import RowsJSONResponse, response_columns
+from app.core.security import create_access_token
+from app.models.ecg import ECG
+from app.models.vitals import Vital
+from app.schemas.ecg import ECGResponse
+from app.schemas.vitals import VitalResponse
+
+
+@pytest.fixture
+def patient(make_user):
+    user = make_user(name="Jo")
+    return str(user.id), {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+def test_rows_serialize_like_the_response_model(db, patient):
+    user_id, _ = patient
+    now = datetime.utcnow()
+    db.add_all([
+        Vital(user_id=user_id, heart_rate=70, spo2=98.5, temperature=None, is_anomaly=i == 1,
+              health_condition="normal", timestamp=now - timedelta(seconds=i))
+        for i in range(3)
+    ])
+    db.commit()
+
+    rows = db.query(*response_columns(Vital, VitalResponse)).order_by(Vital.timestamp).all()
+    entities = db.query(Vital).order_by(Vital.timestamp).all()
+    validated = TypeAdapter(list[VitalResponse]).dump_json([v.to_dict() for v in entities])
+    assert json.loads(RowsJSONResponse(rows).body) == json.loads(validated)
+
+
+def test_ecg_history_skips_sample_data(test_client, db, patient):
+    user_id, headers = patient
+    db.add(ECG(user_id=user_id, ecg_data="[1, 2, 3]", ecg_samples=b"\x00" * 64, status="completed"))
+    db.commit()
+
+    resp = test_client.get("/ecg/history", headers=headers)
+    assert resp.status_code == 200
+    [record] = resp.json()
+    assert set(record) == set(ECGResponse.model_fields)
+    assert record["user_id"] == user_id and record["status"] == "completed"
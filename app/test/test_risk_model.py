@@ -0,0 +1,44 @@
+# app/test/test_risk_model.py
+import uuid
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app.jobs.train_risk_model import train
+from app.models.vitals import Vital
+from app.services.risk_model import FEATURES, ModelRegistry, extract_features, score_users
+
+
+def test_registry_round_trip(tmp_path):
+    model, metrics = train(samples=2000, seed=1)
+    assert metrics["heart_health_auc"] > 0.8
+
+    registry = ModelRegistry(str(tmp_path))
+    version = registry.save("health_risk", model, metrics)
+    loaded, record = registry.load("health_risk")
+
+    assert registry.latest_version("health_risk") == version == record["version"]
+    X = np.array([[70, 5, 95, 98, 96, 36.7, 37.0, 14, 118, 76], [np.nan] * len(FEATURES)])
+    assert np.allclose(loaded.predict_proba(X), model.predict_proba(X))
+
+
+def test_batch_scoring_ranks_users(db, make_user):
+    now = datetime.utcnow()
+    healthy, at_risk, idle = make_user(name="H"), make_user(name="R"), make_user(name="I")
+    for i in range(6):
+        at = now - timedelta(hours=i)
+        db.add(Vital(id=uuid.uuid4(), user_id=healthy.id, heart_rate=70 + i, spo2=98, temperature=36.6,
+                     respiratory_rate=14, blood_pressure_systolic=118, blood_pressure_diastolic=76, timestamp=at))
+        db.add(Vital(id=uuid.uuid4(), user_id=at_risk.id, heart_rate=105 + 6 * i, spo2=91, temperature=37.6,
+                     respiratory_rate=24, blood_pressure_systolic=155, blood_pressure_diastolic=96, timestamp=at))
+    db.commit()
+
+    user_ids = [str(healthy.id), str(at_risk.id), str(idle.id)]
+    features = extract_features(db, user_ids)
+    assert features.shape == (3, len(FEATURES))
+    assert features[0, FEATURES.index("heart_rate_avg")] == pytest.approx(72.5)
+    assert np.isnan(features[2]).all()
+
+    healthy_score, at_risk_score, idle_score = score_users(db, user_ids)
+    assert healthy_score["predictions"] == {"heart_health_risk": "low", "respiratory_health_risk": "low"}
+    assert at_risk_score["predictions"] == {"heart_health_risk": "high", "respiratory_health_risk": "high"}
+    assert idle_score["predictions"] == {}
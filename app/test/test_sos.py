@@ -0,0 +1,36 @@
+# app/test/test_sos.py
+import uuid
+import pytest
+from app.models.emergency_contact import EmergencyContact
+from app.models.sos import SOSNotification
+from app.services.emergency_service import EmergencyService
+from app.services.notifications import notification_dispatcher
+
+
+@pytest.fixture
+def patient_with_contacts(db, make_user):
+    user = make_user(name="Sam")
+    for i, phone in enumerate(["+10000000001", "+10000000002", "+19999999999"]):
+        db.add(EmergencyContact(id=str(uuid.uuid4()), user_id=user.id, name=f"Contact {i}", phone=phone))
+    db.commit()
+    return str(user.id)
+
+
+def test_sos_fan_out_records_per_contact_status(db, patient_with_contacts, fake_transports):
+    sms = fake_transports["sms"]
+    sms.fail_recipients.add("+19999999999")  # this gateway number always rejects
+
+    sos = EmergencyService.trigger_sos(db, patient_with_contacts, {"emergency_type": "fall"})
+    notification_dispatcher.join(timeout=5)
+
+    # Message rendered once and shared by every contact
+    assert len({m.body for m in sms.sent}) == 1
+    assert "Sam" in sms.sent[0].body
+
+    db.expire_all()
+    notifications = db.query(SOSNotification).filter_by(sos_id=str(sos.id)).all()
+    assert sorted(n.delivery_status for n in notifications) == ["delivered", "delivered", "failed"]
+    rows = {n.delivery_status: n for n in notifications}
+    assert rows["failed"].attempts == notification_dispatcher.max_attempts
+    assert rows["delivered"].delivered_at is not None
+    assert notification_dispatcher.dead_letters[-1]["recipient"] == "+19999999999"
@@ -0,0 +1,46 @@
+# app/test/test_startup.py
+import subprocess
+import sys
+from sqlalchemy import create_engine, inspect, text
+from app.jobs.migrate import migrate
+
+
+def test_app_import_defers_rendering_stack():
+    code = "import sys, app.main; print(sorted(m for m in ('matplotlib', 'reportlab', 'httpx') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_migrate_creates_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    migrate(engine)
+    tables = set(inspect(engine).get_table_names())
+    assert {"users", "vitals", "notifications", "alert_rules", "analytics_snapshots"} <= tables
+    # Re-running against an up-to-date schema is a no-op
+    migrate(engine)
+
+
+def test_migrate_upgrades_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ecgs (id CHAR(36) PRIMARY KEY, ecg_data TEXT)"))
+        conn.execute(text("CREATE TABLE sos_notifications (id INTEGER PRIMARY KEY, notification_type VARCHAR)"))
+        conn.execute(text("CREATE TABLE notifications (id INTEGER PRIMARY KEY, user_id CHAR(36), "
+                          "notification_type VARCHAR, created_at DATETIME)"))
+        conn.execute(text("CREATE TABLE vitals (id CHAR(36) PRIMARY KEY, user_id CHAR(36), timestamp DATETIME)"))
+        conn.execute(text("INSERT INTO ecgs (id, ecg_data) VALUES ('e1', '[]')"))
+
+    assert set(migrate(engine)) == {
+        "ecgs.ecg_samples", "ecgs.lead_count", "ecgs.sample_count",
+        "sos_notifications.delivery_status", "sos_notifications.attempts", "sos_notifications.last_error",
+        "notifications.alert_type", "notifications.subject_user_id", "notifications.value",
+    }
+    inspector = inspect(engine)
+    assert {"ecg_samples", "lead_count", "sample_count"} <= {c["name"] for c in inspector.get_columns("ecgs")}
+    assert "ix_vitals_user_timestamp" in {i["name"] for i in inspector.get_indexes("vitals")}
+    assert {"ix_notifications_user_created", "ix_notifications_user_type_created"} <= {
+        i["name"] for i in inspector.get_indexes("notifications")
+    }
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT ecg_data, ecg_samples FROM ecgs")).one() == ("[]", None)
+    assert migrate(engine) == []
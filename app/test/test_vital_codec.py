@@ -0,0 +1,105 @@
+# app/test/test_vital_codec.py
+import math
+from datetime import datetime, timedelta
+import pytest
+from app.core.security import create_access_token
+from app.models.device import Device
+from app.models.vitals import Vital
+from app.services import vital_codec
+
+
+def test_round_trip_with_absent_values():
+    at = datetime(2026, 3, 1, 12, 0, 0)
+    readings = [
+        {"heart_rate": 72, "spo2": 98.5, "temperature": 36.62, "steps": 1200, "timestamp": at},
+        {"heart_rate": 130, "spo2": 91, "blood_pressure_systolic": 150, "blood_pressure_diastolic": 95, "respiratory_rate": 22},
+    ]
+    body = vital_codec.encode("watch-1", readings)
+    assert len(body) == 5 + len("watch-1") + 2 * vital_codec.RECORD_DTYPE.itemsize
+
+    now = datetime(2026, 3, 1, 12, 0, 5)
+    batch = vital_codec.decode(body, now=now)
+    assert batch.device_id == "watch-1"
+    assert batch.timestamps == [at, now]
+    assert batch.columns["spo2"].tolist() == [98.5, 91.0]
+    assert math.isnan(batch.columns["temperature"][1])
+
+    first, second = batch.readings()
+    assert first["heart_rate"] == 72 and first["temperature"] == 36.62 and first["blood_pressure_systolic"] is None
+    assert second["temperature"] is None and second["respiratory_rate"] == 22
+    assert isinstance(second["blood_pressure_systolic"], int)
+
+
+def test_decode_rejects_malformed_payloads():
+    body = vital_codec.encode("watch-1", [{"heart_rate": 72, "spo2": 98}])
+    for bad in (b"", b'{"heart_rate": 72}', body[:-1], body[:12], vital_codec.encode("watch-1", [{"heart_rate": 72}])):
+        with pytest.raises(ValueError):
+            vital_codec.decode(bad)
+
+
+def test_decode_rejects_out_of_range_timestamps():
+    body = vital_codec.encode("watch-1", [{"heart_rate": 72, "spo2": 98}])
+    offset = len(body) - vital_codec.RECORD_DTYPE.itemsize
+
+    def stamped(millis):
+        return body[:offset] + millis.to_bytes(8, "little", signed=True) + body[offset + 8:]
+
+    for millis in (-1, vital_codec.MAX_TIMESTAMP_MS + 1, 2 ** 63 - 1):
+        for decode in (vital_codec.decode, vital_codec.decode_reading):
+            with pytest.raises(ValueError):
+                decode(stamped(millis))
+    latest = stamped(vital_codec.MAX_TIMESTAMP_MS)
+    assert vital_codec.decode(latest).timestamps[0].year == 9999
+    assert vital_codec.decode_reading(latest)["timestamp"].year == 9999
+
+
+def test_json_readings_match_binary_columns():
+    readings = [{"heart_rate": 72, "spo2": 98.5, "temperature": None, "steps": 10}]
+    from_json = vital_codec.from_readings("watch-1", readings, now=datetime(2026, 1, 1))
+    from_binary = vital_codec.decode(vital_codec.encode("watch-1", readings), now=datetime(2026, 1, 1))
+    assert from_json.readings() == from_binary.readings()
+    single = vital_codec.decode_reading(vital_codec.encode("watch-1", readings), now=datetime(2026, 1, 1))
+    assert single == from_binary.readings()[0]
+
+
+@pytest.fixture
+def wearer(db, make_user):
+    user_id = str(make_user().id)
+    db.add(Device(user_id=user_id, device_id="codec-watch", device_type="watch", is_connected=True))
+    db.commit()
+    return user_id, {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+def test_binary_and_batch_ingest(test_client, db, wearer, redis_client):
+    user_id, headers = wearer
+    binary = {**headers, "Content-Type": vital_codec.MEDIA_TYPE}
+
+    resp = test_client.post("/vitals/ingest", content=vital_codec.encode("codec-watch", [{"heart_rate": 75, "spo2": 97.5}]),
+                            headers=binary)
+    assert resp.status_code == 200
+    assert resp.json()["spo2"] == 97.5
+
+    start = datetime.utcnow() - timedelta(minutes=5)
+    backlog = [{"heart_rate": 70 + i, "spo2": 98, "timestamp": start + timedelta(seconds=2 * i)} for i in range(10)]
+    backlog[-1]["heart_rate"] = 135
+    resp = test_client.post("/vitals/ingest/batch", content=vital_codec.encode("codec-watch", backlog), headers=binary)
+    assert resp.status_code == 200
+    assert resp.json() == {"ingested": 10, "anomaly_count": 1, "health_condition": "critical"}
+    assert test_client.get("/vitals/live", headers=headers).json()["heart_rate"] == 135
+
+    resp = test_client.post("/vitals/ingest/batch", headers=headers, json={
+        "device_id": "codec-watch",
+        "readings": [{"heart_rate": 80, "spo2": 99, "timestamp": (start + timedelta(minutes=1)).isoformat() + "Z"}],
+    })
+    assert resp.status_code == 200
+    assert resp.json()["ingested"] == 1
+
+    stored = db.query(Vital).filter(Vital.user_id == user_id).order_by(Vital.timestamp).all()
+    assert len(stored) == 12
+    # Binary timestamps carry millisecond precision
+    assert abs(stored[0].timestamp - backlog[0]["timestamp"]) < timedelta(milliseconds=1)
+
+    assert test_client.post("/vitals/ingest", content=vital_codec.encode("codec-watch", backlog), headers=binary).status_code == 400
+    assert test_client.post("/vitals/ingest/batch", content=b"MKV1garbage", headers=binary).status_code == 400
+    assert test_client.post("/vitals/ingest/batch", json={"device_id": "codec-watch", "readings": [{"spo2": 98}]},
+                            headers=headers).status_code == 422
@@ -1,58 +1,98 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_read_db
+from app.core.security import get_current_user, get_current_principal_async, Principal
+from app.core.http_cache import conditional_get
 from app.models.user import User
 from app.controllers.analytics_controller import AnalyticsController
+from app.schemas.alert_rule import AlertRuleCreate, AlertRuleUpdate
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
-@router.get("/health-insights")
+@router.get("/health-insights", dependencies=[Depends(conditional_get("vitals", "snapshot"))])
 def get_health_insights(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
 ):
     """Get personalized health insights and recommendations"""
-    return AnalyticsController.get_health_insights(db, str(current_user.id))
+    return AnalyticsController.get_snapshot_section(
+        db, str(current_user.id), "insights", AnalyticsController.get_health_insights
+    )
 
-@router.get("/anomaly-detection")
+@router.get("/anomaly-detection", dependencies=[Depends(conditional_get("vitals"))])
 def detect_anomalies(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
 ):
     """Detect health anomalies and generate alerts"""
     return AnalyticsController.detect_anomalies(db, str(current_user.id))
 
 @router.post("/custom-alerts")
 def create_custom_alert(
-    alert_config: dict,
+    alert_config: AlertRuleCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create custom health alerts"""
-    return AnalyticsController.create_custom_alert(db, str(current_user.id), alert_config)
+    return AnalyticsController.create_custom_alert(db, str(current_user.id), alert_config.model_dump())
 
-@router.get("/health-patterns")
-def analyze_health_patterns(
+@router.get("/custom-alerts", dependencies=[Depends(conditional_get("rules"))])
+def get_custom_alerts(
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
+):
+    """List custom health alerts"""
+    return AnalyticsController.get_custom_alerts(db, str(current_user.id))
+
+@router.put("/custom-alerts/{rule_id}")
+def update_custom_alert(
+    rule_id: str,
+    changes: AlertRuleUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Analyze health patterns over time"""
-    return AnalyticsController.analyze_health_patterns(db, str(current_user.id))
+    """Update a custom health alert"""
+    return AnalyticsController.update_custom_alert(db, str(current_user.id), rule_id, changes.model_dump(exclude_unset=True))
 
-@router.get("/predictive-health")
-def get_predictive_health(
+@router.delete("/custom-alerts/{rule_id}")
+def delete_custom_alert(
+    rule_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
+):
+    """Delete a custom health alert"""
+    return AnalyticsController.delete_custom_alert(db, str(current_user.id), rule_id)
+
+@router.get("/health-patterns", dependencies=[Depends(conditional_get("vitals", "snapshot"))])
+def analyze_health_patterns(
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
+):
+    """Analyze health patterns over time"""
+    return AnalyticsController.get_snapshot_section(
+        db, str(current_user.id), "patterns", AnalyticsController.analyze_health_patterns
+    )
+
+@router.get("/predictive-health", dependencies=[Depends(conditional_get("vitals", "snapshot"))])
+def get_predictive_health(
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
 ):
     """Get predictive health insights"""
-    return AnalyticsController.get_predictive_health(db, str(current_user.id))
+    return AnalyticsController.get_snapshot_section(
+        db, str(current_user.id), "predictive", AnalyticsController.get_predictive_health
+    )
 
-@router.get("/health-comparison")
+@router.get("/health-comparison", dependencies=[Depends(conditional_get("vitals", "snapshot"))])
 def compare_health_data(
     period: str = "week",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
 ):
     """Compare health data across different periods"""
-    return AnalyticsController.compare_health_data(db, str(current_user.id), period) 
\ No newline at end of file
+    if period not in ("week", "month"):
+        period = "week"
+    return AnalyticsController.get_snapshot_section(
+        db, str(current_user.id), f"comparison:{period}",
+        lambda db, user_id: AnalyticsController.compare_health_data(db, user_id, period)
+    ) 
\ No newline at end of file
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+import redis
 from app.core.database import get_db
-from app.schemas.auth import SignupRequest, LoginRequest, TokenResponse
+from app.schemas.auth import SignupRequest, LoginRequest, TokenResponse, RefreshTokenRequest, LogoutRequest
 from app.controllers.auth_controller import AuthController
-from app.core.security import decode_token, create_access_token, create_refresh_token
+from app.core.security import decode_token, rotate_refresh_token, revoke_token, oauth2_scheme
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -16,15 +17,22 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
     return AuthController.login(db, data)
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_token(refresh_token: str = Body(...)):
-    payload = decode_token(refresh_token)
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
-    user_id = payload["sub"]
-    access_token = create_access_token({"sub": user_id})
-    new_refresh_token = create_refresh_token({"sub": user_id})
-    return {
-        "access_token": access_token,
-        "refresh_token": new_refresh_token,
-        "token_type": "bearer"
-    } 
\ No newline at end of file
+def refresh_token(data: RefreshTokenRequest):
+    """Rotate a refresh token into a new access/refresh pair"""
+    return rotate_refresh_token(data.refresh_token)
+
+@router.post("/logout")
+def logout(data: LogoutRequest = None, token: str = Depends(oauth2_scheme)):
+    """Revoke the current access token and its whole login session"""
+    payload = decode_token(token)
+    if not payload or not payload.get("jti"):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    try:
+        revoke_token(payload)
+        if data and data.refresh_token:
+            refresh_payload = decode_token(data.refresh_token)
+            if refresh_payload and refresh_payload.get("jti") and refresh_payload.get("sub") == payload.get("sub"):
+                revoke_token(refresh_payload)
+    except redis.RedisError:
+        raise HTTPException(status_code=503, detail="Token service unavailable")
+    return {"message": "Logged out successfully"}
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.database import get_db, get_async_read_db
+from app.core.security import get_current_user, get_current_principal_async, Principal
 from app.models.user import User
-from app.schemas.device import DeviceResponse, DeviceConnectRequest, DeviceStatusResponse
+from app.schemas.device import DeviceResponse, DeviceConnectRequest, DeviceStatusResponse, DeviceTelemetryStatus
 from app.controllers.device_controller import DeviceController
 
 router = APIRouter(prefix="/devices", tags=["Devices"])
@@ -34,6 +36,18 @@ def disconnect_device(
     """Disconnect a device"""
     return DeviceController.disconnect_device(db, str(current_user.id), device_id)
 
+@router.get("/status", response_model=list[DeviceTelemetryStatus])
+async def get_fleet_status(
+    ids: str = Query(..., description="Comma-separated device IDs"),
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Connection, battery and signal state for many devices at once (fleet dashboards)"""
+    device_ids = [device_id.strip() for device_id in ids.split(",") if device_id.strip()]
+    if len(device_ids) > settings.DEVICE_STATUS_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.DEVICE_STATUS_MAX_IDS} device IDs per request")
+    return await DeviceController.get_fleet_status_async(db, str(current_user.id), device_ids)
+
 @router.get("/{device_id}/status", response_model=DeviceStatusResponse)
 def get_device_status(
     device_id: str,
@@ -59,8 +73,8 @@ def get_device_signal_strength(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get signal strength for a specific device"""
-    return DeviceController.get_signal_strength(device_id)
+    """Latest signal strength reported by the device"""
+    return DeviceController.get_signal_strength(db, str(current_user.id), device_id)
 
 @router.get("/{device_id}/battery")
 def get_device_battery(
@@ -68,8 +82,18 @@ def get_device_battery(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get battery level for a specific device"""
-    return DeviceController.get_battery_level(device_id)
+    """Latest battery level reported by the device"""
+    return DeviceController.get_battery_level(db, str(current_user.id), device_id)
+
+@router.get("/{device_id}/telemetry")
+def get_device_telemetry(
+    device_id: str,
+    hours: int = Query(24, ge=1, le=24 * 30),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recent battery / signal samples and downsampled history for a device"""
+    return DeviceController.get_device_telemetry(db, str(current_user.id), device_id, hours)
 
 @router.post("/{device_id}/pair")
 def pair_device(
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_principal_async, Principal
+from app.core.http_cache import conditional_get
 from app.models.user import User
 from app.schemas.ecg import (
     ECGResponse, ECGStartRequest, ECGDataRequest, ECGCompleteRequest,
     ECGDownloadResponse, ECGAnalysisResponse
 )
 from app.controllers.ecg_controller import ECGController
+from app.core.responses import RowsJSONResponse
 
 router = APIRouter(prefix="/ecg", tags=["ECG"])
 
@@ -21,15 +23,14 @@ def start_ecg_recording(
     ecg = ECGController.start_ecg_recording(db, str(current_user.id), data.device_id, data.dict())
     return ecg
 
-@router.get("/history", response_model=list[ECGResponse])
+@router.get("/history", response_model=list[ECGResponse], response_class=RowsJSONResponse)
 def get_ecg_history(
     limit: int = Query(50, description="Number of records to return"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get ECG recording history for user"""
-    ecg_recordings = ECGController.get_ecg_history(db, str(current_user.id), limit)
-    return ecg_recordings
+    return RowsJSONResponse(ECGController.get_ecg_history(db, str(current_user.id), limit))
 
 @router.post("/{ecg_id}/data", response_model=ECGResponse)
 def update_ecg_data(
@@ -53,10 +54,10 @@ def complete_ecg_recording(
     ecg = ECGController.complete_ecg_recording(db, ecg_id, data.final_data)
     return ecg
 
-@router.get("/{ecg_id}", response_model=ECGResponse)
+@router.get("/{ecg_id}", response_model=ECGResponse, dependencies=[Depends(conditional_get("ecg"))])
 def get_ecg_recording(
     ecg_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal_async),
     db: Session = Depends(get_db)
 ):
     """Get ECG recording by ID"""
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_read_db
+from app.core.security import get_current_user, get_current_principal_async, Principal
+from app.core.http_cache import conditional_get
 from app.models.user import User
 from app.schemas.family import (
     FamilyResponse, FamilyMemberResponse, FamilyInviteRequest, 
@@ -191,15 +192,17 @@ def get_family_member_health(
 @router.get("/health-summary")
 def get_family_health_summary(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get health summary for all family members"""
     return FamilyController.get_family_health_summary(db, str(current_user.id)) 
 
-@router.get("/health-dashboard")
+@router.get("/health-dashboard", dependencies=[
+    Depends(conditional_get("vitals", subjects=FamilyController.get_dashboard_member_ids_async))
+])
 def get_family_health_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
 ):
     """Get comprehensive family health dashboard"""
     return FamilyController.get_family_health_dashboard(db, str(current_user.id))
@@ -207,7 +210,7 @@ def get_family_health_dashboard(
 @router.get("/health-comparison")
 def get_family_health_comparison(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Compare health data across family members"""
     return FamilyController.get_family_health_comparison(db, str(current_user.id))
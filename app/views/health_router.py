@@ -1,29 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_async_db, get_read_db, get_async_read_db
+from app.core.security import get_current_user, get_current_principal_async, Principal
 from app.models.user import User
-from app.schemas.vitals import VitalResponse, VitalIngestRequest, VitalHistoryRequest, ChartDataResponse, LiveVitalResponse
+from app.schemas.vitals import (
+    VitalResponse, VitalIngestRequest, VitalBatchIngestRequest, VitalBatchIngestResponse, DeviceTelemetryReport,
+    VitalHistoryRequest, ChartDataResponse, LiveVitalResponse
+)
 from app.controllers.health_controller import HealthController
+from app.core.responses import RowsJSONResponse
+from app.core.http_cache import conditional_get
+from app.core.config import settings
+from app.services import vital_codec
 
 router = APIRouter(prefix="/vitals", tags=["Health"])
 
-@router.post("/ingest", response_model=VitalResponse)
-def ingest_vital_data(
-    data: VitalIngestRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+def _ingest_body(json_schema: dict = None) -> dict:
+    """OpenAPI request body for ingest routes, which take JSON or the binary vitals format"""
+    json_content = {"schema": json_schema} if json_schema else {}
+    return {"requestBody": {"required": True, "content": {
+        "application/json": json_content,
+        vital_codec.MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }}}
+
+async def _read_ingest(request: Request, model, decode):
+    """The body decoded from the binary vitals format, or else validated as the JSON model"""
+    body = await request.body()
+    if request.headers.get("content-type", "").split(";")[0].strip() == vital_codec.MEDIA_TYPE:
+        try:
+            return decode(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+@router.post("/ingest", response_model=VitalResponse, openapi_extra=_ingest_body(VitalIngestRequest.model_json_schema()))
+async def ingest_vital_data(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Ingest vital data from connected device (called every 2 seconds)"""
-    return HealthController.ingest_vital_data(db, str(current_user.id), data.dict())
+    data = await _read_ingest(request, VitalIngestRequest, vital_codec.decode_reading)
+    vital_data = data if isinstance(data, dict) else data.model_dump()
+    return await HealthController.ingest_vital_data_async(db, str(current_user.id), vital_data)
 
-@router.get("/history", response_model=list[VitalResponse])
-def get_history(
+@router.post("/ingest/batch", response_model=VitalBatchIngestResponse, openapi_extra=_ingest_body())
+async def ingest_vital_batch(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ingest several readings from one device, oldest first (e.g. a backlog buffered offline)"""
+    data = await _read_ingest(request, VitalBatchIngestRequest, vital_codec.decode)
+    if isinstance(data, VitalBatchIngestRequest):
+        if not data.readings:
+            raise HTTPException(status_code=400, detail="No readings in payload")
+        data = vital_codec.from_readings(data.device_id, [reading.model_dump() for reading in data.readings],
+                                         telemetry=data.model_dump(include=set(DeviceTelemetryReport.model_fields)))
+    if len(data) > settings.INGEST_BATCH_MAX_READINGS:
+        raise HTTPException(status_code=413, detail="Too many readings in one request")
+    return await HealthController.ingest_vital_batch_async(db, str(current_user.id), data)
+
+@router.get("/history", response_model=list[VitalResponse], response_class=RowsJSONResponse)
+async def get_history(
     start_time: str = Query(None, description="Start time (ISO format)"),
     end_time: str = Query(None, description="End time (ISO format)"),
     limit: int = Query(100, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get vitals history with optional time filtering"""
     from datetime import datetime
@@ -31,36 +81,36 @@ def get_history(
     start_dt = datetime.fromisoformat(start_time) if start_time else None
     end_dt = datetime.fromisoformat(end_time) if end_time else None
 
-    return HealthController.get_vital_history(
+    return RowsJSONResponse(await HealthController.get_vital_history_async(
         db,
         str(current_user.id),
         start_dt,
         end_dt,
         limit
-    )
+    ))
 
 @router.get("/live", response_model=LiveVitalResponse)
-def get_live_vital(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_live_vital(
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get latest live vital data"""
-    live_data = HealthController.get_live_vital(str(current_user.id))
+    live_data = await HealthController.get_live_vital_async(db, str(current_user.id))
     if not live_data:
         raise HTTPException(status_code=404, detail="No live vital data available")
     return live_data
 
-@router.get("/charts/{period}", response_model=ChartDataResponse)
-def get_chart_data(
+@router.get("/charts/{period}", response_model=ChartDataResponse, dependencies=[Depends(conditional_get("vitals"))])
+async def get_chart_data(
     period: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get aggregated chart data for specified period"""
     if period not in ["hour", "day", "week"]:
         raise HTTPException(status_code=400, detail="Invalid period. Use: hour, day, or week")
 
-    data = HealthController.get_chart_data(db, str(current_user.id), period)
+    data = await HealthController.get_chart_data_async(db, str(current_user.id), period)
     return ChartDataResponse(period=period, data=[data])
 
 # NEW ENDPOINTS FOR FRONTEND COMPATIBILITY
@@ -73,12 +123,12 @@ def get_health_score(
     """Get calculated health score (0-100) based on vital trends"""
     return HealthController.calculate_health_score(db, str(current_user.id))
 
-@router.get("/trends/{metric}")
+@router.get("/trends/{metric}", dependencies=[Depends(conditional_get("vitals"))])
 def get_health_trends(
     metric: str,
     period: str = Query("week", description="Time period: day, week, month"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: Session = Depends(get_read_db)
 ):
     """Get health trends for specific metric over time period"""
     if metric not in ["heart_rate", "spo2", "temperature", "steps"]:
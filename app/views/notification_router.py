@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.security import get_current_user, get_current_principal_async, Principal
 from app.models.user import User
 from app.controllers.notification_controller import NotificationController
 from typing import List
@@ -43,12 +44,12 @@ def update_notification_settings(
     return NotificationController.update_notification_settings(db, str(current_user.id), settings)
 
 @router.get("/unread-count")
-def get_unread_count(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_unread_count(
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get count of unread notifications"""
-    return NotificationController.get_unread_count(db, str(current_user.id))
+    return await NotificationController.get_unread_count_async(db, str(current_user.id))
 
 @router.delete("/{notification_id}")
 def delete_notification(
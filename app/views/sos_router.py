@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.security import get_current_user, get_current_principal_async, Principal
 from app.models.user import User
 from app.schemas.sos import (
     SOSResponse, SOSTriggerRequest, SOSCancelRequest, 
@@ -12,13 +13,13 @@ from app.controllers.sos_controller import SOSController
 router = APIRouter(prefix="/sos", tags=["SOS"])
 
 @router.post("/trigger", response_model=SOSResponse)
-def trigger_sos(
+async def trigger_sos(
     data: SOSTriggerRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Trigger SOS emergency alert"""
-    sos = SOSController.trigger_sos(db, str(current_user.id), data.dict())
+    sos = await SOSController.trigger_sos_async(db, str(current_user.id), data.dict())
     return sos
 
 @router.post("/cancel", response_model=SOSResponse)
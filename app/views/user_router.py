@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.core.principal_cache import principal_cache
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdateRequest
 
@@ -36,6 +37,7 @@ def update_user_profile(
         
         db.commit()
         db.refresh(current_user)
+        principal_cache.invalidate(current_user.id)
         return current_user.to_dict()
     except HTTPException:
         raise
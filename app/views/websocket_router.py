@@ -1,6 +1,10 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from app.core.security import decode_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.controllers.family_controller import FamilyController
+from app.core.database import get_async_read_db
+from app.core.principal_cache import principal_cache
+from app.core.security import decode_token, get_token_user_id_async
 from app.services.redis_service import redis_service
 import json
 import asyncio
@@ -44,6 +48,59 @@ async def websocket_vital_updates(websocket: WebSocket, user_id: str):
     except WebSocketDisconnect:
         manager.disconnect(websocket, user_id)
 
+async def _authorize_alerts(websocket: WebSocket, user_id: str, db: AsyncSession) -> bool:
+    """True if the socket's access token belongs to user_id or to someone on their family dashboard
+
+    Browsers cannot set headers on a WebSocket, so the token may come as ?token=...
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        return False
+    try:
+        user_uuid = await get_token_user_id_async(token)
+        principal = await principal_cache.get_principal_async(db, user_uuid)
+        if principal is None:
+            return False
+        viewer_id = str(principal.id)
+        if viewer_id == user_id:
+            return True
+        return user_id in await FamilyController.get_dashboard_member_ids_async(db, viewer_id)
+    except HTTPException:
+        return False
+    finally:
+        # The socket may stay open for hours; do not hold a connection for it
+        await db.close()
+
+@router.websocket("/ws/alerts/{user_id}")
+async def websocket_health_alerts(websocket: WebSocket, user_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    """Forward health alerts raised at ingest (own and family members') to the client"""
+    if not await _authorize_alerts(websocket, user_id, db):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    pubsub = redis_service.async_client.pubsub()
+    await pubsub.subscribe(f"alerts:{user_id}")
+
+    async def forward():
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                await websocket.send_text(message["data"])
+
+    forwarder = asyncio.create_task(forward())
+    try:
+        while True:
+            # Keep connection alive
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        forwarder.cancel()
+        await pubsub.unsubscribe()
+        await pubsub.close()
+
 # Background task to send updates to WebSocket clients
 async def send_vital_updates_to_websocket(user_id: str, vital_data: dict):
     """Send vital updates to WebSocket clients"""
@@ -0,0 +1,121 @@
+"""Concurrent throughput of the sync vs async vitals history path.
+
+Serves both implementations side by side from one uvicorn process and drives
+them with the same number of concurrent clients. Point DATABASE_URL at
+Postgres for representative numbers; the default SQLite file works but
+serialises writers.
+
+    python -m benchmarks.async_throughput [--concurrency 200] [--requests 5000]
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.controllers.health_controller import HealthController
+from app.core.responses import RowsJSONResponse
+from app.core.database import Base, SessionLocal, engine, get_async_db, get_db
+from app.models.user import User, UserRole
+from app.models.vitals import Vital
+
+
+def seed(readings: int) -> str:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email=f"bench_{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", name="Bench", role=UserRole.PATIENT)
+        db.add(user)
+        db.flush()
+        now = datetime.utcnow()
+        db.add_all([
+            Vital(user_id=user.id, heart_rate=60 + i % 40, spo2=95 + i % 5, temperature=36.5, timestamp=now - timedelta(seconds=2 * i))
+            for i in range(readings)
+        ])
+        db.commit()
+        return str(user.id)
+    finally:
+        db.close()
+
+
+def build_app(user_id: str) -> FastAPI:
+    app = FastAPI()
+
+    # The ORM-and-to_dict path the history endpoint used before it went async
+    @app.get("/sync/history")
+    def sync_history(db: Session = Depends(get_db)):
+        vitals = db.query(Vital).filter(Vital.user_id == user_id).order_by(Vital.timestamp.desc()).limit(50).all()
+        return [vital.to_dict() for vital in vitals]
+
+    @app.get("/async/history")
+    async def async_history(db: AsyncSession = Depends(get_async_db)):
+        return RowsJSONResponse(await HealthController.get_vital_history_async(db, user_id, limit=50))
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def drive(url: str, concurrency: int, total: int):
+    latencies = []
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                resp = await client.get(url)
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        # Warm both pools before timing
+        await asyncio.gather(*(client.get(url) for _ in range(min(concurrency, 50))))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--readings", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(build_app(seed(args.readings)), port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        for variant in ("sync", "async"):
+            result = asyncio.run(drive(f"http://127.0.0.1:{port}/{variant}/history", args.concurrency, args.requests))
+            print(f"{variant:>5}: {result['rps']:8.1f} req/s   p50 {result['p50_ms']:7.1f} ms   p99 {result['p99_ms']:7.1f} ms")
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
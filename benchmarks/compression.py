@@ -0,0 +1,65 @@
+"""Response size and encode cost per Content-Encoding.
+
+Encodes a 1k-row vitals history and an ECG recording the way the API
+serves them, then reports wire size and median compression time for each
+codec the CompressionMiddleware can negotiate.
+
+    python -m benchmarks.compression [--rows 1000] [--repeat 20]
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+
+from app.core.compression import ENCODINGS, Encoder
+
+
+def vitals_history(rows: int) -> bytes:
+    rng = random.Random(7)
+    user_id, device_id, now = str(uuid.uuid4()), str(uuid.uuid4()), datetime.utcnow()
+    return orjson.dumps([{
+        "id": str(uuid.uuid4()), "user_id": user_id, "device_id": device_id,
+        "heart_rate": rng.randint(60, 100), "spo2": round(rng.uniform(95, 100), 1),
+        "temperature": round(rng.uniform(36.2, 37.2), 1), "steps": i * 3,
+        "blood_pressure_systolic": rng.randint(110, 130), "blood_pressure_diastolic": rng.randint(70, 85),
+        "respiratory_rate": rng.randint(12, 18), "health_condition": "normal", "is_anomaly": False,
+        "timestamp": (now - timedelta(seconds=2 * i)).isoformat(),
+    } for i in range(rows)])
+
+
+def ecg_recording(seconds: int = 30, rate: int = 500) -> bytes:
+    rng = random.Random(7)
+    samples = [round(0.1 * rng.gauss(0, 1) + (1.2 if i % rate < 10 else 0), 3) for i in range(seconds * rate)]
+    return orjson.dumps({"id": str(uuid.uuid4()), "status": "completed", "ecg_data": {"lead_I": samples}})
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    for name, body in (("vitals history", vitals_history(args.rows)), ("ecg recording", ecg_recording())):
+        print(f"\n{name}: {len(body) / 1024:.1f} KiB identity")
+        print(f"{'encoding':10}{'KiB':>10}{'ratio':>8}{'encode ms':>12}")
+        for encoding in ENCODINGS:
+            size = len(Encoder(encoding).compress(body, final=True))
+            ms = timed(lambda: Encoder(encoding).compress(body, final=True), args.repeat)
+            print(f"{encoding:10}{size / 1024:10.1f}{len(body) / size:7.1f}x{ms:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
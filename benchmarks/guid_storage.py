@@ -0,0 +1,108 @@
+"""CHAR(36) vs BINARY(16) GUID storage on a SQLite vitals table.
+
+Loads the same synthetic rows into a copy of the vitals table in each storage
+mode, then reports table/index sizes, a full scan (every GUID column decoded)
+and per-user index lookups.
+
+    python -m benchmarks.guid_storage [--rows 1000000] [--users 1000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, event, select
+
+from app.core.custom_types import GUID
+from app.models.vitals import Vital
+
+
+def vitals_table(binary: bool) -> Table:
+    """The vitals schema with GUID columns in the requested storage mode"""
+    columns = [
+        Column(c.name, GUID(binary=binary) if isinstance(c.type, GUID) else c.type, primary_key=c.primary_key)
+        for c in Vital.__table__.columns
+    ]
+    table = Table("vitals", MetaData(), *columns)
+    Index("ix_vitals_user_timestamp", table.c.user_id, table.c.timestamp)
+    return table
+
+
+def load(engine, table: Table, rows: int, users: list, devices: list, seed: int) -> None:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 50000):
+            batch = []
+            for i in range(offset, min(offset + 50000, rows)):
+                owner = rng.randrange(len(users))
+                batch.append({
+                    "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                    "user_id": users[owner],
+                    "device_id": devices[owner],
+                    "heart_rate": rng.randint(55, 120),
+                    "spo2": rng.uniform(90, 100),
+                    "temperature": rng.uniform(36, 38),
+                    "health_condition": "normal",
+                    "is_anomaly": False,
+                    "timestamp": start + timedelta(seconds=2 * i),
+                })
+            conn.execute(table.insert(), batch)
+
+
+def sizes(engine) -> dict:
+    with engine.connect() as conn:
+        return dict(conn.exec_driver_sql("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").all())
+
+
+def run(binary: bool, args, users, devices, directory) -> dict:
+    path = os.path.join(directory, f"vitals_{'binary' if binary else 'char'}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA journal_mode=OFF"))
+    table = vitals_table(binary)
+    table.metadata.create_all(engine)
+    load(engine, table, args.rows, users, devices, args.seed)
+
+    result = {"sizes": sizes(engine)}
+    scan = select(table.c.id, table.c.user_id, table.c.device_id, table.c.heart_rate)
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        count = sum(1 for _ in conn.execute(scan))
+        result["scan_s"] = time.perf_counter() - start
+        result["scan_us_per_row"] = result["scan_s"] / count * 1e6
+
+        lookup = select(table.c.id, table.c.timestamp).where(table.c.user_id == users[0]).order_by(table.c.timestamp.desc()).limit(100)
+        start = time.perf_counter()
+        for user_id in users[: args.lookups]:
+            conn.execute(lookup, {"user_id_1": user_id}).all()
+        result["lookup_ms"] = (time.perf_counter() - start) / args.lookups * 1000
+    engine.dispose()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    users = [uuid.uuid4() for _ in range(args.users)]
+    devices = [uuid.uuid4() for _ in range(args.users)]
+    with tempfile.TemporaryDirectory() as directory:
+        results = {mode: run(mode == "binary", args, users, devices, directory) for mode in ("char", "binary")}
+
+    print(f"{'':28}{'CHAR(36)':>14}{'BINARY(16)':>14}")
+    for name in ("vitals", "ix_vitals_user_timestamp"):
+        char, binary = results["char"]["sizes"][name], results["binary"]["sizes"][name]
+        print(f"{name + ' MB':28}{char / 2**20:14.1f}{binary / 2**20:14.1f}")
+    for key, label in (("scan_s", "full scan s"), ("scan_us_per_row", "scan us/row"), ("lookup_ms", "user lookup ms")):
+        print(f"{label:28}{results['char'][key]:14.3f}{results['binary'][key]:14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Vital ingest body decoding: JSON + Pydantic vs the binary vitals format.
+
+Times what the ingest routes do with a request body before any database work.
+The JSON path validates VitalIngestRequest / VitalBatchIngestRequest and
+builds the analysis columns. The binary path runs vital_codec.decode_reading
+for a single reading and vital_codec.decode for a batch.
+
+    python -m benchmarks.ingest_codec [--batch 300] [--repeat 2000]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.schemas.vitals import VitalBatchIngestRequest, VitalIngestRequest
+from app.services import vital_codec
+
+
+def readings(count: int):
+    rng = random.Random(7)
+    return [{
+        "heart_rate": rng.randint(60, 100), "spo2": round(rng.uniform(95, 100), 1),
+        "temperature": round(rng.uniform(36.2, 37.2), 2), "steps": i * 3,
+        "blood_pressure_systolic": rng.randint(110, 130), "blood_pressure_diastolic": rng.randint(70, 85),
+        "respiratory_rate": rng.randint(12, 18),
+    } for i in range(count)]
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    single = readings(1)
+    single_json = json.dumps({"device_id": "watch-0001", **single[0]}).encode()
+    single_binary = vital_codec.encode("watch-0001", single)
+
+    batch = readings(args.batch)
+    batch_json = json.dumps({"device_id": "watch-0001", "readings": batch}).encode()
+    batch_binary = vital_codec.encode("watch-0001", batch)
+
+    def json_single():
+        return VitalIngestRequest.model_validate_json(single_json).model_dump()
+
+    def json_batch():
+        request = VitalBatchIngestRequest.model_validate_json(batch_json)
+        return vital_codec.from_readings(request.device_id, [r.model_dump() for r in request.readings])
+
+    cases = (
+        ("single", single_json, single_binary, json_single, lambda: vital_codec.decode_reading(single_binary)),
+        (f"batch of {args.batch}", batch_json, batch_binary, json_batch, lambda: vital_codec.decode(batch_binary)),
+    )
+    repeat = {"single": args.repeat}
+    print(f"{'payload':16}{'JSON B':>10}{'binary B':>10}{'JSON us':>10}{'binary us':>11}{'speedup':>9}")
+    for name, json_body, binary_body, via_json, via_binary in cases:
+        runs = repeat.get(name, max(args.repeat // 10, 20))
+        json_us, binary_us = timed(via_json, runs), timed(via_binary, runs)
+        print(f"{name:16}{len(json_body):10}{len(binary_body):10}{json_us:10.1f}{binary_us:11.1f}{json_us / binary_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
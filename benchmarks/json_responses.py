@@ -0,0 +1,98 @@
+"""History endpoint serialization: response_model validation vs orjson rows.
+
+For 1k-row vitals and ECG history payloads, times the previous pipeline
+(ORM entities -> to_dict -> response_model validation -> stdlib json) against
+selecting the response columns as rows and encoding them with
+RowsJSONResponse. Both include the query.
+
+    python -m benchmarks.json_responses [--rows 1000] [--repeat 20]
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.responses import RowsJSONResponse, response_columns
+from app.models import user, vitals, device, ecg  # noqa: F401  register tables
+from app.models.ecg import ECG
+from app.models.vitals import Vital
+from app.schemas.ecg import ECGResponse
+from app.schemas.vitals import VitalResponse
+
+
+def seed(db, rows: int) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    now = datetime.utcnow()
+    db.add_all([
+        Vital(user_id=user_id, device_id=uuid.uuid4(), heart_rate=60 + i % 40, spo2=95 + i % 5 / 2, temperature=36.6,
+              steps=i, blood_pressure_systolic=120, blood_pressure_diastolic=80, respiratory_rate=15,
+              health_condition="normal", is_anomaly=False, timestamp=now - timedelta(seconds=2 * i))
+        for i in range(rows)
+    ])
+    db.add_all([
+        ECG(user_id=user_id, device_id=uuid.uuid4(), ecg_data=json.dumps([0.1] * 500), ecg_samples=b"\x00" * 60000,
+            lead_count=12, sample_count=5000, status="completed", file_size=2048,
+            created_at=now - timedelta(minutes=i))
+        for i in range(rows)
+    ])
+    db.commit()
+    return user_id
+
+
+def via_response_model(db, model, schema, order_by, user_id, rows):
+    """What FastAPI did for these routes: validate the dicts, encode, json.dumps"""
+    adapter = TypeAdapter(list[schema])
+    entities = db.query(model).filter(model.user_id == user_id).order_by(order_by.desc()).limit(rows).all()
+    validated = adapter.validate_python([entity.to_dict() for entity in entities])
+    return json.dumps(adapter.dump_python(validated, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def via_rows(db, model, schema, order_by, user_id, rows):
+    result = db.query(*response_columns(model, schema)).filter(model.user_id == user_id).order_by(order_by.desc()).limit(rows).all()
+    return RowsJSONResponse(result).body
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    user_id = seed(db, args.rows)
+
+    print(f"{'payload':16}{'response_model ms':>20}{'orjson rows ms':>18}{'speedup':>10}")
+    for name, model, schema, order_by in (
+        ("vitals history", Vital, VitalResponse, Vital.timestamp),
+        ("ecg history", ECG, ECGResponse, ECG.created_at),
+    ):
+        old = via_response_model(db, model, schema, order_by, user_id, args.rows)
+        new = via_rows(db, model, schema, order_by, user_id, args.rows)
+        assert json.loads(old) == json.loads(new), f"{name} payloads differ"
+
+        db.expunge_all()
+        baseline = timed(lambda: (via_response_model(db, model, schema, order_by, user_id, args.rows), db.expunge_all()), args.repeat)
+        fast = timed(lambda: via_rows(db, model, schema, order_by, user_id, args.rows), args.repeat)
+        print(f"{name:16}{baseline:20.2f}{fast:18.2f}{baseline / fast:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cold-start time of an API worker.
+
+Each run starts a fresh interpreter, imports app.main, runs the lifespan
+startup and serves GET /health, which is roughly what a new autoscaled
+worker does before it can take traffic. --top also lists the slowest
+imports from -X importtime.
+
+    python -m benchmarks.startup_time [--runs 10] [--top 15]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    assert client.get("/health").status_code == 200
+served = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_response_s": served - start}))
+"""
+
+
+def probe() -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int):
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=0, help="list the N imports with the most self time")
+    args = parser.parse_args(argv)
+
+    results = [probe() for _ in range(args.runs)]
+    for key in ("import_s", "first_response_s"):
+        values = [r[key] for r in results]
+        print(f"{key:18} median {statistics.median(values):.3f}s   min {min(values):.3f}s   max {max(values):.3f}s")
+
+    if args.top:
+        print(f"\n{'self ms':>9} {'cumul ms':>9}  module")
+        for self_us, cumulative_us, name in slowest_imports(args.top):
+            print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()